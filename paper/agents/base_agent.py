@@ -1,16 +1,22 @@
 from abc import ABC, abstractmethod
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
-from core.logger import logger
+from core.llm_engine import LLMEngine, get_llm_engine
+from core.logger import log
 
 
 class BaseAgent(ABC):
     """
     Base class for all agents in the system.
+
+    Agents make their LLM calls through self.llm, the shared LLMEngine unless one is passed in.
     """
 
     name: str = "base"
 
+    def __init__(self, llm: Optional[LLMEngine] = None):
+        self.llm = llm or get_llm_engine()
+
     @abstractmethod
     async def run(self, *args: Any, **kwargs: Any) -> Any:
         """
@@ -21,6 +27,6 @@ class BaseAgent(ABC):
     async def log(self, message: str, **context: Dict[str, Any]) -> None:
         prefix = f"[{self.name}]"
         if context:
-            logger.info(f"{prefix} {message} | ctx={context}")
+            log.info(f"{prefix} {message} | ctx={context}")
         else:
-            logger.info(f"{prefix} {message}")
+            log.info(f"{prefix} {message}")
@@ -1,26 +1,46 @@
+import asyncio
 import os
 import re
-from openai import AsyncOpenAI
+import textwrap
+import time
+from typing import Callable, List, Optional, Tuple
 from config import Config
-from schemas.models import MissionPlan, Task, TaskParams
+from core.context_builder import count_tokens
+from core.geo import drone_targets, mission_targets
+from agents.base_agent import BaseAgent
+from core.llm_engine import LLMEngine
+from core.plan_cache import PlanCache
+from core.plan_stream import TaskStreamParser
+from schemas.models import MemoryContext, MissionPlan, Task, TaskParams
 from core.logger import log
 
 
-class SupervisorAgent:
-    def __init__(self, memory):
-        # Use OpenAI-compatible server (e.g., Ollama) via base_url
-        self.client = AsyncOpenAI(
-            api_key=Config.OPENAI_KEY or "ollama",
-            base_url=Config.LLM_API_BASE,
-        )
+class SupervisorAgent(BaseAgent):
+    name = "supervisor"
+
+    def __init__(self, memory, llm: Optional[LLMEngine] = None, drone_ids: Optional[List[int]] = None):
+        # Shared LLMEngine over the pooled OpenAI-compatible client (e.g., Ollama via Config.LLM_API_BASE)
+        super().__init__(llm)
         self.memory = memory
-        self.system_prompt = """
-        You are the Mission Supervisor for a 2-UAV swarm. 
+        # The swarm to plan for (Config.DRONE_CONFIG unless given)
+        self.drone_ids = list(drone_ids or Config.DRONE_CONFIG)
+        # Plans for repeated missions under an unchanged memory context skip the LLM call
+        self.plan_cache = PlanCache(
+            Config.PLAN_CACHE_PATH, capacity=Config.PLAN_CACHE_SIZE, threshold=Config.PLAN_CACHE_THRESHOLD
+        )
+        # Timings of the last plan_mission call (ms from its start): first task handed out, plan complete
+        self.last_timing: dict = {}
+        # One record per plan_mission call: which planner's plan was used, and latencies (ms)
+        self.history: List[dict] = []
+        # Prompt token counts of the last plan: system prompt, memory context, mission (+ server-reported total)
+        self.last_prompt_tokens: dict = {}
+        # Dedented: indentation costs tokens on every line and tells the model nothing
+        self.system_prompt = textwrap.dedent("""
+        You are the Mission Supervisor for a {n}-UAV swarm. 
         Your goal is to decompose high-level user commands into atomic tasks.
         
         Available Drones:
-        - Drone 1 (Worker)
-        - Drone 2 (Worker)
+        {drones}
         
         CRITICAL SAFETY RULES:
         1. BEFORE assigning any task, you MUST carefully read the section titled 'CONTEXT FROM MEMORY' below.
@@ -37,90 +57,345 @@ class SupervisorAgent:
         - For each drone, include a move task to its target coordinates before any scan task.
         - Only produce actions in this set: move, scan, return.
         - Keep altitudes from user input; if none given, default to 10m.
+        - Each drone's tasks run in list order. Leave depends_on null for that; set it to the task_ids
+          (earlier in the list) that must finish first only to order tasks across drones or let tasks overlap.
         
         Output a STRICT JSON plan. 
         For 'move' tasks, you MUST provide lat/lon in params.
         For 'scan' tasks, provide a scan_target in params (e.g., 'car', 'person', 'sector A').
         In the reasoning, explicitly mention any hazards from CONTEXT FROM MEMORY and how they affected the plan.
+        """).strip().format(n=len(self.drone_ids), drones=self._drone_roster(self.drone_ids))
+
+    @staticmethod
+    def _drone_roster(drone_ids: List[int]) -> str:
+        """One line per drone for a small swarm; a large one is summarised so the prompt stays short."""
+        if len(drone_ids) <= 4:
+            return "\n".join(f"- Drone {d} (Worker)" for d in drone_ids)
+        return f"- Drones {', '.join(str(d) for d in drone_ids)} (Workers)"
+
+    async def run(self, user_command: str, **kwargs) -> MissionPlan:
+        return await self.plan_mission(user_command, **kwargs)
+
+    async def plan_mission(
+        self,
+        user_command: str,
+        memory_context: Optional[MemoryContext] = None,
+        on_task: Optional[Callable[[Task], None]] = None,
+        on_swap: Optional[Callable[[MissionPlan], tuple]] = None,
+    ) -> MissionPlan:
         """
+        memory_context: result of MemoryInterface.retrieve() for this mission, if the caller
+        already has one (e.g. from the CLI preview); otherwise it is retrieved here.
+        on_task: called with each validated task, in plan order, so the caller can start
+        executing before planning finishes. With Config.PLAN_STREAMING the LLM output is
+        streamed and tasks are handed out as they arrive; otherwise (and for cached or
+        fallback plans) they are handed out once the full plan has been validated.
 
-    async def plan_mission(self, user_command: str) -> MissionPlan:
+        With Config.PLAN_SLO_MS the LLM and the heuristic planner race (see _race_plans);
+        on_swap (e.g. TaskGraph.replace_pending) enables the late-LLM-plan hot swap.
+        Streaming is not combined with the race: the SLO mode takes precedence.
+        """
         log.section("Supervisor Planning")
+        t_start = time.perf_counter()
+        self.last_timing = {}
 
         # --- PHASE 4 INTEGRATION: RAG (Retrieval) ---
-        context = await self.memory.retrieve_context(user_command)
+        if memory_context is None:
+            memory_context = await self.memory.retrieve(user_command)
+        context = memory_context.text
         log.info(f"Retrieved Context: {context}")
         
         # Inject context into the prompt
         rag_prompt = f"{self.system_prompt}\n\nCONTEXT FROM MEMORY:\n{context}"
+        messages = [
+            {"role": "system", "content": rag_prompt},
+            {"role": "user", "content": user_command}
+        ]
+
+        self.last_prompt_tokens = {
+            "system": count_tokens(self.system_prompt),
+            "context": memory_context.tokens or count_tokens(context),
+            "mission": count_tokens(user_command),
+        }
+        log.info(
+            f"[Supervisor] Prompt ~{sum(self.last_prompt_tokens.values())} tokens "
+            f"(system {self.last_prompt_tokens['system']}, context {self.last_prompt_tokens['context']}, "
+            f"mission {self.last_prompt_tokens['mission']})"
+        )
+
+        def emit(task: Task):
+            self.last_timing.setdefault("first_task_ms", (time.perf_counter() - t_start) * 1000.0)
+            on_task(task)
 
         plan = None
-        try:
-            completion = await self.client.beta.chat.completions.parse(
-                model=Config.MODEL_NAME,
-                temperature=0,
-                messages=[
-                    {"role": "system", "content": rag_prompt},
-                    {"role": "user", "content": user_command}
-                ],
-                response_format=MissionPlan,
+        emitted: List[Task] = []
+        dispatched = False
+        digest = PlanCache.context_digest(rag_prompt)
+        # Same text as the retrieval query, so this is an embedding-cache hit
+        mission_vector = await self.memory.embed(user_command) if self.plan_cache.enabled else None
+
+        def remember(plan: MissionPlan, llm_ms: float):
+            self.plan_cache.put(user_command, mission_vector, Config.MODEL_NAME, digest, plan, llm_ms)
+
+        cached = self.plan_cache.lookup(user_command, mission_vector, Config.MODEL_NAME, digest, validate=self._plan_ok)
+        if cached is not None:
+            plan = cached
+            self.last_timing["planner"] = "cache"
+            log.info("[PlanCache] Reusing plan for this mission and memory context (LLM call skipped).")
+        elif Config.PLAN_SLO_MS > 0:
+            plan, dispatched = await self._race_plans(
+                messages, user_command, context, t_start, remember, emit if on_task else None, on_swap
             )
-            plan = completion.choices[0].message.parsed if completion and completion.choices else None
-        except Exception as e:
-            log.error(f"Structured planning failed, falling back: {e}")
+        elif on_task is not None and Config.PLAN_STREAMING:
+            t0 = time.perf_counter()
+            plan, complete = await self._stream_plan(messages, emitted, emit)
+            if plan is not None:
+                self.last_timing["llm_ms"] = (time.perf_counter() - t0) * 1000.0
+                self.last_timing["planner"] = "llm" if complete else "llm (cut short)"
+                # A cut-short plan is only what arrived before the stream failed; never reuse it
+                if complete and self._plan_ok(plan):
+                    remember(plan, self.last_timing["llm_ms"])
+        else:
+            t0 = time.perf_counter()
+            plan = await self._llm_plan(messages)
+            if plan is not None:
+                self.last_timing["llm_ms"] = (time.perf_counter() - t0) * 1000.0
+                self.last_timing["planner"] = "llm"
+                # Only a plan that passes the task checks is cached; a bad one raises below every time
+                if self._plan_ok(plan):
+                    remember(plan, self.last_timing["llm_ms"])
 
         if plan is None:
-            plan = self._fallback_plan(user_command, context)
+            plan = await self._heuristic_plan(user_command, context)
+            self.last_timing["planner"] = "fallback"
             log.info("Using fallback planner (heuristic) due to LLM/parse failure.")
 
-        # Basic validation: ensure move tasks have coordinates
+        # Basic validation: ensure move tasks have coordinates (streamed tasks were checked on arrival)
         for task in plan.tasks:
-            if task.action_type == "move":
-                if task.params.lat is None or task.params.lon is None:
-                    msg = f"Missing coordinates for move task {task.task_id}; please supply lat/lon."
-                    log.error(msg)
-                    raise ValueError(msg)
+            self._check_task(task)
         # Use model_dump to print nicely
         log.print_json(plan.model_dump())
+        self.last_timing["plan_ms"] = (time.perf_counter() - t_start) * 1000.0
+        self.history.append({"mission": user_command, **self.last_timing})
+        if on_task is not None and not dispatched:
+            for task in plan.tasks[len(emitted):]:
+                emit(task)
         return plan
 
-    def _fallback_plan(self, user_command: str, context: str) -> MissionPlan:
+    async def _llm_plan(self, messages: list) -> Optional[MissionPlan]:
+        """Structured (buffered) LLM plan, or None if the call or the parse failed."""
+        try:
+            result = await self.llm.request(
+                messages,
+                response_format=MissionPlan,
+                model=Config.MODEL_NAME,
+                temperature=0,
+                validate=self._plan_ok,  # a plan plan_mission would reject must not be served again
+            )
+        except Exception as e:
+            log.error(f"Structured planning failed, falling back: {e}")
+            return None
+        if result["source"] != "network":
+            log.info(f"[Supervisor] LLM response from the engine ({result['source']}, {result['ms']:.0f} ms)")
+        elif result["prompt_tokens"]:
+            self.last_prompt_tokens["reported"] = result["prompt_tokens"]
+            log.info(f"[Supervisor] Server-reported prompt tokens: {result['prompt_tokens']}")
+        return result["value"]
+
+    async def _heuristic_plan(self, user_command: str, context: str) -> MissionPlan:
+        target_hazards = await self._target_hazards(user_command)
+        return self._fallback_plan(user_command, context, target_hazards)
+
+    async def _race_plans(self, messages, user_command, context, t_start, remember, emit, on_swap):
+        """
+        Deadline-driven planning: the LLM call and the heuristic planner start together.
+        An LLM plan that arrives within Config.PLAN_SLO_MS of the start of plan_mission wins.
+        Otherwise the heuristic plan is dispatched at the deadline; with Config.PLAN_HOT_SWAP
+        and an on_swap callback, the LLM keeps going (up to PLAN_HOT_SWAP_MAX_S more) and its
+        plan replaces the tasks that haven't started yet. Returns (plan, dispatched).
+        """
+        t0 = time.perf_counter()
+        llm_task = asyncio.create_task(self._llm_plan(messages))
+        heuristic_task = asyncio.create_task(self._heuristic_plan(user_command, context))
+        heuristic_task.add_done_callback(
+            lambda done: done.cancelled()
+            or self.last_timing.setdefault("fallback_ms", (time.perf_counter() - t0) * 1000.0)
+        )
+        deadline = t_start + Config.PLAN_SLO_MS / 1000.0
+        self.last_timing["slo_ms"] = Config.PLAN_SLO_MS
+        await asyncio.wait({llm_task}, timeout=max(0.0, deadline - time.perf_counter()))
+
+        if llm_task.done():
+            plan = llm_task.result()
+            if plan is not None:
+                heuristic_task.cancel()
+                self.last_timing["llm_ms"] = (time.perf_counter() - t0) * 1000.0
+                self.last_timing["planner"] = "llm"
+                # A plan that fails the task checks raises in plan_mission; don't cache it
+                if self._plan_ok(plan):
+                    remember(plan, self.last_timing["llm_ms"])
+                log.info(f"[Supervisor] LLM plan within SLO ({self.last_timing['llm_ms']:.0f} ms <= {Config.PLAN_SLO_MS:.0f} ms)")
+                return plan, False
+            self.last_timing["planner"] = "fallback"
+            log.info("Using fallback planner (heuristic) due to LLM/parse failure.")
+            return await heuristic_task, False
+
+        fallback = await heuristic_task
+        self.last_timing["planner"] = "fallback"
+        log.info(f"[Supervisor] LLM missed the {Config.PLAN_SLO_MS:.0f} ms SLO; dispatching the heuristic plan")
+        swap = Config.PLAN_HOT_SWAP and on_swap is not None and emit is not None
+        if not swap:
+            llm_task.cancel()
+            return fallback, False
+        for task in fallback.tasks:
+            self._check_task(task)
+        log.print_json(fallback.model_dump())
+        for task in fallback.tasks:
+            emit(task)
+
+        await asyncio.wait({llm_task}, timeout=Config.PLAN_HOT_SWAP_MAX_S)
+        if not llm_task.done():
+            llm_task.cancel()
+            log.info("[Supervisor] No LLM plan within the hot-swap window; keeping the heuristic plan")
+            return fallback, True
+        plan = llm_task.result()
+        if plan is None:
+            return fallback, True
+        self.last_timing["llm_ms"] = (time.perf_counter() - t0) * 1000.0
+        if not self._plan_ok(plan):
+            log.error("[Supervisor] Late LLM plan failed validation; keeping the heuristic plan")
+            return fallback, True
+        remember(plan, self.last_timing["llm_ms"])
+        dropped, queued = on_swap(plan)
+        self.last_timing["planner"] = "fallback->llm"
+        self.last_timing["swapped"] = queued
+        log.info(
+            f"[Supervisor] Hot-swapped to the LLM plan after {self.last_timing['llm_ms']:.0f} ms: "
+            f"{dropped} pending heuristic task(s) replaced by {queued} LLM task(s)"
+        )
+        return plan, True
+
+    @staticmethod
+    def _check_task(task: Task):
+        if task.action_type == "move":
+            if task.params.lat is None or task.params.lon is None:
+                msg = f"Missing coordinates for move task {task.task_id}; please supply lat/lon."
+                log.error(msg)
+                raise ValueError(msg)
+
+    @classmethod
+    def _plan_ok(cls, plan: MissionPlan) -> bool:
+        """Whether every task passes _check_task (which logs the first failure)."""
+        try:
+            for task in plan.tasks:
+                cls._check_task(task)
+        except ValueError:
+            return False
+        return True
+
+    async def _stream_plan(self, messages: list, emitted: List[Task], emit) -> Tuple[Optional[MissionPlan], bool]:
+        """
+        Streamed structured planning: each task is validated and emitted as soon as its JSON
+        object closes; the full plan is validated at the end of the stream. Returns (plan,
+        complete). The plan is None if the stream fails before any task was emitted (the caller
+        falls back as usual). After that, already dispatched tasks can't be taken back, so the
+        plan is cut short to them instead and complete is False.
+        """
+        parser = TaskStreamParser()
+        stream = self.llm.stream(
+            messages,
+            model=Config.MODEL_NAME,
+            temperature=0,
+            response_format=MissionPlan,
+        )
+        try:
+            while True:
+                try:
+                    arrived = parser.feed(await anext(stream))
+                except StopAsyncIteration:
+                    break
+                except Exception as e:
+                    return self._interrupted_plan(emitted, e), False
+                for task in arrived:
+                    self._check_task(task)  # same rule as the full-plan check, so it raises the same way
+                    emitted.append(task)
+                    log.info(f"[Supervisor] Streamed task {task.task_id} ({task.action_type}) for Drone {task.drone_id}")
+                    emit(task)
+        finally:
+            await stream.aclose()
+        try:
+            return MissionPlan.model_validate_json(parser.text), True
+        except Exception as e:
+            return self._interrupted_plan(emitted, e), False
+
+    @staticmethod
+    def _interrupted_plan(emitted: List[Task], error: Exception) -> Optional[MissionPlan]:
+        if not emitted:
+            log.error(f"Streamed planning failed, falling back: {error}")
+            return None
+        log.error(f"Streamed planning failed after {len(emitted)} task(s); stopping there: {error}")
+        return MissionPlan(reasoning=f"Plan stream interrupted after {len(emitted)} task(s): {error}", tasks=list(emitted))
+
+    async def _target_hazards(self, user_command: str) -> Optional[List[list]]:
+        """Spatial hazard hits per mission target, or None if the lookup is unavailable."""
+        coords = mission_targets(user_command)
+        if not coords:
+            return None
+        try:
+            return await self.memory.hazards_for_targets(coords)
+        except Exception as e:
+            log.error(f"Spatial hazard lookup failed, using context text: {e}")
+            return None
+
+    def _fallback_plan(self, user_command: str, context: str, target_hazards: Optional[List[list]] = None) -> MissionPlan:
         """
         Heuristic fallback if structured LLM planning fails.
         Extracts coordinates/altitude from the user command and applies safety context.
+        target_hazards: per-target hits from MemoryInterface.hazards_for_targets(); when missing,
+        the first coordinate pair in the context text is used as the hazard location.
         """
-        nums = re.findall(r"[-+]?\d+\.\d+", user_command)
-        coords = [(float(nums[i]), float(nums[i + 1])) for i in range(0, len(nums) - 1, 2)]
+        targets = drone_targets(user_command, self.drone_ids)
         alt_match = re.search(r"(\d+(?:\.\d+)?)\s*m", user_command)
         alt = float(alt_match.group(1)) if alt_match else 10.0
 
         reasoning = "Fallback plan: structured LLM unavailable. Using heuristic tasks."
 
-        # Derive hazard coordinates (if any) from CONTEXT: take first lat/lon pair in context
+        # The i-th coordinate pair is the i-th drone's (drone_targets, shared with the verdict)
+        hazard_for_drone = {drone_id: False for drone_id in self.drone_ids}
+        nearest_hazard = {}
+        if target_hazards is not None:
+            # Geo-radius check against every HAZARD rule, independent of embedding rank
+            for i, drone_id in enumerate(self.drone_ids):
+                if len(target_hazards) > i and target_hazards[i]:
+                    hazard_for_drone[drone_id] = True
+                    nearest_hazard[drone_id] = target_hazards[i][0]
+
+        # Without spatial data, derive hazard coordinates from CONTEXT: take first lat/lon pair in context
         hazard_nums = re.findall(r"[-+]?\d+\.\d+", context)
         hazard_coord = None
-        if len(hazard_nums) >= 2:
+        if target_hazards is None and len(hazard_nums) >= 2:
             hazard_coord = (float(hazard_nums[0]), float(hazard_nums[1]))
 
-        hazard_for_drone = {1: False, 2: False}
-        if hazard_coord and coords:
-            for drone_id in [1, 2]:
-                if len(coords) >= drone_id:
-                    d_lat, d_lon = coords[drone_id - 1]
-                    # Simple proximity check in degrees
-                    if abs(d_lat - hazard_coord[0]) < 1e-3 and abs(d_lon - hazard_coord[1]) < 1e-3:
-                        hazard_for_drone[drone_id] = True
+        if hazard_coord:
+            for drone_id, (d_lat, d_lon) in targets.items():
+                # Simple proximity check in degrees
+                if abs(d_lat - hazard_coord[0]) < 1e-3 and abs(d_lon - hazard_coord[1]) < 1e-3:
+                    hazard_for_drone[drone_id] = True
 
         # Scenario-specific override for clarity in experiments
         scenario = os.getenv("SCENARIO", "").lower()
-        if scenario == "hazard_a":
-            hazard_for_drone = {1: True, 2: False}
-        elif scenario == "hazard_2":
-            hazard_for_drone = {1: False, 2: True}
-        elif scenario == "hazard_b":
-            hazard_for_drone = {1: True, 2: True}
-        elif scenario == "stale_hazard":
-            hazard_for_drone = {1: False, 2: False}
+        overrides = {"hazard_a": {1}, "hazard_2": {2}, "hazard_b": {1, 2}, "stale_hazard": set()}
+        if scenario in overrides:
+            hazard_for_drone = {drone_id: drone_id in overrides[scenario] for drone_id in self.drone_ids}
+            if nearest_hazard:
+                reasoning += f" SCENARIO '{scenario}' decides the refused drones; the spatial hazard check is not applied."
+        else:
+            # Only reported once the flags are final, so the reasoning names exactly the refused drones
+            for drone_id, nearest in nearest_hazard.items():
+                reasoning += (
+                    f" Drone {drone_id} target is {nearest['distance_m']:.0f}m from hazard"
+                    f" '{nearest['text']}' (radius {nearest['radius_m']:.0f}m)."
+                )
 
         if "CRITICAL FAILURE" in context or "UNSAFE" in context or "CRASH" in context:
             if any(hazard_for_drone.values()):
@@ -130,10 +405,7 @@ class SupervisorAgent:
                 reasoning += " Hazard detected in memory; no current targets match hazard location."
 
         tasks = []
-        for drone_id in [1, 2]:
-            lat, lon = (coords[drone_id - 1] if len(coords) >= drone_id else (None, None))
-            if lat is None or lon is None:
-                continue
+        for drone_id, (lat, lon) in targets.items():
             if hazard_for_drone.get(drone_id, False):
                 # Skip hazardous assignments for this drone
                 continue
@@ -1,6 +1,8 @@
+import time
 from interfaces.drone_interface import DroneInterface
 from interfaces.api_interface import APIInterface
 from schemas.models import Task, ToolResult
+from core.flight_state import FlightStateMachine
 from core.logger import log
 
 
@@ -9,17 +11,40 @@ class WorkerAgent:
         self.drone_id = drone_id
         self.drone_hw = DroneInterface(drone_id)
         self.memory = memory
-        self.airborne = False
+        # disarmed/armed/airborne/landing from cached telemetry; skips arm/takeoff steps already done
+        self.flight = FlightStateMachine(self.drone_hw)
         # Simple simulated state-of-charge (1.0 = 100%)
         self.soc = 1.0
 
+    @property
+    def airborne(self) -> bool:
+        return self.flight.airborne
+
     async def initialize(self):
         """Connects to the physical/simulated hardware."""
         await self.drone_hw.connect()
 
+    async def bring_up(self):
+        """Connect, then wait until the drone is ready to arm."""
+        await self.initialize()
+        await self.drone_hw.wait_ready()
+
+    async def close(self):
+        """Stop the drone's telemetry streams, logging how its waits were served and its flight transitions."""
+        stats = self.drone_hw.telemetry.stats()
+        log.info(f"[Worker {self.drone_id}] Telemetry: " + "; ".join(
+            f"{name} {s['opens']} stream(s), {s['messages']} msgs, {s['waits']} waits ({s['cached']} from cache)"
+            for name, s in stats.items() if s["opens"]
+        ))
+        log.info(f"[Worker {self.drone_id}] Flight transitions: " + "; ".join(
+            f"{edge} x{s['count']} (mean {s['mean_ms']:.0f} ms)" for edge, s in self.flight.stats().items()
+        ) + f"; {self.flight.skipped} steps skipped")
+        await self.drone_hw.close()
+
     async def execute_task(self, task: Task) -> ToolResult:
         log.info(f"[Worker {self.drone_id}] Received Task: {task.action_type}")
-        
+        start, flight_before = time.perf_counter(), self.drone_hw.flight_s
+
         try:
             if self.soc <= 0.1 and task.action_type != "return":
                 raise RuntimeError("Low SOC – refusing non-return task")
@@ -36,25 +61,20 @@ class WorkerAgent:
                 if lat is None or lon is None:
                     raise ValueError("Move command missing Lat/Lon")
 
-                # First, ensure we are flying
-                await self.drone_hw.arm_and_takeoff(alt)
-                self.airborne = True
-                # Then go to target
+                # First, ensure we are flying at alt (arm/takeoff only if needed, else a direct climb)
+                await self.flight.ensure_airborne(alt)
+                # Then go to target; returns on arrival (position telemetry), so a following scan starts there
                 result_msg = await self.drone_hw.goto_location(lat, lon, alt)
 
             elif task.action_type == "scan":
-                # Ensure we are airborne before scanning; if already airborne, skip redundant takeoff
-                if not self.airborne:
-                    alt = task.params.alt
-                    await self.drone_hw.arm_and_takeoff(alt)
-                    self.airborne = True
+                # Ensure we are airborne before scanning; an airborne drone scans at its current altitude
+                await self.flight.ensure_airborne(task.params.alt, adjust=False)
 
                 # Perception disabled per requirement; just acknowledge scan
                 result_msg = "Scan completed."
 
             elif task.action_type == "return":
-                result_msg = await self.drone_hw.land()
-                self.airborne = False
+                result_msg = await self.flight.land()
             # --- PHASE 4/5 INTEGRATION: UPDATE ENERGY + WRITE TO MEMORY ---
             self._update_energy(task)
             current_state = {"soc": round(self.soc, 3), "alt": task.params.alt}
@@ -66,7 +86,7 @@ class WorkerAgent:
             )
 
             log.success(f"[Worker {self.drone_id}] Finished: {result_msg}")
-            return ToolResult(success=True, message=result_msg)
+            return ToolResult(success=True, message=result_msg, data=self._timing(start, flight_before))
 
         except Exception as e:
             log.error(f"[Worker {self.drone_id}] Failed: {str(e)}")
@@ -80,7 +100,13 @@ class WorkerAgent:
                 )
             except Exception:
                 pass
-            return ToolResult(success=False, message=str(e))
+            return ToolResult(success=False, message=str(e), data=self._timing(start, flight_before))
+
+    def _timing(self, start: float, flight_before: float) -> dict:
+        """Task wall time split into flight (climb / transit) and idle (everything else)."""
+        total = time.perf_counter() - start
+        flight = min(self.drone_hw.flight_s - flight_before, total)
+        return {"flight_s": round(flight, 3), "idle_s": round(total - flight, 3)}
 
     def _update_energy(self, task: Task) -> None:
         """Very simple energy model: SOC decreases per action."""
@@ -0,0 +1,40 @@
+import asyncio
+from collections import deque
+from typing import Deque, Dict, Iterable, Optional
+from schemas.models import Task
+
+
+class TaskDispatcher:
+    """
+    Baseline for the swarm_executor and task_dag benchmarks: the per-drone FIFO queues main.py
+    used before TaskGraph. Each drone runs its tasks strictly in submit order.
+
+    submit() queues a task; each worker loop pulls with next(), which returns None once
+    close() has been called and its queue is drained.
+    """
+
+    def __init__(self, drone_ids: Iterable[int]):
+        self.pending: Dict[int, Deque[Task]] = {d: deque() for d in drone_ids}
+        self._ready: Dict[int, asyncio.Event] = {d: asyncio.Event() for d in self.pending}
+        self.closed = False
+
+    def submit(self, task: Task):
+        """Queue a task for its drone (tasks for drones without a worker are ignored)."""
+        if task.drone_id in self.pending and not self.closed:
+            self.pending[task.drone_id].append(task)
+            self._ready[task.drone_id].set()
+
+    async def next(self, drone_id: int) -> Optional[Task]:
+        queue = self.pending[drone_id]
+        while not queue:
+            if self.closed:
+                return None
+            self._ready[drone_id].clear()
+            await self._ready[drone_id].wait()
+        return queue.popleft()
+
+    def close(self):
+        """No more tasks: workers stop once their queue is empty."""
+        self.closed = True
+        for event in self._ready.values():
+            event.set()
@@ -0,0 +1,84 @@
+"""
+Recall@k vs. latency for the IVF index against exact search.
+
+Run from the paper/ directory, e.g.:
+    python -m benchmarks.ann_recall --rows 1000000 --nlist 1000 --nprobe 4 8 16 32
+"""
+import argparse
+import time
+import numpy as np
+from rich.console import Console
+from rich.table import Table
+from core.ann_index import IVFIndex
+from core.vector_index import VectorIndex
+
+console = Console()
+
+
+def synthetic_embeddings(rows: int, dim: int, topics: int, seed: int = 0) -> np.ndarray:
+    """Clustered unit vectors, closer to real text embeddings than uniform noise."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(topics, dim)).astype(np.float32)
+    data = np.empty((rows, dim), dtype=np.float32)
+    chunk = 100000
+    for start in range(0, rows, chunk):
+        n = min(chunk, rows - start)
+        topic = rng.integers(0, topics, size=n)
+        data[start:start + n] = centers[topic] + 0.6 * rng.normal(size=(n, dim)).astype(np.float32)
+    return data
+
+
+def timed_search(index: VectorIndex, queries: np.ndarray, k: int):
+    results, latencies = [], []
+    for q in queries:
+        t0 = time.perf_counter()
+        results.append([row_id for row_id, _ in index.search(q, k)])
+        latencies.append(time.perf_counter() - t0)
+    return results, np.array(latencies) * 1000.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--topics", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--nlist", type=int, nargs="+", default=[0], help="0 = auto (~sqrt(rows))")
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    args = parser.parse_args()
+
+    data = synthetic_embeddings(args.rows, args.dim, args.topics)
+    queries = synthetic_embeddings(args.queries, args.dim, args.topics, seed=1)
+    ids = np.arange(1, args.rows + 1)
+
+    exact = VectorIndex("exact", initial_capacity=args.rows)
+    exact.add_many(ids, data)
+    truth, exact_ms = timed_search(exact, queries, args.k)
+
+    table = Table(title=f"ANN recall@{args.k} vs. latency ({args.rows} rows, dim {args.dim})")
+    for col in ("index", "nlist", "nprobe", "build s", f"recall@{args.k}", "mean ms", "p95 ms"):
+        table.add_column(col, justify="right")
+    table.add_row("exact", "-", "-", "-", "1.000", f"{exact_ms.mean():.2f}", f"{np.percentile(exact_ms, 95):.2f}")
+
+    for nlist in args.nlist:
+        ivf = IVFIndex("ivf", nlist=nlist, min_train=1, initial_capacity=args.rows)
+        # Load in blocks so the incremental assign/retrain path is what gets measured
+        t0 = time.perf_counter()
+        block = max(1, args.rows // 8)
+        for start in range(0, args.rows, block):
+            ivf.add_many(ids[start:start + block], data[start:start + block])
+        build_s = time.perf_counter() - t0
+        for nprobe in args.nprobe:
+            ivf.nprobe = nprobe
+            approx, ivf_ms = timed_search(ivf, queries, args.k)
+            recall = np.mean([len(set(a) & set(t)) / len(t) for a, t in zip(approx, truth) if t])
+            table.add_row(
+                "ivf", str(ivf.centroids.shape[0]), str(nprobe), f"{build_s:.1f}",
+                f"{recall:.3f}", f"{ivf_ms.mean():.2f}", f"{np.percentile(ivf_ms, 95):.2f}",
+            )
+    console.print(table)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Move -> scan chains: when does the scan start? The old goto_location returned as soon as the
+command was sent; a fixed post-command sleep is the usual patch; goto_location now waits for
+arrival on the position stream (core/arrival.py ArrivalTracker over a TelemetryHub).
+
+Each simulated drone flies `--legs` legs of 30..`--max-leg-m` metres at a log-normal speed around
+`--speed-mps`, publishing noisy fixes (`--gps-noise-m`) at `--rate-hz`, and scans for `--scan-ms`
+after every move. "Early" scans started more than `--radius-m` from the target; "dead time" is
+how long a drone hovered at the target before its scan started.
+
+Run from the paper/ directory, e.g.:
+    python -m benchmarks.arrival --drones 8 --legs 4 --sleep-s 6
+"""
+import argparse
+import asyncio
+import time
+from types import SimpleNamespace
+import numpy as np
+from rich.console import Console
+from rich.table import Table
+from core import logger
+from core.arrival import ArrivalTracker
+from core.geo import METERS_PER_DEG_LAT, haversine_m
+from core.telemetry import TelemetryHub
+
+console = Console()
+
+
+class SimDrone:
+    """Straight-line flight to the last goto target; position is a function of time."""
+
+    def __init__(self, drone_id: int, args, rng):
+        self.drone_id = drone_id
+        self.args = args
+        self.rng = rng
+        self.lat, self.lon = 47.3977, 8.5456
+        self.leg = None  # (t0, lat0, lon0, lat1, lon1, speed)
+        self.arrived_at = None
+
+    def goto(self, lat: float, lon: float):
+        now = time.perf_counter()
+        self.lat, self.lon = self.truth(now)
+        speed = self.args.speed_mps * self.rng.lognormal(0.0, 0.3)
+        self.leg = (now, self.lat, self.lon, lat, lon, speed)
+        self.arrived_at = None
+
+    def truth(self, now: float):
+        if self.leg is None:
+            return self.lat, self.lon
+        t0, lat0, lon0, lat1, lon1, speed = self.leg
+        dist = float(haversine_m(lat0, lon0, lat1, lon1))
+        frac = min(1.0, speed * (now - t0) / dist) if dist > 0 else 1.0
+        if frac >= 1.0 and self.arrived_at is None:
+            self.arrived_at = t0 + dist / speed if dist > 0 else t0
+        return lat0 + (lat1 - lat0) * frac, lon0 + (lon1 - lon0) * frac
+
+    async def positions(self):
+        period = 1.0 / self.args.rate_hz
+        noise = self.args.gps_noise_m / METERS_PER_DEG_LAT
+        while True:
+            await asyncio.sleep(period)
+            lat, lon = self.truth(time.perf_counter())
+            yield SimpleNamespace(latitude_deg=lat + self.rng.normal(0.0, noise), longitude_deg=lon + self.rng.normal(0.0, noise))
+
+
+async def run(mode: str, args) -> dict:
+    rng = np.random.default_rng(0)
+    early, dead, offsets = 0, [], []
+
+    async def fly(drone: SimDrone):
+        nonlocal early
+        hub = TelemetryHub(drone.drone_id, {"position": drone.positions})
+        hub.start()
+        for _ in range(args.legs):
+            lat0, lon0 = drone.truth(time.perf_counter())
+            bearing = rng.uniform(0.0, 2.0 * np.pi)
+            leg_m = rng.uniform(30.0, args.max_leg_m)
+            lat = lat0 + leg_m * np.cos(bearing) / METERS_PER_DEG_LAT
+            lon = lon0 + leg_m * np.sin(bearing) / (METERS_PER_DEG_LAT * np.cos(np.radians(lat0)))
+            drone.goto(lat, lon)
+            if mode == "sleep":
+                await asyncio.sleep(args.sleep_s)
+            elif mode == "arrival":
+                tracker = ArrivalTracker(drone.drone_id, lat, lon, radius=args.radius_m)
+                positions = hub.subscribe("position")
+                await tracker.follow(positions, timeout=60.0, log_every=0)
+                await positions.aclose()
+            now = time.perf_counter()
+            offset = float(haversine_m(*drone.truth(now), lat, lon))
+            offsets.append(offset)
+            if offset > args.radius_m:
+                early += 1
+            elif drone.arrived_at is not None:
+                dead.append(now - drone.arrived_at)
+            await asyncio.sleep(args.scan_ms / 1000.0)
+        await hub.close()
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(fly(SimDrone(d, args, rng)) for d in range(1, args.drones + 1)))
+    return {
+        "elapsed": time.perf_counter() - t0,
+        "early": early,
+        "offset": float(np.mean(offsets)),
+        "dead": float(np.mean(dead)) if dead else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--drones", type=int, default=8)
+    parser.add_argument("--legs", type=int, default=4)
+    parser.add_argument("--max-leg-m", type=float, default=120.0)
+    parser.add_argument("--speed-mps", type=float, default=20.0)
+    parser.add_argument("--rate-hz", type=float, default=10.0)
+    parser.add_argument("--gps-noise-m", type=float, default=0.5)
+    parser.add_argument("--radius-m", type=float, default=2.0)
+    parser.add_argument("--scan-ms", type=float, default=1000.0)
+    parser.add_argument("--sleep-s", type=float, default=6.0, help="fixed wait after each goto (sleep mode)")
+    args = parser.parse_args()
+    logger.console.quiet = True
+
+    table = Table(title=f"{args.drones} drones x {args.legs} move -> scan legs")
+    for col in ("move completes", "mission s", "early scans", "mean scan offset m", "dead time s"):
+        table.add_column(col, justify="right")
+    labels = {"command": "on command sent", "sleep": f"after {args.sleep_s:.0f} s sleep", "arrival": "on arrival"}
+    for mode in ("command", "sleep", "arrival"):
+        r = asyncio.run(run(mode, args))
+        table.add_row(
+            labels[mode], f"{r['elapsed']:.1f}", f"{r['early']}/{args.drones * args.legs}",
+            f"{r['offset']:.1f}", f"{r['dead']:.2f}",
+        )
+    console.print(table)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Effect of episodic compaction on retrieval latency and on retrieval results.
+
+Seeds repetitive worker logs (a few hundred distinct outcomes per drone/action, each
+logged many times with small state jitter), measures find_similar_episodes_with_flags,
+runs DatabaseManager.compact_episodes until its backlog is empty, and measures again.
+
+Run from the paper/ directory, e.g.:
+    python -m benchmarks.compaction --rows 200000 --templates 400 --tiers "0:0.97"
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+import numpy as np
+from rich.console import Console
+from rich.table import Table
+from config import Config
+from core.compaction import parse_tiers
+from core.database import DatabaseManager
+
+console = Console()
+ACTIONS = ("move", "scan", "return")
+
+
+def seed_database(path: str, rows: int, templates: int, dim: int, jitter: float, drones: int) -> np.ndarray:
+    """Bulk-load near-duplicate episodes; returns the template vectors (used as queries)."""
+    db = DatabaseManager(path)
+    rng = np.random.default_rng(0)
+    base = rng.normal(size=(templates, dim)).astype(np.float32)
+    base /= np.linalg.norm(base, axis=1, keepdims=True)
+    chunk = 20000
+    for start in range(0, rows, chunk):
+        n = min(chunk, rows - start)
+        t = rng.integers(0, templates, size=n)
+        vectors = base[t] + rng.normal(scale=jitter / np.sqrt(dim), size=(n, dim)).astype(np.float32)
+        db.conn.executemany(
+            "INSERT INTO episodic_memory (timestamp, drone_id, action_type, state_json, outcome_text, embedding, is_poisoned) "
+            "VALUES (datetime('now'), ?, ?, ?, ?, ?, 0)",
+            [
+                (
+                    int(t[i]) % drones + 1,
+                    ACTIONS[int(t[i]) % len(ACTIONS)],
+                    json.dumps({"soc": round(float(rng.uniform(0.2, 1.0)), 3)}),
+                    f"Outcome #{int(t[i])}",
+                    vectors[i].tobytes(),
+                )
+                for i in range(n)
+            ],
+        )
+        db.conn.commit()
+    db.close()
+    return base
+
+
+def measure(db: DatabaseManager, queries: np.ndarray, limit: int):
+    latencies, results = [], []
+    for q in queries:
+        t0 = time.perf_counter()
+        hits = db.find_similar_episodes_with_flags(q.tolist(), limit=limit)
+        latencies.append((time.perf_counter() - t0) * 1000.0)
+        results.append(hits)
+    return np.array(latencies), results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--templates", type=int, default=300)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--jitter", type=float, default=0.1, help="noise norm relative to the unit template")
+    parser.add_argument("--drones", type=int, default=2)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=5)
+    parser.add_argument("--tiers", default="0:0.97", help="COMPACTION_TIERS spec (seeded rows are all age 0)")
+    parser.add_argument("--batch", type=int, default=5000)
+    args = parser.parse_args()
+
+    Config.DB_WRITE_MODE = "sync"
+    rng = np.random.default_rng(1)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        base = seed_database(path, args.rows, args.templates, args.dim, args.jitter, args.drones)
+        picks = rng.integers(0, args.templates, size=args.queries)
+        queries = base[picks] + rng.normal(scale=0.3 / np.sqrt(args.dim), size=(args.queries, args.dim)).astype(np.float32)
+
+        db = DatabaseManager(path)
+        rows_before, index_before = db.count_episodes(), len(db.episode_index)
+        lat_before, res_before = measure(db, queries, args.limit)
+
+        steps, t0 = 0, time.perf_counter()
+        totals = {"scanned": 0, "folded": 0, "dropped": 0}
+        while True:
+            report = db.compact_episodes(tiers=parse_tiers(args.tiers), batch=args.batch)
+            steps += 1
+            for key in totals:
+                totals[key] += report[key]
+            if not report["backlog"]:
+                break
+        compact_s = time.perf_counter() - t0
+        rows_after, index_after = db.count_episodes(), len(db.episode_index)
+        lat_after, res_after = measure(db, queries, args.limit)
+        db.close()
+
+    top1_same = np.mean([bool(b) and bool(a) and b[0]["text"] == a[0]["text"] for b, a in zip(res_before, res_after)])
+    expected = [f"Outcome #{p}" for p in picks]
+    top1_right_before = np.mean([bool(r) and r[0]["text"] == e for r, e in zip(res_before, expected)])
+    top1_right_after = np.mean([bool(r) and r[0]["text"] == e for r, e in zip(res_after, expected)])
+    distinct_before = np.mean([len({h["text"] for h in r}) for r in res_before])
+    distinct_after = np.mean([len({h["text"] for h in r}) for r in res_after])
+
+    table = Table(title=f"Episodic compaction ({args.rows} rows, {args.templates} outcomes, tiers {args.tiers})")
+    for col in ("", "rows", "index rows", "p50 ms", "p99 ms", "top-1 correct", f"distinct texts in top-{args.limit}"):
+        table.add_column(col, justify="right")
+    table.add_row(
+        "before", str(rows_before), str(index_before),
+        f"{np.percentile(lat_before, 50):.2f}", f"{np.percentile(lat_before, 99):.2f}",
+        f"{top1_right_before:.3f}", f"{distinct_before:.2f}",
+    )
+    table.add_row(
+        "after", str(rows_after), str(index_after),
+        f"{np.percentile(lat_after, 50):.2f}", f"{np.percentile(lat_after, 99):.2f}",
+        f"{top1_right_after:.3f}", f"{distinct_after:.2f}",
+    )
+    console.print(table)
+    console.print(
+        f"Compaction: {steps} step(s), {compact_s:.1f}s, scanned {totals['scanned']}, "
+        f"folded {totals['folded']}, dropped {totals['dropped']}; top-1 unchanged for {top1_same:.1%} of queries"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Supervisor prompt size as memory grows under dilution, verbatim top-k vs. the token-budgeted
+context builder.
+
+Seeds one HAZARD rule for the mission target, then grows the episodic table with verbose,
+near-duplicate reports about the same sectors (the dilution pattern: many long snippets
+that all look relevant). At each size it retrieves context for the mission (local hashing
+embeddings) and reports context / total prompt tokens, the estimated prefill time at
+`--prefill-tok-s`, and whether the hazard made it into the prompt.
+
+Run from the paper/ directory, e.g.:
+    python -m benchmarks.context_budget --sizes 0 100 1000 10000 --budgets 400 150
+"""
+import argparse
+import os
+import tempfile
+import numpy as np
+from rich.console import Console
+from rich.table import Table
+from agents.supervisor import SupervisorAgent
+from core.context_builder import ContextBuilder, count_tokens
+from core.database import DatabaseManager
+from core.embeddings import HashingEmbedder
+from schemas.models import ContextHit
+
+console = Console()
+MISSION = (
+    "Takeoff and scan the area. "
+    "Drone 1 goes to Sector A (Lat 47.396716, Lon 8.549858). "
+    "Drone 2 goes to Sector B (Lat 47.396735, Lon 8.549883)."
+)
+FILLER = (
+    "drone sector area scan flight observed conditions nominal wind light visibility good battery "
+    "altitude route waypoint camera survey grid pass completed telemetry stable gps lock heading"
+).split()
+
+
+def dilution_text(rng, reports: list) -> str:
+    """One of a few long reports with two words swapped out: near-duplicates, as repeated injections produce."""
+    words = list(reports[int(rng.integers(len(reports)))])
+    for i in rng.integers(8, len(words), size=2):
+        words[i] = str(rng.choice(FILLER))
+    return " ".join(words) + "."
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[0, 100, 1000, 5000])
+    parser.add_argument("--budgets", type=int, nargs="+", default=[400, 150])
+    parser.add_argument("--reports", type=int, default=10, help="distinct long reports the dilution repeats")
+    parser.add_argument("--limit", type=int, default=3)
+    parser.add_argument("--prefill-tok-s", type=float, default=400.0, help="LLM prompt-processing rate for the estimate")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    embedder = HashingEmbedder()
+    query = embedder.vectorize(MISSION).tolist()
+    system_tokens = count_tokens(SupervisorAgent(memory=None).system_prompt)
+    mission_tokens = count_tokens(MISSION)
+    reports = [
+        f"Drone {1 + i % 2} surveyed Sector {'AB'[i % 2]} (Lat 47.3967, Lon 8.5498):".split()
+        + rng.choice(FILLER, size=int(rng.integers(40, 160))).tolist()
+        for i in range(args.reports)
+    ]
+    # No dedup, no budget, limit candidates: what the prompt got before the context builder
+    modes = {"verbatim top-k": (ContextBuilder(budget=0, dedup=1.01), 1)}
+    for budget in args.budgets:
+        modes[f"budget {budget}"] = (ContextBuilder(budget=budget), 2)
+
+    table = Table(title=f"Prompt size vs. memory size (system prompt {system_tokens} tokens)")
+    for col in ("episodes", "mode", "context tokens", "prompt tokens", "est. prefill ms", "hazard in prompt"):
+        table.add_column(col, justify="right")
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(os.path.join(tmp, "bench.db"))
+        db.insert_rule(
+            "Hazard: High-tension wires detected near 47.396716,8.549858. Avoid.", "HAZARD",
+            {"lat": 47.396716, "lon": 8.549858, "radius": 50}, 0.9,
+            embedder.vectorize("Hazard: High-tension wires detected near Sector A 47.396716,8.549858. Avoid.").tolist(),
+        )
+        inserted = 0
+        for size in sorted(args.sizes):
+            while inserted < size:
+                text = dilution_text(rng, reports)
+                db.insert_episode(1, "scan", {"soc": 0.9}, text, embedder.vectorize(text).tolist())
+                inserted += 1
+            for name, (builder, pool) in modes.items():
+                episodes = db.find_similar_episodes_with_flags(query, limit=args.limit * pool)
+                rules = db.find_similar_rules_with_flags(query, limit=args.limit * pool)
+                text, _, selected_rules, tokens = builder.build(
+                    [ContextHit(source="episodic", **h) for h in episodes],
+                    [ContextHit(source="rule", **h) for h in rules],
+                    limit=args.limit,
+                )
+                prompt = system_tokens + tokens + mission_tokens
+                hazard = any(h.rule_type == "HAZARD" for h in selected_rules)
+                table.add_row(
+                    str(size), name, str(tokens), str(prompt),
+                    f"{prompt / args.prefill_tok_s * 1000.0:.0f}", "yes" if hazard else "NO",
+                )
+        db.close()
+    console.print(table)
+
+
+if __name__ == "__main__":
+    main()
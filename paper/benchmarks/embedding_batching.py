@@ -0,0 +1,139 @@
+"""
+Embedding throughput with and without EmbeddingBatcher, at several worker counts,
+against a local OpenAI-compatible stub server.
+
+The stub answers POST /v1/embeddings after `--base-ms + --item-ms * len(input)` and,
+like a single local Ollama model, handles `--server-slots` requests at a time.
+
+Run from the paper/ directory, e.g.:
+    python -m benchmarks.embedding_batching --workers 2 16 64 --per-worker 50
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import time
+import numpy as np
+from openai import AsyncOpenAI
+from rich.console import Console
+from rich.table import Table
+from core.embedding_batcher import EmbeddingBatcher
+
+console = Console()
+
+
+class StubEmbeddingServer:
+    def __init__(self, dim: int, base_ms: float, item_ms: float, slots: int):
+        self.dim = dim
+        self.base = base_ms / 1000.0
+        self.per_item = item_ms / 1000.0
+        self.slots = asyncio.Semaphore(slots)
+        self.requests = 0
+        self.server = None
+
+    def _vector(self, text: str) -> list:
+        seed = int.from_bytes(hashlib.sha256(text.encode()).digest()[:8], "little")
+        return np.random.default_rng(seed).normal(size=self.dim).round(5).tolist()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                headers = {}
+                for line in head.decode("latin-1").split("\r\n")[1:]:
+                    name, _, value = line.partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = json.loads(await reader.readexactly(int(headers.get("content-length", 0))))
+                inputs = body["input"] if isinstance(body["input"], list) else [body["input"]]
+                async with self.slots:
+                    self.requests += 1
+                    await asyncio.sleep(self.base + self.per_item * len(inputs))
+                payload = json.dumps({
+                    "object": "list",
+                    "model": body.get("model", "stub"),
+                    "data": [
+                        {"object": "embedding", "index": i, "embedding": self._vector(text)}
+                        for i, text in enumerate(inputs)
+                    ],
+                    "usage": {"prompt_tokens": 0, "total_tokens": 0},
+                }).encode()
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                    + f"Content-Length: {len(payload)}\r\n\r\n".encode()
+                    + payload
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self) -> str:
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        port = self.server.sockets[0].getsockname()[1]
+        return f"http://127.0.0.1:{port}/v1"
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+
+async def run(mode: str, workers: int, per_worker: int, args) -> dict:
+    stub = StubEmbeddingServer(args.dim, args.base_ms, args.item_ms, args.server_slots)
+    client = AsyncOpenAI(api_key="stub", base_url=await stub.start(), max_retries=0)
+    batcher = EmbeddingBatcher(client.embeddings.create, "stub", max_batch=args.batch, max_wait=args.wait_ms / 1000.0)
+    latencies = []
+
+    async def embed(text: str):
+        if mode == "batched":
+            return await batcher.embed(text)
+        resp = await client.embeddings.create(input=text, model="stub")
+        return resp.data[0].embedding
+
+    async def worker(w: int):
+        for i in range(per_worker):
+            t0 = time.perf_counter()
+            await embed(f"Drone {w} performed scan at step {i}. Result: Scan completed.")
+            latencies.append((time.perf_counter() - t0) * 1000.0)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker(w) for w in range(workers)))
+    elapsed = time.perf_counter() - t0
+    await batcher.close()
+    await client.close()
+    await stub.stop()
+    lat = np.array(latencies)
+    return {
+        "rate": workers * per_worker / elapsed,
+        "p50": np.percentile(lat, 50),
+        "p99": np.percentile(lat, 99),
+        "requests": stub.requests,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[2, 16, 64])
+    parser.add_argument("--per-worker", type=int, default=30)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--base-ms", type=float, default=8.0, help="stub cost per request")
+    parser.add_argument("--item-ms", type=float, default=0.5, help="stub cost per input text")
+    parser.add_argument("--server-slots", type=int, default=1, help="requests the stub serves concurrently")
+    parser.add_argument("--batch", type=int, default=32)
+    parser.add_argument("--wait-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    table = Table(title=f"Embedding throughput vs. micro-batching (stub: {args.base_ms} ms + {args.item_ms} ms/item)")
+    for col in ("workers", "mode", "embeds/s", "p50 ms", "p99 ms", "HTTP requests"):
+        table.add_column(col, justify="right")
+    for workers in args.workers:
+        for mode in ("direct", "batched"):
+            r = asyncio.run(run(mode, workers, args.per_worker, args))
+            table.add_row(
+                str(workers), mode, f"{r['rate']:.0f}", f"{r['p50']:.1f}", f"{r['p99']:.1f}", str(r["requests"])
+            )
+    console.print(table)
+
+
+if __name__ == "__main__":
+    main()
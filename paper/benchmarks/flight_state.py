@@ -0,0 +1,161 @@
+"""
+Multi-waypoint missions: arm_and_takeoff before every move (the old WorkerAgent) vs. the flight
+state machine (core/flight_state.py), which runs only the steps still needed and changes
+altitude with a direct climb.
+
+A simulated autopilot publishes health / armed / in_air / position at `--rate-hz` through a
+TelemetryHub (as DroneInterface does). Every MAVLink command (arm, set takeoff altitude,
+takeoff, goto) costs `--rpc-ms`. Home is set `--home-ms` after the first arm, and the drone
+climbs at `--climb-mps`. Each drone flies `--legs` move -> scan legs at altitudes drawn from
+`--alts`, then lands. The timing covers getting ready for each task, not the transits. A move
+is "off altitude" when the drone isn't within tolerance of the leg's altitude as its goto
+starts. The old path only waits until the drone is high enough, so it never descends.
+
+Run from the paper/ directory, e.g.:
+    python -m benchmarks.flight_state --drones 4 --legs 6 --rpc-ms 150
+"""
+import argparse
+import asyncio
+import time
+from types import SimpleNamespace
+import numpy as np
+from rich.console import Console
+from rich.table import Table
+from core import logger
+from core.flight_state import FlightStateMachine
+from core.telemetry import TelemetryHub
+
+console = Console()
+
+
+class SimDroneHW:
+    """DroneInterface stand-in: the same flight primitives over simulated telemetry."""
+
+    def __init__(self, drone_id: int, args):
+        self.drone_id = drone_id
+        self.args = args
+        self.armed = False
+        self.home_at = None
+        self.alt, self.target, self.t_alt = 0.0, 0.0, time.perf_counter()
+        self.commands = 0
+        self.flight_s = 0.0
+        self.telemetry = TelemetryHub(drone_id, {
+            "health": lambda: self._stream(self._health),
+            "armed": lambda: self._stream(lambda: self.armed),
+            "in_air": lambda: self._stream(lambda: self._altitude() > 0.3),
+            "position": lambda: self._stream(lambda: SimpleNamespace(relative_altitude_m=self._altitude())),
+        })
+
+    def _altitude(self) -> float:
+        now = time.perf_counter()
+        step = self.args.climb_mps * (now - self.t_alt)
+        self.alt = self.target if abs(self.target - self.alt) <= step else self.alt + np.sign(self.target - self.alt) * step
+        self.t_alt = now
+        return self.alt
+
+    def _health(self):
+        home = self.home_at is not None and time.perf_counter() >= self.home_at
+        return SimpleNamespace(is_global_position_ok=True, is_home_position_ok=home)
+
+    async def _stream(self, value):
+        while True:
+            await asyncio.sleep(1.0 / self.args.rate_hz)
+            yield value()
+
+    async def _command(self):
+        self.commands += 1
+        await asyncio.sleep(self.args.rpc_ms / 1000.0)
+
+    async def arm(self):
+        await self.telemetry.wait_for("health", lambda h: h.is_global_position_ok)
+        await self._command()
+        self.armed = True
+        if self.home_at is None:
+            self.home_at = time.perf_counter() + self.args.home_ms / 1000.0
+        await self.telemetry.wait_for("health", lambda h: h.is_home_position_ok)
+
+    async def takeoff(self, altitude: float):
+        await self._command()
+        await self._command()
+        self._altitude()
+        self.target = altitude
+        await self.telemetry.wait_for("position", lambda p: p.relative_altitude_m >= max(1.0, altitude - 0.5))
+
+    async def change_altitude(self, altitude: float, tolerance: float):
+        await self._command()
+        self._altitude()
+        self.target = altitude
+        await self.telemetry.wait_for("position", lambda p: abs(p.relative_altitude_m - altitude) <= tolerance)
+
+    async def arm_and_takeoff(self, altitude: float):
+        await self.arm()
+        await self.takeoff(altitude)
+
+    async def wait_landed(self):
+        await self.telemetry.wait_for("in_air", lambda in_air: not in_air)
+
+    async def land(self):
+        await self._command()
+        self._altitude()
+        self.target = 0.0
+        return "Landing initiated"
+
+
+async def run(mode: str, args) -> dict:
+    rng = np.random.default_rng(0)
+    prep, commands, skipped, off_alt = [], 0, 0, 0
+
+    async def fly(drone_id: int):
+        nonlocal commands, skipped, off_alt
+        hw = SimDroneHW(drone_id, args)
+        hw.telemetry.start()
+        flight = FlightStateMachine(hw)
+        for _ in range(args.legs):
+            alt = float(rng.choice(args.alts))
+            for adjust in (True, False):  # the move, then the scan
+                start = time.perf_counter()
+                if mode == "fsm":
+                    await flight.ensure_airborne(alt, adjust=adjust)
+                elif adjust or not hw.armed:
+                    await hw.arm_and_takeoff(alt)
+                prep.append(time.perf_counter() - start)
+                if adjust and abs(hw._altitude() - alt) > flight.alt_tolerance:
+                    off_alt += 1
+        await (flight.land() if mode == "fsm" else hw.land())
+        await hw.wait_landed()
+        commands += hw.commands
+        skipped += flight.skipped
+        await hw.telemetry.close()
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(fly(d) for d in range(1, args.drones + 1)))
+    return {"elapsed": time.perf_counter() - t0, "prep": prep, "commands": commands, "skipped": skipped, "off_alt": off_alt}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--drones", type=int, default=4)
+    parser.add_argument("--legs", type=int, default=6)
+    parser.add_argument("--alts", type=float, nargs="+", default=[10.0, 15.0])
+    parser.add_argument("--rate-hz", type=float, default=10.0)
+    parser.add_argument("--rpc-ms", type=float, default=150.0)
+    parser.add_argument("--home-ms", type=float, default=800.0)
+    parser.add_argument("--climb-mps", type=float, default=3.0)
+    args = parser.parse_args()
+    logger.console.quiet = True
+
+    table = Table(title=f"{args.drones} drones x {args.legs} move -> scan legs")
+    for col in ("mode", "total s", "prep per task mean ms", "p95 ms", "commands sent", "steps skipped", "moves off altitude"):
+        table.add_column(col, justify="right")
+    for mode, label in (("per-move", "arm_and_takeoff per move"), ("fsm", "flight state machine")):
+        r = asyncio.run(run(mode, args))
+        table.add_row(
+            label, f"{r['elapsed']:.1f}", f"{np.mean(r['prep']) * 1000.0:.0f}",
+            f"{np.percentile(r['prep'], 95) * 1000.0:.0f}", str(r["commands"]), str(r["skipped"]),
+            f"{r['off_alt']}/{args.drones * args.legs}",
+        )
+    console.print(table)
+
+
+if __name__ == "__main__":
+    main()
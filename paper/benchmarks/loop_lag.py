@@ -0,0 +1,121 @@
+"""
+Event-loop lag while drones log episodes and the supervisor retrieves context,
+calling DatabaseManager directly on the loop vs. through AsyncDatabase.
+
+Run from the paper/ directory, e.g.:
+    python -m benchmarks.loop_lag --rows 200000 --drones 8
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+import numpy as np
+from rich.console import Console
+from rich.table import Table
+from config import Config
+from core.async_database import AsyncDatabase
+from core.database import DatabaseManager
+
+console = Console()
+TICK = 0.005  # heartbeat period, roughly a telemetry callback cadence
+
+
+def seed_database(path: str, rows: int, dim: int):
+    """Bulk-load synthetic episodes straight through SQL (the manager indexes them on open)."""
+    db = DatabaseManager(path)
+    rng = np.random.default_rng(0)
+    chunk = 20000
+    for start in range(0, rows, chunk):
+        n = min(chunk, rows - start)
+        vectors = rng.normal(size=(n, dim)).astype(np.float32)
+        db.conn.executemany(
+            "INSERT INTO episodic_memory (timestamp, drone_id, action_type, state_json, outcome_text, embedding, is_poisoned) "
+            "VALUES (datetime('now'), ?, 'move', ?, 'Move command sent', ?, 0)",
+            [(i % 8 + 1, json.dumps({"soc": 0.9}), vectors[i].tobytes()) for i in range(n)],
+        )
+        db.conn.commit()
+    db.close()
+
+
+async def heartbeat(lags: list, stop: asyncio.Event):
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        t0 = loop.time()
+        await asyncio.sleep(TICK)
+        lags.append(max(0.0, loop.time() - t0 - TICK))
+
+
+async def workload(db, adb, drones: int, rounds: int, dim: int):
+    rng = np.random.default_rng(1)
+
+    async def drone(drone_id: int):
+        for _ in range(rounds):
+            vec = rng.normal(size=dim).astype(np.float32).tolist()
+            kwargs = dict(drone_id=drone_id, action="scan", state={"soc": 0.5}, outcome="Scan completed.", embedding=vec)
+            if adb is None:
+                db.insert_episode(**kwargs)
+                db.find_similar_episodes_with_flags(vec)
+                db.find_similar_rules_with_flags(vec)
+                db.count_episodes(), db.count_poisoned(), db.count_rules(), db.count_poisoned_rules()
+                await asyncio.sleep(0)
+            else:
+                await adb.insert_episode(**kwargs)
+                await asyncio.gather(
+                    adb.find_similar_episodes_with_flags(vec),
+                    adb.find_similar_rules_with_flags(vec),
+                    adb.stats(),
+                )
+
+    await asyncio.gather(*(drone(d + 1) for d in range(drones)))
+
+
+async def measure(path: str, use_async: bool, drones: int, rounds: int, dim: int):
+    db = DatabaseManager(path)
+    adb = AsyncDatabase(db) if use_async else None
+    lags: list = []
+    stop = asyncio.Event()
+    beat = asyncio.create_task(heartbeat(lags, stop))
+    t0 = time.perf_counter()
+    await workload(db, adb, drones, rounds, dim)
+    elapsed = time.perf_counter() - t0
+    stop.set()
+    await beat
+    if adb:
+        await adb.close()
+    else:
+        db.close()
+    lags_ms = np.array(lags or [0.0]) * 1000.0
+    return lags_ms, drones * rounds / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--drones", type=int, default=8)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    Config.DB_WRITE_MODE = "sync"
+    table = Table(title=f"Event-loop lag ({args.rows} episodes, {args.drones} drones x {args.rounds} log+retrieve)")
+    for col in ("DB access", "p50 lag ms", "p99 lag ms", "max lag ms", "ops/sec"):
+        table.add_column(col, justify="right")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        seed_database(path, args.rows, args.dim)
+        for label, use_async in (("blocking (on loop)", False), ("AsyncDatabase", True)):
+            lags, ops = asyncio.run(measure(path, use_async, args.drones, args.rounds, args.dim))
+            table.add_row(
+                label,
+                f"{np.percentile(lags, 50):.1f}",
+                f"{np.percentile(lags, 99):.1f}",
+                f"{lags.max():.1f}",
+                f"{ops:.1f}",
+            )
+    console.print(table)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Hit rate, latency saved and correctness of the Supervisor plan cache on a replayed
+mission stream.
+
+Missions are drawn from a few coordinate sets, each phrased several ways (casing,
+word order, filler words). Every `--insert-every` missions a memory insert changes the
+retrieved context of one coordinate set, which must invalidate its plans. The planner
+is a stub charged at `--llm-ms` per call (not slept) that moves each drone to the
+mission's coordinates, so a "wrong plan" (cached plan for other targets) is detectable.
+
+Run from the paper/ directory, e.g.:
+    python -m benchmarks.plan_cache --missions 500 --llm-ms 2000
+"""
+import argparse
+import re
+import time
+import numpy as np
+from rich.console import Console
+from rich.table import Table
+from core.embeddings import HashingEmbedder
+from core.plan_cache import PlanCache
+from schemas.models import MissionPlan, Task, TaskParams
+
+console = Console()
+PHRASINGS = (
+    "Takeoff and scan the area. Drone 1 goes to Sector A (Lat {0}, Lon {1}). Drone 2 goes to Sector B (Lat {2}, Lon {3}).",
+    "Take off and scan the area. Drone 1 goes to Sector A (Lat {0}, Lon {1}). Drone 2 goes to Sector B (Lat {2}, Lon {3}).",
+    "takeoff and scan the area.  Drone 1 goes to sector A (Lat {0}, Lon {1}).  Drone 2 goes to sector B (Lat {2}, Lon {3}).",
+    "Takeoff, then scan the area. Drone 1 goes to Sector A (Lat {0}, Lon {1}); Drone 2 goes to Sector B (Lat {2}, Lon {3}).",
+)
+
+
+def stub_plan(mission: str) -> MissionPlan:
+    nums = [float(n) for n in re.findall(r"[-+]?\d+\.\d+", mission)]
+    tasks = [
+        Task(task_id=f"task_{d}", drone_id=d, action_type="move", params=TaskParams(lat=nums[2 * d - 2], lon=nums[2 * d - 1]))
+        for d in (1, 2)
+    ]
+    return MissionPlan(reasoning="stub", tasks=tasks)
+
+
+def targets(plan: MissionPlan) -> list:
+    return [(t.params.lat, t.params.lon) for t in plan.tasks]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--missions", type=int, default=300)
+    parser.add_argument("--coordinate-sets", type=int, default=5)
+    parser.add_argument("--insert-every", type=int, default=50, help="missions between context-changing inserts")
+    parser.add_argument("--llm-ms", type=float, default=1500.0, help="stub planner latency (not slept)")
+    parser.add_argument("--threshold", type=float, default=0.95)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    sets = [
+        tuple(f"{v:.6f}" for v in (47.3967 + rng.uniform(-1e-3, 1e-3), 8.5498 + rng.uniform(-1e-3, 1e-3),
+                                   47.3967 + rng.uniform(-1e-3, 1e-3), 8.5498 + rng.uniform(-1e-3, 1e-3)))
+        for _ in range(args.coordinate_sets)
+    ]
+    context_version = [0] * len(sets)
+    embedder = HashingEmbedder()
+    cache = PlanCache(capacity=256, threshold=args.threshold)
+    wrong = 0
+    lookup_ms = []
+    for i in range(args.missions):
+        if i and i % args.insert_every == 0:
+            context_version[int(rng.integers(len(sets)))] += 1
+        s = int(rng.integers(len(sets)))
+        mission = PHRASINGS[int(rng.integers(len(PHRASINGS)))].format(*sets[s])
+        digest = PlanCache.context_digest(f"system prompt\n\nCONTEXT FROM MEMORY:\nset {s} v{context_version[s]}")
+        vector = embedder.vectorize(mission)
+        t0 = time.perf_counter()
+        plan = cache.lookup(mission, vector, "stub-model", digest)
+        lookup_ms.append((time.perf_counter() - t0) * 1000.0)
+        if plan is None:
+            cache.put(mission, vector, "stub-model", digest, stub_plan(mission), args.llm_ms)
+        elif targets(plan) != targets(stub_plan(mission)):
+            wrong += 1
+
+    stats = cache.stats()
+    baseline_s = args.missions * args.llm_ms / 1000.0
+    cached_s = stats["misses"] * args.llm_ms / 1000.0 + sum(lookup_ms) / 1000.0
+    table = Table(title=f"Plan cache over {args.missions} missions ({args.coordinate_sets} target sets, stub LLM {args.llm_ms:.0f} ms)")
+    for col in ("hit rate", "exact", "near", "misses", "invalidated", "wrong plans",
+                "lookup p50 ms", "plan s (off -> on)", "saved s"):
+        table.add_column(col, justify="right")
+    table.add_row(
+        f"{stats['hit_rate']:.0%}", str(stats["hits_exact"]), str(stats["hits_similar"]), str(stats["misses"]),
+        str(stats["invalidated"]), str(wrong), f"{np.percentile(lookup_ms, 50):.3f}",
+        f"{baseline_s:.0f} -> {cached_s:.0f}", f"{stats['saved_ms'] / 1000.0:.0f}",
+    )
+    console.print(table)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Planning under a latency SLO: LLM-only vs. racing the LLM against the heuristic planner,
+with and without hot-swapping a late LLM plan into the tasks that haven't started.
+
+Each mission draws the stub LLM's latency from a log-normal distribution (`--llm-median-ms`,
+`--sigma`); the stub then answers with a fixed 2-drone plan. As in main.py, the Supervisor
+fills a TaskGraph that a SwarmExecutor runs on two simulated workers, `--task-ms` per task.
+
+Run from the paper/ directory, e.g.:
+    python -m benchmarks.plan_slo --missions 40 --llm-median-ms 300 --slo-ms 400
+"""
+import argparse
+import asyncio
+import numpy as np
+from rich.console import Console
+from rich.table import Table
+from agents.supervisor import SupervisorAgent
+from benchmarks.plan_streaming import StubChatServer, make_plan
+from config import Config
+from core import logger
+from core.llm_client import ClientManager
+from core.llm_engine import LLMEngine
+from core.plan_cache import PlanCache
+from core.swarm import SwarmExecutor, TakeoffWaves
+from core.task_graph import TaskGraph
+from schemas.models import MemoryContext, Task, ToolResult
+
+console = Console()
+class SimWorker:
+    """Stands in for WorkerAgent: every task takes the same time and succeeds."""
+
+    def __init__(self, drone_id: int, task_ms: float):
+        self.drone_id = drone_id
+        self.airborne = False
+        self.task_ms = task_ms
+
+    async def execute_task(self, task: Task) -> ToolResult:
+        await asyncio.sleep(self.task_ms / 1000.0)
+        self.airborne = task.action_type != "return"
+        return ToolResult(success=True, message="ok")
+
+
+MISSION = "Drone 1 goes to Sector A (Lat 47.396716, Lon 8.549858). Drone 2 goes to Sector B (Lat 47.396735, Lon 8.549883)."
+
+
+async def run(mode: str, latencies: np.ndarray, args) -> dict:
+    stub = StubChatServer(make_plan(2, 20).model_dump_json(), 0.0, 0.0)
+    manager = ClientManager(base_url=await stub.start(), api_key="stub")
+    supervisor = SupervisorAgent(memory=None, llm=LLMEngine(manager, cache_size=0))
+    supervisor.plan_cache = PlanCache(capacity=0)
+    Config.PLAN_STREAMING = False
+    Config.PLAN_SLO_MS = 0.0 if mode == "LLM only" else args.slo_ms
+    Config.PLAN_HOT_SWAP = mode == "SLO + hot swap"
+    context = MemoryContext(query="bench", text="No relevant past experiences or rules found.")
+    first_task, swapped = [], 0
+    for latency in latencies:
+        stub.first_token_s = latency / 1000.0
+        graph = TaskGraph()
+        executor = SwarmExecutor({d: SimWorker(d, args.task_ms) for d in (1, 2)}, concurrency=0, waves=TakeoffWaves(0))
+        runners = asyncio.ensure_future(executor.run(graph))
+        try:
+            await supervisor.plan_mission(
+                MISSION, memory_context=context, on_task=graph.submit, on_swap=graph.replace_pending
+            )
+        finally:
+            graph.close()
+        await runners
+        first_task.append(supervisor.last_timing["first_task_ms"])
+        swapped += supervisor.last_timing.get("swapped", 0)
+    await manager.close()
+    await stub.stop()
+    planners = [record["planner"] for record in supervisor.history]
+    return {
+        "p50": np.percentile(first_task, 50),
+        "p95": np.percentile(first_task, 95),
+        "max": max(first_task),
+        "planners": {name: planners.count(name) for name in sorted(set(planners))},
+        "swapped": swapped,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--missions", type=int, default=30)
+    parser.add_argument("--llm-median-ms", type=float, default=300.0)
+    parser.add_argument("--sigma", type=float, default=0.8, help="log-normal spread of the LLM latency")
+    parser.add_argument("--slo-ms", type=float, default=400.0)
+    parser.add_argument("--task-ms", type=float, default=150.0, help="simulated execution time per task")
+    args = parser.parse_args()
+    logger.console.quiet = True  # the Supervisor's own logging would bury the table
+
+    latencies = np.random.default_rng(0).lognormal(np.log(args.llm_median_ms), args.sigma, size=args.missions)
+    table = Table(
+        title=f"Time to first dispatched task, {args.missions} missions "
+        f"(LLM p50 {np.percentile(latencies, 50):.0f} ms / p95 {np.percentile(latencies, 95):.0f} ms, SLO {args.slo_ms:.0f} ms)"
+    )
+    for col in ("mode", "p50 ms", "p95 ms", "max ms", "plans used", "LLM tasks swapped in"):
+        table.add_column(col, justify="right")
+    for mode in ("LLM only", "SLO race", "SLO + hot swap"):
+        r = asyncio.run(run(mode, latencies, args))
+        used = ", ".join(f"{name} {count}" for name, count in r["planners"].items())
+        table.add_row(mode, f"{r['p50']:.0f}", f"{r['p95']:.0f}", f"{r['max']:.0f}", used, str(r["swapped"]))
+    console.print(table)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Time-to-first-action of SupervisorAgent.plan_mission, buffered vs streamed, against a
+local OpenAI-compatible stub that generates the plan at a fixed token rate.
+
+The stub emits the MissionPlan JSON (a `--reasoning-tokens` long reasoning, then a move
+and a scan per drone) in ~4-character tokens, one every `--token-ms`; it answers the
+buffered request only once the whole document is "generated". Time-to-first-action is
+when the first task reaches on_task (where main.py hands it to the drone's queue).
+
+Run from the paper/ directory, e.g.:
+    python -m benchmarks.plan_streaming --drones 2 8 --token-ms 20
+"""
+import argparse
+import asyncio
+import json
+import time
+from rich.console import Console
+from rich.table import Table
+from agents.supervisor import SupervisorAgent
+from config import Config
+from core import logger
+from core.llm_client import ClientManager
+from core.llm_engine import LLMEngine
+from core.plan_cache import PlanCache
+from schemas.models import MemoryContext, MissionPlan, Task, TaskParams
+
+console = Console()
+
+
+def make_plan(drones: int, reasoning_tokens: int) -> MissionPlan:
+    tasks = []
+    for d in range(1, drones + 1):
+        lat, lon = 47.3967 + d * 1e-4, 8.5498 + d * 1e-4
+        tasks.append(Task(task_id=f"task_{2 * d - 1}", drone_id=d, action_type="move", params=TaskParams(lat=lat, lon=lon)))
+        tasks.append(Task(task_id=f"task_{2 * d}", drone_id=d, action_type="scan", params=TaskParams(scan_target=f"sector {d}")))
+    return MissionPlan(reasoning=" ".join(["safe"] * reasoning_tokens), tasks=tasks)
+
+
+class StubChatServer:
+    def __init__(self, document: str, token_ms: float, first_token_ms: float):
+        self.tokens = [document[i:i + 4] for i in range(0, len(document), 4)]
+        self.token_s = token_ms / 1000.0
+        self.first_token_s = first_token_ms / 1000.0
+        self.server = None
+
+    @staticmethod
+    def _chunk(delta: dict, finish=None) -> bytes:
+        event = {
+            "id": "stub", "object": "chat.completion.chunk", "created": 0, "model": "stub",
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish}],
+        }
+        return f"data: {json.dumps(event)}\n\n".encode()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+            headers = {}
+            for line in head.decode("latin-1").split("\r\n")[1:]:
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+            body = json.loads(await reader.readexactly(int(headers.get("content-length", 0))))
+            await asyncio.sleep(self.first_token_s)
+            if body.get("stream"):
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nConnection: close\r\n\r\n")
+                writer.write(self._chunk({"role": "assistant", "content": ""}))
+                loop = asyncio.get_running_loop()
+                start = loop.time()
+                for i, token in enumerate(self.tokens, 1):
+                    await asyncio.sleep(max(0.0, start + i * self.token_s - loop.time()))  # no drift
+                    writer.write(self._chunk({"content": token}))
+                    await writer.drain()
+                writer.write(self._chunk({}, finish="stop") + b"data: [DONE]\n\n")
+            else:
+                await asyncio.sleep(self.token_s * len(self.tokens))
+                payload = json.dumps({
+                    "id": "stub", "object": "chat.completion", "created": 0, "model": "stub",
+                    "choices": [{
+                        "index": 0, "finish_reason": "stop",
+                        "message": {"role": "assistant", "content": "".join(self.tokens)},
+                    }],
+                    "usage": {"prompt_tokens": 0, "completion_tokens": len(self.tokens), "total_tokens": len(self.tokens)},
+                }).encode()
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nConnection: close\r\n"
+                    + f"Content-Length: {len(payload)}\r\n\r\n".encode()
+                    + payload
+                )
+            await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self) -> str:
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        port = self.server.sockets[0].getsockname()[1]
+        return f"http://127.0.0.1:{port}/v1"
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+
+async def run(streaming: bool, drones: int, args) -> dict:
+    plan = make_plan(drones, args.reasoning_tokens)
+    stub = StubChatServer(plan.model_dump_json(), args.token_ms, args.first_token_ms)
+    manager = ClientManager(base_url=await stub.start(), api_key="stub")
+    supervisor = SupervisorAgent(memory=None, llm=LLMEngine(manager, cache_size=0))
+    supervisor.plan_cache = PlanCache(capacity=0)
+    Config.PLAN_STREAMING = streaming
+    context = MemoryContext(query="bench", text="No relevant past experiences or rules found.")
+    arrivals = []
+    t0 = time.perf_counter()
+    result = await supervisor.plan_mission("bench mission", memory_context=context, on_task=lambda t: arrivals.append(time.perf_counter()))
+    elapsed = time.perf_counter() - t0
+    await manager.close()
+    await stub.stop()
+    assert result == plan and len(arrivals) == len(plan.tasks)
+    return {"first": (arrivals[0] - t0) * 1000.0, "all": (arrivals[-1] - t0) * 1000.0, "plan": elapsed * 1000.0}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--drones", type=int, nargs="+", default=[2, 8])
+    parser.add_argument("--token-ms", type=float, default=20.0, help="stub time per generated token")
+    parser.add_argument("--first-token-ms", type=float, default=300.0, help="stub prompt-processing time")
+    parser.add_argument("--reasoning-tokens", type=int, default=40)
+    args = parser.parse_args()
+    logger.console.quiet = True  # the Supervisor's own logging (plans, sections) would bury the table
+
+    table = Table(title=f"Plan time-to-first-action (stub: {args.first_token_ms:.0f} ms + {args.token_ms:.0f} ms/token)")
+    for col in ("drones", "mode", "first action ms", "last task ms", "plan complete ms"):
+        table.add_column(col, justify="right")
+    for drones in args.drones:
+        for streaming in (False, True):
+            r = asyncio.run(run(streaming, drones, args))
+            table.add_row(
+                str(drones), "streamed" if streaming else "buffered",
+                f"{r['first']:.0f}", f"{r['all']:.0f}", f"{r['plan']:.0f}",
+            )
+    console.print(table)
+
+
+if __name__ == "__main__":
+    main()
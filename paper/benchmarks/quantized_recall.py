@@ -0,0 +1,74 @@
+"""
+Memory, latency and recall@k of the quantized index (int8 first pass + exact float32
+rescore) against the exact float32 index.
+
+The quantized index keeps its float32 rows in a memory-mapped sidecar, as it does
+with Config.EMBEDDING_SIDECAR, so "RAM MiB" is what search keeps resident.
+
+Run from the paper/ directory, e.g.:
+    python -m benchmarks.quantized_recall --rows 1000000 --rescore 2 5 10
+"""
+import argparse
+import os
+import tempfile
+import time
+import numpy as np
+from rich.console import Console
+from rich.table import Table
+from benchmarks.ann_recall import synthetic_embeddings, timed_search
+from core.embedding_store import EmbeddingStore
+from core.quantized_index import QuantizedIndex
+from core.vector_index import VectorIndex
+
+console = Console()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--topics", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--modes", nargs="+", default=["int8"])
+    parser.add_argument("--rescore", type=int, nargs="+", default=[1, 5, 10], help="shortlist = k * rescore")
+    parser.add_argument("--min-shortlist", type=int, default=0)
+    args = parser.parse_args()
+
+    data = synthetic_embeddings(args.rows, args.dim, args.topics)
+    queries = synthetic_embeddings(args.queries, args.dim, args.topics, seed=1)
+    ids = np.arange(1, args.rows + 1)
+
+    exact = VectorIndex("exact", initial_capacity=args.rows)
+    exact.add_many(ids, data)
+    truth, exact_ms = timed_search(exact, queries, args.k)
+
+    table = Table(title=f"Quantized search: recall@{args.k}, latency, memory ({args.rows} rows, dim {args.dim})")
+    for col in ("index", "shortlist", "RAM MiB", "build s", f"recall@{args.k}", "mean ms", "p95 ms"):
+        table.add_column(col, justify="right")
+    table.add_row(
+        "float32 exact", "-", f"{exact.vectors.nbytes / 2**20:.1f}", "-", "1.000",
+        f"{exact_ms.mean():.2f}", f"{np.percentile(exact_ms, 95):.2f}",
+    )
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in args.modes:
+            store = EmbeddingStore(os.path.join(tmp, f"{mode}.db"), "episodic_memory")
+            index = QuantizedIndex(mode, mode=mode, min_shortlist=args.min_shortlist, store=store)
+            t0 = time.perf_counter()
+            index.add_many(ids, data)
+            build_s = time.perf_counter() - t0
+            for rescore in args.rescore:
+                index.rescore = rescore
+                approx, ms = timed_search(index, queries, args.k)
+                recall = np.mean([len(set(a) & set(t)) / len(t) for a, t in zip(approx, truth) if t])
+                table.add_row(
+                    mode, str(max(args.k * rescore, args.min_shortlist)), f"{index.code_bytes / 2**20:.1f}",
+                    f"{build_s:.1f}", f"{recall:.3f}", f"{ms.mean():.2f}", f"{np.percentile(ms, 95):.2f}",
+                )
+            store.close()
+    console.print(table)
+
+
+if __name__ == "__main__":
+    main()
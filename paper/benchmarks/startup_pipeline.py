@@ -0,0 +1,100 @@
+"""
+Time to first takeoff: the old strict startup order vs. the pipelined startup (core/startup.py).
+
+Sequential brings every drone up (connect + GPS lock), pauses `--settle-ms`, then loads memory,
+embeds the mission (cold embedding model), retrieves context and plans. Pipelined runs the same
+preparation while the drones come up, and each drone takes off once it is ready and has a task.
+Stage durations are simulated (sleeps, with `--jitter` spread per drone); the orchestration is
+main.py's: StartupPipeline, a TaskGraph run by SwarmExecutor and the per-drone readiness gate.
+
+Run from the paper/ directory, e.g.:
+    python -m benchmarks.startup_pipeline --drones 2 --gps-ms 4000 --plan-ms 5000
+"""
+import argparse
+import asyncio
+import numpy as np
+from rich.console import Console
+from rich.table import Table
+from core import logger
+from core.startup import StartupPipeline
+from core.swarm import SwarmExecutor, TakeoffWaves
+from core.task_graph import TaskGraph
+from schemas.models import Task, TaskParams, ToolResult
+
+console = Console()
+
+
+class SimWorker:
+    """Stands in for WorkerAgent: only the time to takeoff is measured, so tasks finish at once."""
+
+    def __init__(self, drone_id: int):
+        self.drone_id = drone_id
+        self.airborne = False
+
+    async def execute_task(self, task: Task) -> ToolResult:
+        self.airborne = True
+        return ToolResult(success=True, message="ok")
+
+
+async def run(pipelined: bool, args, rng) -> StartupPipeline:
+    pipeline = StartupPipeline(pipelined=pipelined, settle_s=args.settle_ms / 1000.0)
+    drones = list(range(1, args.drones + 1))
+
+    def bring_up(drone_id: int):
+        ms = (args.connect_ms + args.gps_ms) * rng.uniform(1.0 - args.jitter, 1.0 + args.jitter)
+        return lambda: asyncio.sleep(ms / 1000.0)
+
+    await pipeline.start_drones({d: bring_up(d) for d in drones})
+    await pipeline.stage("memory load", asyncio.sleep(args.memory_ms / 1000.0))
+    await pipeline.stage("embedding warmup", asyncio.sleep(args.embed_ms / 1000.0))
+    await pipeline.stage("context retrieval", asyncio.sleep(args.retrieve_ms / 1000.0))
+
+    graph = TaskGraph()
+    executor = SwarmExecutor({d: SimWorker(d) for d in drones}, concurrency=0, waves=TakeoffWaves(0))
+
+    def on_takeoff(drone_id: int):
+        pipeline.mark("first takeoff")
+        pipeline.mark(f"drone {drone_id} takeoff")
+
+    runners = asyncio.ensure_future(executor.run(graph, ready=pipeline.drone_ready, on_takeoff=on_takeoff))
+    await pipeline.stage("planning", asyncio.sleep(args.plan_ms / 1000.0))
+    for d in drones:
+        graph.submit(Task(task_id=f"task_{d}", drone_id=d, action_type="move", params=TaskParams(lat=47.3967, lon=8.5498)))
+    graph.close()
+    await runners
+    return pipeline
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--drones", type=int, default=2)
+    parser.add_argument("--connect-ms", type=float, default=1500.0)
+    parser.add_argument("--gps-ms", type=float, default=4000.0, help="connect to GPS lock")
+    parser.add_argument("--jitter", type=float, default=0.2, help="+/- fraction on each drone's bring-up")
+    parser.add_argument("--settle-ms", type=float, default=3000.0, help="fixed pause of the old startup")
+    parser.add_argument("--memory-ms", type=float, default=800.0, help="DB open + vector index load")
+    parser.add_argument("--embed-ms", type=float, default=1500.0, help="first (cold) embedding call")
+    parser.add_argument("--retrieve-ms", type=float, default=150.0)
+    parser.add_argument("--plan-ms", type=float, default=5000.0)
+    args = parser.parse_args()
+    logger.console.quiet = True
+
+    results = {mode: asyncio.run(run(mode == "pipelined", args, np.random.default_rng(0))) for mode in ("sequential", "pipelined")}
+    stages = [name for name, _, _ in results["sequential"].report() if not name.startswith("drone ") or name.endswith("ready")]
+    table = Table(title=f"Startup timeline, {args.drones} drones (ms from start)")
+    table.add_column("stage")
+    for mode in results:
+        table.add_column(mode, justify="right")
+    for name in stages:
+        cells = []
+        for pipeline in results.values():
+            row = next(((s, e) for n, s, e in pipeline.report() if n == name), None)
+            cells.append("-" if row is None else f"{row[0]:.0f}" if row[0] == row[1] else f"{row[0]:.0f}-{row[1]:.0f}")
+        table.add_row(name, *cells)
+    console.print(table)
+    before, after = (results[m].marks["first takeoff"] for m in ("sequential", "pipelined"))
+    console.print(f"Time to first takeoff: {before:.0f} ms -> {after:.0f} ms ({before / after:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
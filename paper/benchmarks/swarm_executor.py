@@ -0,0 +1,141 @@
+"""
+N-drone execution: the old per-drone loop with a fixed start stagger vs. SwarmExecutor
+(bounded concurrency, takeoffs in rate-limited waves).
+
+Each simulated drone gets `--tasks` tasks (a move, then scans). A task that takes off costs
+`--takeoff-ms` on top of `--task-ms`; both are log-normal with spread `--sigma`, and
+`--fail-rate` of tasks fail (the drone then halts). The stagger loop starts drone i after
+i * `--stagger-ms`, as main.py did for its two drones; the executor runs waves of `--wave-size`
+takeoffs every `--stagger-ms` with at most `--concurrency` tasks in flight.
+
+Run from the paper/ directory, e.g.:
+    python -m benchmarks.swarm_executor --drones 50 --wave-size 5 --concurrency 16
+"""
+import argparse
+import asyncio
+import time
+import numpy as np
+from rich.console import Console
+from rich.table import Table
+from benchmarks._dispatch import TaskDispatcher
+from core import logger
+from core.swarm import SwarmExecutor, TakeoffWaves
+from core.task_graph import TaskGraph
+from schemas.models import Task, TaskParams, ToolResult
+
+console = Console()
+
+
+class SimWorker:
+    """Stands in for WorkerAgent: sleeps for the task (and takeoff) time."""
+
+    def __init__(self, drone_id: int, args, rng):
+        self.drone_id = drone_id
+        self.airborne = False
+        self.args = args
+        self.rng = rng
+
+    def _ms(self, median: float) -> float:
+        return median * self.rng.lognormal(0.0, self.args.sigma) / 1000.0
+
+    async def execute_task(self, task: Task) -> ToolResult:
+        if not self.airborne and task.action_type != "return":
+            await asyncio.sleep(self._ms(self.args.takeoff_ms))
+            self.airborne = True
+        await asyncio.sleep(self._ms(self.args.task_ms))
+        if self.rng.random() < self.args.fail_rate:
+            return ToolResult(success=False, message="simulated failure")
+        return ToolResult(success=True, message="ok")
+
+
+def mission(drones: int, tasks: int) -> list:
+    out = []
+    for d in range(1, drones + 1):
+        out.append(Task(task_id=f"task_{d}_0", drone_id=d, action_type="move", params=TaskParams(lat=47.3967, lon=8.5498)))
+        out += [
+            Task(task_id=f"task_{d}_{i}", drone_id=d, action_type="scan", params=TaskParams(scan_target=f"sector {d}"))
+            for i in range(1, tasks)
+        ]
+    return out
+
+
+async def stagger_loop(workers: dict, dispatcher: TaskDispatcher, stagger_s: float) -> dict:
+    """The pre-executor loop: one unbounded coroutine per drone, drone i delayed by i * stagger."""
+    latencies = {d: [] for d in workers}
+
+    async def run_drone(index: int, worker):
+        task = await dispatcher.next(worker.drone_id)
+        if task is not None and index:
+            await asyncio.sleep(index * stagger_s)
+        while task is not None:
+            t0 = time.perf_counter()
+            result = await worker.execute_task(task)
+            latencies[worker.drone_id].append((time.perf_counter() - t0) * 1000.0)
+            if not result.success:
+                break
+            task = await dispatcher.next(worker.drone_id)
+
+    await asyncio.gather(*(run_drone(i, w) for i, w in enumerate(workers.values())))
+    return {d: {"tasks": len(v), "mean_ms": float(np.mean(v)) if v else 0.0} for d, v in latencies.items()}
+
+
+async def run(mode: str, args) -> tuple:
+    rng = np.random.default_rng(0)
+    workers = {d: SimWorker(d, args, rng) for d in range(1, args.drones + 1)}
+    queues = TaskDispatcher(workers) if mode == "stagger" else TaskGraph()
+    for task in mission(args.drones, args.tasks):
+        queues.submit(task)
+    queues.close()
+    t0 = time.perf_counter()
+    if mode == "stagger":
+        report = await stagger_loop(workers, queues, args.stagger_ms / 1000.0)
+    else:
+        executor = SwarmExecutor(
+            workers, concurrency=args.concurrency, waves=TakeoffWaves(args.wave_size, args.stagger_ms / 1000.0)
+        )
+        await executor.run(queues)
+        report = executor.report()
+    return time.perf_counter() - t0, report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--drones", type=int, default=50)
+    parser.add_argument("--tasks", type=int, default=3, help="tasks per drone")
+    parser.add_argument("--takeoff-ms", type=float, default=4000.0)
+    parser.add_argument("--task-ms", type=float, default=1000.0)
+    parser.add_argument("--sigma", type=float, default=0.3)
+    parser.add_argument("--fail-rate", type=float, default=0.02)
+    parser.add_argument("--stagger-ms", type=float, default=1500.0, help="old per-drone stagger / wave interval")
+    parser.add_argument("--wave-size", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--show", type=int, default=8, help="drones listed in the per-drone table")
+    args = parser.parse_args()
+    logger.console.quiet = True
+
+    summary = Table(title=f"{args.drones} drones x {args.tasks} tasks")
+    for col in ("mode", "makespan s", "tasks done", "tasks/s", "mean task ms"):
+        summary.add_column(col, justify="right")
+    detail = None
+    for mode in ("stagger", "executor"):
+        elapsed, report = asyncio.run(run(mode, args))
+        done = sum(r["tasks"] for r in report.values())
+        mean = np.mean([r["mean_ms"] for r in report.values() if r["tasks"]])
+        summary.add_row(mode, f"{elapsed:.1f}", str(done), f"{done / elapsed:.1f}", f"{mean:.0f}")
+        if mode == "executor":
+            detail = report
+    console.print(summary)
+
+    table = Table(title=f"SwarmExecutor per drone (first {args.show})")
+    for col in ("drone", "tasks", "ok", "failed", "skipped", "mean ms", "p95 ms", "wait ms", "tasks/min"):
+        table.add_column(col, justify="right")
+    for drone_id, r in list(detail.items())[: args.show]:
+        table.add_row(
+            str(drone_id), str(r["tasks"]), str(r["ok"]), str(r["failed"]), str(r["skipped"]),
+            f"{r['mean_ms']:.0f}", f"{r['p95_ms']:.0f}", f"{r['wait_ms']:.0f}", f"{r['tasks_per_s'] * 60.0:.1f}",
+        )
+    console.print(table)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Telemetry waits: a fresh stream per wait (the old DroneInterface waits) vs. one shared
+subscription per topic (core/telemetry.py TelemetryHub).
+
+A simulated autopilot publishes on a fixed `--rate-hz` clock; opening a stream costs
+`--open-ms` (log-normal) before the first value arrives. Each drone runs `--waiters` concurrent
+sequences of `--steps` waits (takeoff/arrival checks, monitors). A wait's condition turns true
+a random 0..`--step-ms` after the wait starts, or was already true (probability `--already`,
+like the GPS re-check before every arm). "Added latency" is the time from the condition holding
+to the waiter resolving.
+
+Run from the paper/ directory, e.g.:
+    python -m benchmarks.telemetry_mux --drones 10 --waiters 3 --steps 20 --rate-hz 10
+"""
+import argparse
+import asyncio
+import time
+import numpy as np
+from rich.console import Console
+from rich.table import Table
+from core import logger
+from core.telemetry import TelemetryHub
+
+console = Console()
+
+
+class SimAutopilot:
+    """Publishes its clock (loop time) on every tick; each open() pays the stream setup cost."""
+
+    def __init__(self, args, rng):
+        self.period = 1.0 / args.rate_hz
+        self.open_ms = args.open_ms
+        self.rng = rng
+        self.t0 = asyncio.get_running_loop().time()
+        self.opens = 0
+
+    async def stream(self):
+        loop = asyncio.get_running_loop()
+        self.opens += 1
+        await asyncio.sleep(self.open_ms * self.rng.lognormal(0.0, 0.3) / 1000.0)
+        while True:
+            await asyncio.sleep(self.period - (loop.time() - self.t0) % self.period)
+            yield loop.time()
+
+
+async def per_wait(autopilot: SimAutopilot, true_at: float):
+    """The old pattern: open a stream, read until the condition holds, drop it."""
+    async for now in autopilot.stream():
+        if now >= true_at:
+            return
+
+
+async def run(mode: str, args) -> dict:
+    rng = np.random.default_rng(0)
+    loop = asyncio.get_running_loop()
+    drones = [SimAutopilot(args, rng) for _ in range(args.drones)]
+    hubs = [TelemetryHub(i, {"position": d.stream}) for i, d in enumerate(drones)]
+    added = []
+
+    async def sequence(drone: SimAutopilot, hub: TelemetryHub):
+        for _ in range(args.steps):
+            start = loop.time()
+            if rng.random() < args.already:
+                true_at = start - rng.uniform(0.0, args.step_ms / 1000.0)
+            else:
+                true_at = start + rng.uniform(0.0, args.step_ms / 1000.0)
+            if mode == "per-wait":
+                await per_wait(drone, true_at)
+            else:
+                await hub.wait_for("position", lambda now: now >= true_at)
+            added.append((loop.time() - max(start, true_at)) * 1000.0)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(sequence(d, h) for d, h in zip(drones, hubs) for _ in range(args.waiters)))
+    elapsed = time.perf_counter() - t0
+    for hub in hubs:
+        await hub.close()
+    return {
+        "elapsed": elapsed,
+        "opens": sum(d.opens for d in drones),
+        "mean_ms": float(np.mean(added)),
+        "p95_ms": float(np.percentile(added, 95)),
+        "cached": sum(h.stats()["position"]["cached"] for h in hubs),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--drones", type=int, default=10)
+    parser.add_argument("--waiters", type=int, default=3, help="concurrent wait sequences per drone")
+    parser.add_argument("--steps", type=int, default=20, help="waits per sequence")
+    parser.add_argument("--rate-hz", type=float, default=10.0)
+    parser.add_argument("--open-ms", type=float, default=60.0, help="stream setup before the first value")
+    parser.add_argument("--step-ms", type=float, default=400.0)
+    parser.add_argument("--already", type=float, default=0.3, help="share of waits whose condition already holds")
+    args = parser.parse_args()
+    logger.console.quiet = True
+
+    table = Table(title=f"{args.drones} drones x {args.waiters} waiters x {args.steps} waits, {args.rate_hz:.0f} Hz telemetry")
+    for col in ("mode", "wall s", "streams opened", "waits from cache", "added latency mean ms", "p95 ms"):
+        table.add_column(col, justify="right")
+    for mode in ("per-wait", "shared"):
+        r = asyncio.run(run(mode, args))
+        table.add_row(
+            mode, f"{r['elapsed']:.1f}", str(r["opens"]), str(r["cached"]), f"{r['mean_ms']:.0f}", f"{r['p95_ms']:.0f}"
+        )
+    console.print(table)
+
+
+if __name__ == "__main__":
+    main()
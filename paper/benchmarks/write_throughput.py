@@ -0,0 +1,75 @@
+"""
+Insert throughput of the memory write path: per-row commits vs. WAL group commits.
+
+Run from the paper/ directory, e.g.:
+    python -m benchmarks.write_throughput --rows 5000 --writers 8
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+import numpy as np
+from rich.console import Console
+from rich.table import Table
+from config import Config
+from core.database import DatabaseManager
+
+console = Console()
+
+
+def run(mode: str, rows: int, writers: int, dim: int) -> float:
+    """Insert `rows` episodes from `writers` threads; returns rows/sec including the final flush."""
+    Config.DB_WRITE_MODE = mode
+    Config.EMBEDDING_SIDECAR = True
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(os.path.join(tmp, "bench.db"))
+        vectors = np.random.default_rng(0).normal(size=(rows, dim)).astype(np.float32)
+        per_writer = rows // writers
+
+        def writer(w: int):
+            for i in range(w * per_writer, (w + 1) * per_writer):
+                db.insert_episode(
+                    drone_id=w + 1,
+                    action="move",
+                    state={"soc": 0.9, "alt": 10.0},
+                    outcome="Move command sent",
+                    embedding=vectors[i].tolist(),
+                )
+
+        threads = [threading.Thread(target=writer, args=(w,)) for w in range(writers)]
+        t0 = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        db.flush()
+        elapsed = time.perf_counter() - t0
+        assert db.count_episodes() == per_writer * writers
+        db.close()
+    return per_writer * writers / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--dim", type=int, default=768)
+    args = parser.parse_args()
+
+    table = Table(title=f"Episode insert throughput ({args.rows} rows, {args.writers} writer threads)")
+    for col in ("mode", "rows/sec", "speed-up"):
+        table.add_column(col, justify="right")
+    baseline = run("sync", args.rows, args.writers, args.dim)
+    table.add_row("sync (commit per row)", f"{baseline:,.0f}", "1.0x")
+    batched = run("batched", args.rows, args.writers, args.dim)
+    table.add_row(
+        f"batched (WAL, {Config.DB_BATCH_SIZE} rows / {Config.DB_FLUSH_INTERVAL}s)",
+        f"{batched:,.0f}",
+        f"{batched / baseline:.1f}x",
+    )
+    console.print(table)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,18 +3,140 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+
+def _drone_config() -> dict:
+    """
+    Drones 1..N from DRONE_PORTS, a port range ("50051-50100") and/or comma-separated ports,
+    one MAVSDK server port per drone in order; DRONE<n>_PORT still overrides drone n's port.
+    """
+    ports = []
+    for part in os.getenv("DRONE_PORTS", "50051-50052").split(","):
+        first, _, last = part.strip().partition("-")
+        if first:
+            ports.extend(range(int(first), int(last or first) + 1))
+    return {
+        drone_id: {"port": int(os.getenv(f"DRONE{drone_id}_PORT", port))}
+        for drone_id, port in enumerate(ports, start=1)
+    }
+
+
 class Config:
     OPENAI_KEY = os.getenv("OPENAI_API_KEY")
     API_BASE = f"http://{os.getenv('SIMULATION_IP', '127.0.0.1')}:{os.getenv('API_PORT', '8090')}"
     # Optional: base URL for OpenAI-compatible servers (e.g., Ollama)
     LLM_API_BASE = os.getenv("LLM_API_BASE", "http://localhost:11434/v1")
     
-    # Your specific MAVSDK Server Ports
-    DRONE_CONFIG = {
-        1: {"port": int(os.getenv("DRONE1_PORT", 50051))},
-        2: {"port": int(os.getenv("DRONE2_PORT", 50052))}
-    }
+    # Your specific MAVSDK Server Ports: drone id -> {"port"}, see _drone_config()
+    DRONE_CONFIG = _drone_config()
+
+    # Swarm execution (core/swarm.py): at most SWARM_CONCURRENCY drones run a task at once (0 = no cap);
+    # takeoffs go in waves of SWARM_WAVE_SIZE drones, one wave per SWARM_WAVE_INTERVAL_S (size 0 = no waves).
+    # The defaults keep the old two-drone timing: takeoffs 1.5 s apart.
+    SWARM_CONCURRENCY = int(os.getenv("SWARM_CONCURRENCY", 16))
+    SWARM_WAVE_SIZE = int(os.getenv("SWARM_WAVE_SIZE", 1))
+    SWARM_WAVE_INTERVAL_S = float(os.getenv("SWARM_WAVE_INTERVAL_S", 1.5))
 
     # Models to use (can be overridden via env)
     MODEL_NAME = os.getenv("LLM_MODEL_NAME", "gpt-oss:20b")
     EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "nomic-embed-text")
+    # "remote" (EMBEDDING_MODEL on LLM_API_BASE) or "local" (in-process hashed n-grams, core/embeddings.py)
+    EMBEDDING_PROVIDER = os.getenv("EMBEDDING_PROVIDER", "remote").lower()
+    EMBEDDING_DIM = int(os.getenv("EMBEDDING_DIM", 0))  # 0 = detect (remote) / 768 (local)
+
+    # Shared LLM/embedding client (core/llm_client.py)
+    LLM_CHAT_CONCURRENCY = int(os.getenv("LLM_CHAT_CONCURRENCY", 2))
+    LLM_EMBED_CONCURRENCY = int(os.getenv("LLM_EMBED_CONCURRENCY", 4))
+    LLM_CHAT_TIMEOUT_S = float(os.getenv("LLM_CHAT_TIMEOUT_S", 120.0))
+    LLM_EMBED_TIMEOUT_S = float(os.getenv("LLM_EMBED_TIMEOUT_S", 30.0))
+    LLM_MAX_ATTEMPTS = int(os.getenv("LLM_MAX_ATTEMPTS", 3))
+    # LLMEngine (core/llm_engine.py) response cache for deterministic (temperature 0) calls; 0 disables it
+    LLM_CACHE_SIZE = int(os.getenv("LLM_CACHE_SIZE", 256))
+    LLM_CACHE_TTL_S = float(os.getenv("LLM_CACHE_TTL_S", 600.0))
+    HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", 16))
+    HTTP_KEEPALIVE_S = float(os.getenv("HTTP_KEEPALIVE_S", 30.0))
+
+    # Vector search backend for memory retrieval: "exact" (flat), "ivf" (approximate),
+    # or "int8" (quantized first pass + exact float32 rescore). int8 only pays off for large,
+    # high-dim tables: at 100k x 768 it keeps 4x less in RAM for about a 25% latency gain, while at
+    # 20k x 64 it is about 2x slower than exact
+    VECTOR_INDEX = os.getenv("VECTOR_INDEX", "exact").lower()
+    IVF_NLIST = int(os.getenv("IVF_NLIST", 0))          # 0 = auto (~sqrt(rows))
+    IVF_NPROBE = int(os.getenv("IVF_NPROBE", 8))
+    IVF_MIN_TRAIN = int(os.getenv("IVF_MIN_TRAIN", 10000))  # rows before IVF kicks in
+    QUANT_RESCORE = int(os.getenv("QUANT_RESCORE", 10))  # shortlist = limit * this (at least 64) rows
+
+    # Keep normalised embeddings in memory-mapped files next to the DB (see core/embedding_store.py)
+    EMBEDDING_SIDECAR = os.getenv("EMBEDDING_SIDECAR", "1").lower() in ("1", "true", "yes")
+
+    # Memory write path: "sync" (commit per insert) or "batched" (WAL + group commits)
+    DB_WRITE_MODE = os.getenv("DB_WRITE_MODE", "sync").lower()
+    DB_BATCH_SIZE = int(os.getenv("DB_BATCH_SIZE", 256))
+    DB_FLUSH_INTERVAL = float(os.getenv("DB_FLUSH_INTERVAL", 0.2))  # seconds; max crash-loss window
+
+    # Embedding cache (core/embedding_cache.py): in-process LRU + SQLite file ("" = memory only)
+    EMBED_CACHE_SIZE = int(os.getenv("EMBED_CACHE_SIZE", 4096))
+    EMBED_CACHE_PATH = os.getenv("EMBED_CACHE_PATH", "embedding_cache.db")
+
+    # Embedding micro-batching (core/embedding_batcher.py): concurrent calls share one request
+    EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", 32))
+    EMBED_BATCH_WAIT_MS = float(os.getenv("EMBED_BATCH_WAIT_MS", 5.0))
+    EMBED_QUEUE_SIZE = int(os.getenv("EMBED_QUEUE_SIZE", 1024))
+
+    # Supervisor plan cache (core/plan_cache.py): reuse plans for the same mission + memory context.
+    # PLAN_CACHE_SIZE=0 disables it; PLAN_CACHE_PATH="" keeps it in memory only.
+    PLAN_CACHE_SIZE = int(os.getenv("PLAN_CACHE_SIZE", 256))
+    PLAN_CACHE_PATH = os.getenv("PLAN_CACHE_PATH", "plan_cache.db")
+    PLAN_CACHE_THRESHOLD = float(os.getenv("PLAN_CACHE_THRESHOLD", 0.95))  # mission cosine for a near-match
+
+    # Supervisor context assembly (core/context_builder.py): token budget for CONTEXT FROM MEMORY
+    # (0 = unlimited), candidates fetched per table (x retrieve limit), near-duplicate Jaccard threshold
+    CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", 400))
+    CONTEXT_POOL_FACTOR = int(os.getenv("CONTEXT_POOL_FACTOR", 2))
+    CONTEXT_DEDUP = float(os.getenv("CONTEXT_DEDUP", 0.8))
+    CONTEXT_HAZARD_BOOST = float(os.getenv("CONTEXT_HAZARD_BOOST", 0.1))  # added to HAZARD rule scores when ranking
+
+    # Stream the Supervisor's plan and start executing each task as soon as it has arrived and
+    # been validated (main.py), instead of waiting for the whole plan
+    PLAN_STREAMING = os.getenv("PLAN_STREAMING", "0").lower() in ("1", "true", "yes")
+
+    # Planning SLO: race the LLM against the heuristic planner and use the heuristic plan if the LLM
+    # hasn't answered within PLAN_SLO_MS of the start of planning (0 = off). With PLAN_HOT_SWAP a late
+    # LLM plan (within PLAN_HOT_SWAP_MAX_S more) replaces the tasks that haven't started yet.
+    PLAN_SLO_MS = float(os.getenv("PLAN_SLO_MS", 0))
+    PLAN_HOT_SWAP = os.getenv("PLAN_HOT_SWAP", "0").lower() in ("1", "true", "yes")
+    PLAN_HOT_SWAP_MAX_S = float(os.getenv("PLAN_HOT_SWAP_MAX_S", 60.0))
+
+    # Startup (core/startup.py): bring drones up (connect + GPS lock) while memory loads and the mission
+    # is embedded, retrieved and planned; each drone starts once it is ready. STARTUP_PIPELINE=0 keeps the
+    # old strict order: all drones up, STARTUP_SETTLE_S pause, then memory and planning.
+    STARTUP_PIPELINE = os.getenv("STARTUP_PIPELINE", "1").lower() in ("1", "true", "yes")
+    STARTUP_SETTLE_S = float(os.getenv("STARTUP_SETTLE_S", 3.0))
+    DRONE_READY_TIMEOUT_S = float(os.getenv("DRONE_READY_TIMEOUT_S", 30.0))
+
+    # goto arrival (core/arrival.py): a move completes once the drone is within ARRIVAL_RADIUS_M (horizontal);
+    # it times out after ARRIVAL_TIMEOUT_S plus the starting distance at ARRIVAL_MIN_SPEED_MPS.
+    # ARRIVAL_WINDOW recent fixes give the closing speed / ETA; progress is logged every ARRIVAL_LOG_S (0 = off).
+    # A goto waits up to ARRIVAL_FIX_TIMEOUT_S for a first position fix (needed to convert its altitude to AMSL).
+    ARRIVAL_RADIUS_M = float(os.getenv("ARRIVAL_RADIUS_M", 2.0))
+    ARRIVAL_TIMEOUT_S = float(os.getenv("ARRIVAL_TIMEOUT_S", 30.0))
+    ARRIVAL_MIN_SPEED_MPS = float(os.getenv("ARRIVAL_MIN_SPEED_MPS", 1.0))
+    ARRIVAL_WINDOW = int(os.getenv("ARRIVAL_WINDOW", 10))
+    ARRIVAL_LOG_S = float(os.getenv("ARRIVAL_LOG_S", 2.0))
+    ARRIVAL_FIX_TIMEOUT_S = float(os.getenv("ARRIVAL_FIX_TIMEOUT_S", 5.0))
+
+    # Flight state machine (core/flight_state.py): an airborne drone more than FLIGHT_ALT_TOLERANCE_M off a
+    # task's altitude climbs/descends in place instead of re-running arm + takeoff
+    FLIGHT_ALT_TOLERANCE_M = float(os.getenv("FLIGHT_ALT_TOLERANCE_M", 1.0))
+    FLIGHT_LAND_TIMEOUT_S = float(os.getenv("FLIGHT_LAND_TIMEOUT_S", 60.0))
+
+    # Radius assumed for rule locations stored without one (metres)
+    HAZARD_DEFAULT_RADIUS_M = float(os.getenv("HAZARD_DEFAULT_RADIUS_M", 50.0))
+
+    # Episodic compaction (core/compaction.py): fold near-duplicate episodes per (drone, action).
+    # Tiers are "age:threshold" pairs; older rows fold at a lower cosine threshold, "age:drop" deletes them.
+    # Ages take s/m/h/d suffixes. The background job is opt-in (it deletes episodic rows):
+    # COMPACTION_INTERVAL=0, the default, disables it.
+    COMPACTION_TIERS = os.getenv("COMPACTION_TIERS", "0:0.98,1h:0.95,1d:0.90")
+    COMPACTION_BATCH = int(os.getenv("COMPACTION_BATCH", 500))  # rows per tier per incremental step
+    COMPACTION_INTERVAL = float(os.getenv("COMPACTION_INTERVAL", 0.0))  # seconds between background steps
+    COMPACTION_VACUUM_RATIO = float(os.getenv("COMPACTION_VACUUM_RATIO", 0.25))  # dead index rows before a reindex
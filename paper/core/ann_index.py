@@ -0,0 +1,180 @@
+import numpy as np
+from typing import Iterable, List, Optional, Sequence, Tuple
+from core.logger import log
+from core.vector_index import VectorIndex, top_k
+
+
+def spherical_kmeans(data: np.ndarray, k: int, iterations: int = 10, seed: int = 0) -> np.ndarray:
+    """
+    k-means on unit vectors using cosine (dot-product) assignment.
+    Returns a (k, dim) float32 matrix of unit-norm centroids.
+    """
+    rng = np.random.default_rng(seed)
+    centroids = data[rng.choice(data.shape[0], size=k, replace=False)].copy()
+    for _ in range(iterations):
+        assign = np.argmax(data @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, data)
+        counts = np.bincount(assign, minlength=k)
+        # Re-seed empty clusters from random points so every list stays usable
+        empty = counts == 0
+        if empty.any():
+            sums[empty] = data[rng.choice(data.shape[0], size=int(empty.sum()), replace=False)]
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        centroids = (sums / norms).astype(np.float32)
+    return centroids
+
+
+class IVFIndex(VectorIndex):
+    """
+    Inverted-file ANN index (pure NumPy) layered over the exact VectorIndex.
+
+    Rows are bucketed by their nearest coarse centroid; a query scores only the
+    `nprobe` closest buckets. Below `min_train` rows it behaves exactly like the
+    flat index. New rows are assigned to an existing bucket on insert, and the
+    centroids are retrained whenever the index has doubled since the last training.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        nlist: int = 0,
+        nprobe: int = 8,
+        min_train: int = 10000,
+        train_sample: int = 64,
+        initial_capacity: int = 1024,
+        store=None,
+    ):
+        super().__init__(name, initial_capacity=initial_capacity, store=store)
+        self.nlist = nlist  # 0 = auto (≈ sqrt(rows))
+        self.nprobe = nprobe
+        self.min_train = min_train
+        self.train_sample = train_sample  # training points per centroid
+        self.centroids: Optional[np.ndarray] = None
+        self._lists: List[np.ndarray] = []
+        self._tails: List[List[int]] = []
+        self._tail_count = 0
+        self._trained_size = 0
+
+    @property
+    def trained(self) -> bool:
+        return self.centroids is not None
+
+    def _auto_nlist(self, n: int) -> int:
+        if self.nlist:
+            return self.nlist
+        return int(np.clip(np.sqrt(n), 16, 4096))
+
+    def _assign(self, vectors: np.ndarray, chunk: int = 65536) -> np.ndarray:
+        out = np.empty(vectors.shape[0], dtype=np.int32)
+        for start in range(0, vectors.shape[0], chunk):
+            block = vectors[start:start + chunk]
+            out[start:start + chunk] = np.argmax(block @ self.centroids.T, axis=1)
+        return out
+
+    def train(self):
+        """(Re)build centroids and inverted lists from all indexed rows."""
+        n = len(self)
+        nlist = min(self._auto_nlist(n), n)
+        valid_pos = np.flatnonzero(self.valid)
+        if valid_pos.shape[0] < nlist:
+            return
+        rng = np.random.default_rng(n)
+        sample_size = min(valid_pos.shape[0], nlist * self.train_sample)
+        sample = self.vectors[rng.choice(valid_pos, size=sample_size, replace=False)]
+        self.centroids = spherical_kmeans(sample, nlist)
+
+        assign = self._assign(self.vectors[valid_pos])
+        order = np.argsort(assign, kind="stable")
+        bounds = np.searchsorted(assign[order], np.arange(nlist + 1))
+        sorted_pos = valid_pos[order]
+        self._lists = [sorted_pos[bounds[c]:bounds[c + 1]] for c in range(nlist)]
+        self._tails = [[] for _ in range(nlist)]
+        self._tail_count = 0
+        self._trained_size = n
+        log.info(f"[Index:{self.name}] IVF trained: {n} rows, nlist={nlist}, nprobe={self.nprobe}")
+
+    def refresh(self):
+        if len(self) >= self.min_train:
+            self.train()
+
+    def reset(self):
+        self.centroids = None
+        self._lists, self._tails = [], []
+        self._tail_count = 0
+        self._trained_size = 0
+
+    def _merge_tails(self):
+        for c, tail in enumerate(self._tails):
+            if tail:
+                self._lists[c] = np.concatenate([self._lists[c], np.asarray(tail, dtype=np.int64)])
+                self._tails[c] = []
+        self._tail_count = 0
+
+    def add_many(self, row_ids: Sequence[int], embeddings: np.ndarray) -> int:
+        with self._lock:
+            return self._add_and_assign(row_ids, embeddings)
+
+    def _add_and_assign(self, row_ids: Sequence[int], embeddings: np.ndarray) -> int:
+        start = len(self)
+        added = super().add_many(row_ids, embeddings)
+        if not added:
+            return 0
+        if not self.trained:
+            if len(self) >= self.min_train:
+                self.train()
+            return added
+        if len(self) >= 2 * self._trained_size:
+            self.train()
+            return added
+        # Incremental path: bucket the new rows under the current centroids
+        positions = np.arange(start, start + added)
+        positions = positions[self.valid[positions]]
+        if positions.shape[0]:
+            for pos, c in zip(positions.tolist(), self._assign(self.vectors[positions]).tolist()):
+                self._tails[c].append(pos)
+            self._tail_count += positions.shape[0]
+            if self._tail_count > max(1024, self._trained_size // 10):
+                self._merge_tails()
+        return added
+
+    def remove(self, row_ids: Sequence[int]) -> int:
+        with self._lock:
+            removed = super().remove(row_ids)
+            if removed and self.trained:
+                # Prune tombstones from the buckets so they never reach scoring
+                valid = self.valid
+                self._lists = [lst[valid[lst]] for lst in self._lists]
+                self._tails = [[pos for pos in tail if valid[pos]] for tail in self._tails]
+                self._tail_count = sum(len(tail) for tail in self._tails)
+        return removed
+
+    def candidates(self, query: np.ndarray) -> np.ndarray:
+        """Sorted row positions in the `nprobe` buckets closest to a unit query."""
+        probe = min(self.nprobe, self.centroids.shape[0])
+        nearest = np.argpartition(-(self.centroids @ query), probe - 1)[:probe]
+        parts = [self._lists[c] for c in nearest]
+        parts += [np.asarray(self._tails[c], dtype=np.int64) for c in nearest if self._tails[c]]
+        return np.sort(np.concatenate(parts))
+
+    def search(
+        self, query_embedding: Iterable[float], limit: int = 3, positions: Optional[np.ndarray] = None
+    ) -> List[Tuple[int, float]]:
+        # A pre-filtered candidate set is already small: score it exactly
+        if not self.trained or positions is not None:
+            return super().search(query_embedding, limit, positions)
+        query = np.asarray(query_embedding, dtype=np.float32)
+        if query.shape[0] != self.dim:
+            log.error(f"[Index:{self.name}] Query dim {query.shape[0]} does not match index dim {self.dim}")
+            return []
+        norm = np.linalg.norm(query)
+        if norm > 0:
+            query = query / norm
+        with self._lock:
+            positions = self.candidates(query)
+            scores = self.vectors[positions] @ query
+            scores[~self.valid[positions]] = -np.inf
+            ids = self.ids
+        best = top_k(scores, limit)
+        return [(int(ids[positions[b]]), float(scores[b])) for b in best]
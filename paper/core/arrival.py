@@ -0,0 +1,89 @@
+import asyncio
+from typing import AsyncIterator, Optional
+import numpy as np
+from config import Config
+from core.geo import haversine_m
+from core.logger import log
+
+
+class ArrivalTracker:
+    """
+    Follows a drone's position stream toward a goto target until it is within `radius` metres
+    (horizontal great-circle distance; the altitude frame of goto targets varies, so it is not checked).
+
+    Keeps the last `window` fixes and measures all of them against the target in one
+    haversine_m pass. The closing speed is the least-squares slope of distance over time across
+    that window, which is steadier than differencing two noisy fixes. It gives `eta_s`, and
+    `progress` is the share of the starting distance covered. Both are readable at any time,
+    e.g. by a status display.
+
+    Positions are anything with latitude_deg / longitude_deg (MAVSDK telemetry.Position).
+    """
+
+    def __init__(self, drone_id: int, lat: float, lon: float, radius: float = Config.ARRIVAL_RADIUS_M,
+                 window: int = Config.ARRIVAL_WINDOW):
+        self.drone_id = drone_id
+        self.lat = lat
+        self.lon = lon
+        self.radius = radius
+        self.window = max(2, window)
+        self.start_distance_m: Optional[float] = None
+        self.distance_m: Optional[float] = None
+        self.speed_mps: Optional[float] = None
+        self.eta_s: Optional[float] = None
+        self.progress = 0.0
+        self.fixes = 0
+        self._lat = np.empty(0)
+        self._lon = np.empty(0)
+        self._t = np.empty(0)
+
+    def update(self, position, now: float) -> bool:
+        """Add one fix taken at loop time `now`; True once it is within the acceptance radius."""
+        self.fixes += 1
+        self._lat = np.append(self._lat, position.latitude_deg)[-self.window:]
+        self._lon = np.append(self._lon, position.longitude_deg)[-self.window:]
+        self._t = np.append(self._t, now)[-self.window:]
+        distances = haversine_m(self._lat, self._lon, self.lat, self.lon)
+        self.distance_m = float(distances[-1])
+        if self.start_distance_m is None:
+            self.start_distance_m = self.distance_m
+        if self.start_distance_m > 0:
+            self.progress = float(np.clip(1.0 - self.distance_m / self.start_distance_m, 0.0, 1.0))
+        if len(self._t) >= 2 and self._t[-1] > self._t[0]:
+            self.speed_mps = float(-np.polyfit(self._t - self._t[0], distances, 1)[0])
+            self.eta_s = self.distance_m / self.speed_mps if self.speed_mps > 0.1 else None
+        return self.distance_m <= self.radius
+
+    async def follow(self, positions: AsyncIterator, timeout: Optional[float] = None,
+                     log_every: float = Config.ARRIVAL_LOG_S) -> float:
+        """
+        Consume `positions` until arrival; returns the seconds it took. Logs progress every
+        `log_every` seconds; raises TimeoutError after `timeout` seconds (None = no limit).
+        """
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        last_log = start
+
+        async def watch():
+            nonlocal last_log
+            async for position in positions:
+                now = loop.time()
+                if self.update(position, now):
+                    return
+                if log_every > 0 and now - last_log >= log_every:
+                    last_log = now
+                    eta = f"{self.eta_s:.0f} s" if self.eta_s is not None else "unknown"
+                    log.info(
+                        f"[Drone {self.drone_id}] En route: {self.distance_m:.0f} m to go "
+                        f"({self.progress:.0%}), ETA {eta}"
+                    )
+            raise RuntimeError(f"Drone {self.drone_id} position stream ended before arrival")
+
+        try:
+            await asyncio.wait_for(watch(), timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError(
+                f"Drone {self.drone_id} did not reach {self.lat}, {self.lon} within {timeout:.0f} s "
+                f"({self.distance_m if self.distance_m is not None else float('nan'):.0f} m away)"
+            )
+        return loop.time() - start
@@ -0,0 +1,81 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+from core.database import DatabaseManager
+
+
+class AsyncDatabase:
+    """
+    Async facade over DatabaseManager that keeps SQLite and NumPy work off the event loop.
+
+    Writes (inserts, flush, close) run in order on one dedicated writer thread; reads
+    (similarity search, counts, snapshots) run on a small pool, each thread with its own
+    read-only connection. With WAL the readers never wait for the writer, and the loop
+    stays free for MAVSDK telemetry.
+    """
+
+    def __init__(self, db: DatabaseManager, read_workers: int = 4):
+        self.db = db
+        self.db.enable_wal()
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-writer")
+        self._readers = ThreadPoolExecutor(max_workers=read_workers, thread_name_prefix="db-reader")
+
+    async def _write(self, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._writer, functools.partial(fn, *args, **kwargs))
+
+    async def _read(self, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._readers, functools.partial(fn, *args, **kwargs))
+
+    # ---------- writes ----------
+
+    async def insert_episode(self, **kwargs) -> None:
+        await self._write(self.db.insert_episode, **kwargs)
+
+    async def insert_rule(self, **kwargs) -> None:
+        await self._write(self.db.insert_rule, **kwargs)
+
+    async def compact_episodes(self, **kwargs) -> Dict[str, Any]:
+        return await self._write(self.db.compact_episodes, **kwargs)
+
+    async def flush(self) -> int:
+        return await self._write(self.db.flush)
+
+    async def close(self):
+        await self._write(self.db.close)
+        self._writer.shutdown(wait=True)
+        self._readers.shutdown(wait=True)
+
+    # ---------- reads ----------
+
+    async def find_similar_episodes_with_flags(self, query_embedding: List[float], limit: int = 3, **filters) -> List[Dict[str, Any]]:
+        return await self._read(self.db.find_similar_episodes_with_flags, query_embedding, limit=limit, **filters)
+
+    async def find_similar_rules_with_flags(self, query_embedding: List[float], limit: int = 3, **filters) -> List[Dict[str, Any]]:
+        return await self._read(self.db.find_similar_rules_with_flags, query_embedding, limit=limit, **filters)
+
+    async def hazards_for_targets(self, targets: List[tuple], rule_type: Optional[str] = "HAZARD", margin_m: float = 0.0):
+        return await self._read(self.db.hazards_for_targets, targets, rule_type=rule_type, margin_m=margin_m)
+
+    async def find_rules_near(self, lat: float, lon: float, radius_m: float = 0.0, rule_type: Optional[str] = None):
+        return await self._read(self.db.find_rules_near, lat, lon, radius_m=radius_m, rule_type=rule_type)
+
+    async def stats(self) -> Dict[str, int]:
+        def counts():
+            return {
+                "episodes": self.db.count_episodes(),
+                "poisoned_episodes": self.db.count_poisoned(),
+                "rules": self.db.count_rules(),
+                "poisoned_rules": self.db.count_poisoned_rules(),
+            }
+        return await self._read(counts)
+
+    async def snapshot(self, episodes: int = 5, rules: int = 5) -> Dict[str, List[Dict[str, Any]]]:
+        def recent():
+            return {
+                "episodes": self.db.recent_episodes(limit=episodes),
+                "rules": self.db.recent_rules(limit=rules),
+            }
+        return await self._read(recent)
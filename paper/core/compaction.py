@@ -0,0 +1,59 @@
+import numpy as np
+from typing import List, Optional, Tuple
+
+_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_age(text: str) -> float:
+    """'90' / '30s' / '15m' / '1h' / '7d' -> seconds."""
+    text = text.strip().lower()
+    if text and text[-1] in _UNITS:
+        return float(text[:-1]) * _UNITS[text[-1]]
+    return float(text)
+
+
+def parse_tiers(spec: str) -> List[Tuple[float, Optional[float]]]:
+    """
+    Retention tiers from Config.COMPACTION_TIERS, youngest first: [(min_age_s, threshold), ...].
+    A threshold of None means rows older than min_age_s are dropped.
+    e.g. "0:0.98,1h:0.95,30d:drop" -> [(0, 0.98), (3600, 0.95), (2592000, None)]
+    """
+    tiers = []
+    for part in spec.split(","):
+        if not part.strip():
+            continue
+        age, _, threshold = part.partition(":")
+        threshold = threshold.strip().lower()
+        if threshold == "drop":
+            tiers.append((parse_age(age), None))
+            continue
+        value = float(threshold)
+        if not 0.0 < value <= 1.0:
+            raise ValueError(f"Compaction threshold must be in (0, 1], got {value} in '{part}'")
+        tiers.append((parse_age(age), value))
+    return sorted(tiers, key=lambda tier: tier[0])
+
+
+def fold_group(vectors: np.ndarray, leaders: np.ndarray, threshold: float) -> np.ndarray:
+    """
+    Greedy leader clustering of unit `vectors` (in insertion order) against existing
+    unit `leaders`. Returns, per row, the index of the leader it folds into: positions
+    < len(leaders) are existing leaders, larger ones are rows of this batch that became
+    leaders themselves (row i leading itself gets len(leaders) + its rank among new leaders).
+    """
+    dim = vectors.shape[1]
+    pool = np.empty((leaders.shape[0] + vectors.shape[0], dim), dtype=np.float32)
+    pool[: leaders.shape[0]] = leaders
+    size = leaders.shape[0]
+    target = np.empty(vectors.shape[0], dtype=np.int64)
+    for i, vec in enumerate(vectors):
+        if size:
+            sims = pool[:size] @ vec
+            best = int(np.argmax(sims))
+            if sims[best] >= threshold:
+                target[i] = best
+                continue
+        pool[size] = vec
+        target[i] = size
+        size += 1
+    return target
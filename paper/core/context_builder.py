@@ -0,0 +1,143 @@
+import re
+from typing import List, Tuple
+from core.geo import parse_location
+from schemas.models import ContextHit
+
+try:  # exact counts when tiktoken is installed, a rough estimate otherwise
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("o200k_base")
+except Exception:
+    _ENCODING = None
+
+_PIECE = re.compile(r"[A-Za-z]+|\d+|\s{2,}|[^\sA-Za-z\d]")
+_WORD = re.compile(r"\w+")
+_HAZARD_PREFIX = re.compile(r"^\s*hazard\s*[:\-]\s*", re.IGNORECASE)
+EMPTY_CONTEXT = "No relevant past experiences or rules found."
+MIN_SNIPPET_TOKENS = 24  # a snippet cut shorter than this says too little to be worth its line
+
+
+def count_tokens(text: str) -> int:
+    """Prompt tokens in `text`: tiktoken (o200k) if available, else a BPE-like estimate."""
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text))
+    # ~1 token per 5 letters of a word and per 3 digits of a number; punctuation and whitespace
+    # runs (newline + indentation) one each
+    return sum(
+        1 + (len(p) - 1) // 5 if p[0].isalpha() else 1 + (len(p) - 1) // 3 if p[0].isdigit() else 1
+        for p in _PIECE.findall(text)
+    )
+
+
+def _shingles(text: str) -> set:
+    words = _WORD.findall(text.lower())
+    return {" ".join(words[i:i + 3]) for i in range(max(1, len(words) - 2))}
+
+
+class ContextBuilder:
+    """
+    Assembles the CONTEXT FROM MEMORY block under a token budget.
+
+    - Near-identical snippets (word 3-shingle Jaccard >= `dedup`) are merged: the best-scoring
+      one is kept, with the others' repeat counts and poison flags folded into it.
+    - Selection is score-aware: everything is ranked by similarity, with HAZARD rules given a
+      bounded `hazard_boost` on top of their score (a relevant hazard outranks a slightly
+      closer episode, a stale one doesn't lead the prompt), each table capped at `limit`.
+      A snippet that doesn't fit the remaining budget is cut to fit (word boundary, " ...")
+      if at least MIN_SNIPPET_TOKENS remain, else skipped in favour of smaller ones. The top
+      snippet is always kept.
+    - Hazards with coordinates render as one compact line, "(lat, lon) r=Nm: text", ahead of
+      the other sections, so both the LLM and the fallback planner's coordinate scan see them.
+
+    budget <= 0 disables the limit (selection and dedup still apply).
+    """
+
+    def __init__(self, budget: int = 0, dedup: float = 0.8, hazard_boost: float = 0.1):
+        self.budget = budget
+        self.dedup = dedup
+        self.hazard_boost = hazard_boost
+
+    def _merge_duplicates(self, hits: List[ContextHit]) -> List[ContextHit]:
+        kept: List[Tuple[ContextHit, set]] = []
+        for hit in sorted(hits, key=lambda h: -h.score):
+            shingles = _shingles(hit.text)
+            for i, (other, other_shingles) in enumerate(kept):
+                union = len(shingles | other_shingles)
+                if other.source == hit.source and union and len(shingles & other_shingles) / union >= self.dedup:
+                    kept[i] = (
+                        other.model_copy(update={"count": other.count + hit.count, "poisoned": other.poisoned or hit.poisoned}),
+                        other_shingles,
+                    )
+                    break
+            else:
+                kept.append((hit, shingles))
+        return [hit for hit, _ in kept]
+
+    @staticmethod
+    def _is_hazard(hit: ContextHit) -> bool:
+        return hit.source == "rule" and (hit.rule_type or "").upper() == "HAZARD"
+
+    @classmethod
+    def _line(cls, hit: ContextHit) -> str:
+        text = " ".join(hit.text.split())
+        if cls._is_hazard(hit):
+            where = parse_location(hit.location)
+            if where is not None:
+                lat, lon, radius = where
+                text = _HAZARD_PREFIX.sub("", text)
+                return f"({lat}, {lon})" + (f" r={radius:.0f}m" if radius else "") + f": {text}"
+        if hit.source == "episodic" and hit.count > 1:
+            return f"{text} (seen {hit.count}x)"
+        return text
+
+    @classmethod
+    def _section(cls, hit: ContextHit) -> str:
+        if hit.source == "episodic":
+            return "Past Experiences"
+        if cls._is_hazard(hit) and parse_location(hit.location) is not None:
+            return "Hazards"
+        return "Relevant Rules"
+
+    @classmethod
+    def render(cls, episodic: List[ContextHit], rules: List[ContextHit]) -> str:
+        sections = []
+        for title in ("Hazards", "Past Experiences", "Relevant Rules"):
+            lines = [cls._line(h) for h in episodic + rules if cls._section(h) == title]
+            if lines:
+                sections.append(f"{title}:\n- " + "\n- ".join(lines))
+        return "\n\n".join(sections) if sections else EMPTY_CONTEXT
+
+    def build(
+        self, episodic: List[ContextHit], rules: List[ContextHit], limit: int = 3
+    ) -> Tuple[str, List[ContextHit], List[ContextHit], int]:
+        """(rendered text, selected episodes, selected rules, token count of the text)."""
+        candidates = self._merge_duplicates(episodic) + self._merge_duplicates(rules)
+        candidates.sort(key=lambda h: -(h.score + (self.hazard_boost if self._is_hazard(h) else 0.0)))
+        chosen = {"episodic": [], "rule": []}
+        sections, used = set(), 0
+        for hit in candidates:
+            if len(chosen[hit.source]) >= limit:
+                continue
+            section = self._section(hit)
+            # "\n- " per line, plus the section header (and its blank line) for a section's first line
+            overhead = 2 + (0 if section in sections else count_tokens(section) + 3)
+            cost = count_tokens(self._line(hit)) + overhead
+            if self.budget > 0 and used + cost > self.budget:
+                room = self.budget - used - overhead
+                if used and room < MIN_SNIPPET_TOKENS:
+                    continue
+                hit = self._truncate(hit, room)
+                cost = count_tokens(self._line(hit)) + overhead
+            chosen[hit.source].append(hit)
+            sections.add(section)
+            used += cost
+        # Keep each table in score order, as retrieval returned it
+        selected_episodic = sorted(chosen["episodic"], key=lambda h: -h.score)
+        selected_rules = sorted(chosen["rule"], key=lambda h: -h.score)
+        text = self.render(selected_episodic, selected_rules)
+        return text, selected_episodic, selected_rules, count_tokens(text)
+
+    def _truncate(self, hit: ContextHit, budget: int) -> ContextHit:
+        words = hit.text.split()
+        while len(words) > 1 and count_tokens(self._line(hit.model_copy(update={"text": " ".join(words)}))) > budget:
+            words = words[: max(1, len(words) * 3 // 4)]
+        return hit.model_copy(update={"text": " ".join(words) + (" ..." if len(words) < len(hit.text.split()) else "")})
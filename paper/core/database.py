@@ -1,17 +1,82 @@
+import atexit
+import functools
 import sqlite3
 import json
+import threading
+import time
+from datetime import datetime, timezone
 import numpy as np
 from typing import List, Dict, Any, Optional
+from config import Config
 from core.logger import log
+from core.ann_index import IVFIndex
+from core.compaction import fold_group, parse_tiers
+from core.embedding_store import EmbeddingStore
+from core.quantized_index import QUANT_DTYPES, QuantizedIndex
+from core.geo import bounding_box, haversine_m, parse_location
+from core.vector_index import VectorIndex
 
 DB_PATH = "mission_memory.db"
 
+# Column order used by the batched (executemany) write path; ids are pre-assigned
+INSERT_SQL = {
+    "episodic_memory": """
+        INSERT INTO episodic_memory
+        (id, timestamp, drone_id, action_type, state_json, outcome_text, embedding, is_poisoned)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """,
+    "semantic_rules": """
+        INSERT INTO semantic_rules
+        (id, rule_text, rule_type, location_json, confidence, embedding, is_poisoned, lat, lon, radius_m)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """,
+}
+
+
+# Metadata filters accepted by the find_similar_* methods, per table
+FILTERS = {
+    "episodic_memory": ("drone_id", "action_type", "since", "until", "include_poisoned"),
+    "semantic_rules": ("rule_type", "include_poisoned"),
+}
+
+
+def _sql_timestamp(value) -> str:
+    """datetime / epoch seconds / string -> the 'YYYY-MM-DD HH:MM:SS' UTC text SQLite's datetime('now') writes."""
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc)
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+    if isinstance(value, (int, float)):
+        return time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(value))
+    return str(value)
+
+
+def _read_your_writes(method):
+    """Flush queued writes before a read so callers always see their own inserts."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self.batched and any(self._pending.values()):
+            self.flush()
+        return method(self, *args, **kwargs)
+    return wrapper
+
 
 class DatabaseManager:
-    def __init__(self):
-        self.conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+    def __init__(self, db_path: str = DB_PATH):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
         self.cursor = self.conn.cursor()
+        self._lock = threading.RLock()  # guards the writer connection and the write queue
+        self._local = threading.local()  # per-thread read-only connections
+        self._read_conns: List[sqlite3.Connection] = []
         self._init_tables()
+        # Cosine indexes, built once here and appended to on insert.
+        # With Config.EMBEDDING_SIDECAR they sit on memory-mapped files next to the DB.
+        self.episode_index = self._make_index("episodic_memory")
+        self.rule_index = self._make_index("semantic_rules")
+        self._load_index(self.episode_index, "episodic_memory")
+        self._load_index(self.rule_index, "semantic_rules")
+        self._init_write_path()
 
     def _init_tables(self):
         # 1. Episodic Memory (The "Black Box" Log)
@@ -42,135 +107,707 @@ class DatabaseManager:
                 is_poisoned INTEGER DEFAULT 0
             )
         """)
+        self._init_spatial()
+        self._init_compaction()
+
+        # Secondary indexes so metadata filters pre-select candidates in SQL
+        for name, table, column in (
+            ("idx_episodic_drone", "episodic_memory", "drone_id"),
+            ("idx_episodic_action", "episodic_memory", "action_type"),
+            ("idx_episodic_timestamp", "episodic_memory", "timestamp"),
+            ("idx_episodic_poisoned", "episodic_memory", "is_poisoned"),
+            ("idx_rules_type", "semantic_rules", "rule_type"),
+            ("idx_rules_poisoned", "semantic_rules", "is_poisoned"),
+        ):
+            self.cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table}({column})")
         self.conn.commit()
         log.success("Memory Database Initialized (SQLite)")
 
+    def _init_spatial(self):
+        """Typed rule geometry (lat, lon, radius_m columns) plus an R*Tree of bounding boxes."""
+        columns = {r[1] for r in self.cursor.execute("PRAGMA table_info(semantic_rules)").fetchall()}
+        for column in ("lat", "lon", "radius_m"):
+            if column not in columns:
+                self.cursor.execute(f"ALTER TABLE semantic_rules ADD COLUMN {column} REAL")
+        self.cursor.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS semantic_rules_rtree
+            USING rtree(id, min_lat, max_lat, min_lon, max_lon)
+        """)
+        # Backfill rules written before the typed columns existed
+        rows = self.cursor.execute(
+            "SELECT id, location_json FROM semantic_rules WHERE lat IS NULL AND location_json IS NOT NULL"
+        ).fetchall()
+        migrated = 0
+        for row_id, location_json in rows:
+            lat, lon, radius_m = self._rule_geometry(location_json)
+            if lat is None:
+                continue
+            self.cursor.execute(
+                "UPDATE semantic_rules SET lat = ?, lon = ?, radius_m = ? WHERE id = ?", (lat, lon, radius_m, row_id)
+            )
+            self._insert_rule_bbox(self.cursor, row_id, lat, lon, radius_m)
+            migrated += 1
+        if migrated:
+            log.info(f"[Spatial] Indexed {migrated} existing rule location(s)")
+
+    def _init_compaction(self):
+        """Columns a folded (representative) episode carries, plus per-tier compaction watermarks."""
+        columns = {r[1] for r in self.cursor.execute("PRAGMA table_info(episodic_memory)").fetchall()}
+        for column, decl in (("dup_count", "INTEGER DEFAULT 1"), ("first_seen", "TEXT"), ("last_seen", "TEXT")):
+            if column not in columns:
+                self.cursor.execute(f"ALTER TABLE episodic_memory ADD COLUMN {column} {decl}")
+        self.cursor.execute("""
+            CREATE TABLE IF NOT EXISTS memory_maintenance (
+                key TEXT PRIMARY KEY,
+                value INTEGER
+            )
+        """)
+
+    @staticmethod
+    def _rule_geometry(location) -> tuple:
+        """(lat, lon, radius_m) for a rule location, (None, None, None) if it has no coordinates."""
+        parsed = parse_location(location)
+        if parsed is None:
+            return None, None, None
+        lat, lon, radius = parsed
+        return lat, lon, radius if radius is not None else Config.HAZARD_DEFAULT_RADIUS_M
+
+    @staticmethod
+    def _insert_rule_bbox(cursor, row_id: int, lat: float, lon: float, radius_m: float):
+        cursor.execute(
+            "INSERT OR REPLACE INTO semantic_rules_rtree VALUES (?, ?, ?, ?, ?)",
+            (row_id,) + bounding_box(lat, lon, radius_m),
+        )
+
+    def _make_index(self, table: str) -> VectorIndex:
+        """Pick the search backend from Config.VECTOR_INDEX (exact flat scan, IVF ANN or quantized)."""
+        store = EmbeddingStore(self.db_path, table) if Config.EMBEDDING_SIDECAR else None
+        if Config.VECTOR_INDEX == "ivf":
+            return IVFIndex(
+                table,
+                nlist=Config.IVF_NLIST,
+                nprobe=Config.IVF_NPROBE,
+                min_train=Config.IVF_MIN_TRAIN,
+                store=store,
+            )
+        if Config.VECTOR_INDEX in QUANT_DTYPES:
+            return QuantizedIndex(table, mode=Config.VECTOR_INDEX, rescore=Config.QUANT_RESCORE, store=store)
+        if Config.VECTOR_INDEX != "exact":
+            log.error(f"Unknown VECTOR_INDEX '{Config.VECTOR_INDEX}', using exact search")
+        return VectorIndex(table, store=store)
+
+    def _blob_length(self, table: str, index: VectorIndex) -> Optional[int]:
+        """Byte length of the embeddings that belong in the index (the most common one if unknown)."""
+        if index.dim is not None:
+            return 4 * index.dim
+        row = self.conn.execute(f"""
+            SELECT length(embedding), COUNT(*) FROM {table}
+            WHERE embedding IS NOT NULL AND length(embedding) > 0
+            GROUP BY 1 ORDER BY 2 DESC LIMIT 1
+        """).fetchone()
+        return row[0] if row else None
+
+    def _index_rows(self, index: VectorIndex, table: str, after_id: int = 0, block: int = 20000) -> int:
+        """Deserialise stored embeddings with id > after_id into the index, one block at a time."""
+        length = self._blob_length(table, index)
+        if length is None:
+            return 0
+        cur = self.conn.execute(
+            f"SELECT id, embedding FROM {table} WHERE length(embedding) = ? AND id > ? ORDER BY id",
+            (length, after_id),
+        )
+        added = 0
+        while True:
+            rows = cur.fetchmany(block)
+            if not rows:
+                break
+            matrix = np.frombuffer(b"".join(r[1] for r in rows), dtype=np.float32).reshape(len(rows), -1)
+            added += index.add_many([r[0] for r in rows], matrix)
+        skipped = self.conn.execute(
+            f"SELECT COUNT(*) FROM {table} WHERE length(embedding) > 0 AND length(embedding) != ? AND id > ?",
+            (length, after_id),
+        ).fetchone()[0]
+        if skipped:
+            log.error(f"[Index:{table}] Skipped {skipped} embedding(s) whose dimension differs from {length // 4}")
+        return added
+
+    def _load_index(self, index: VectorIndex, table: str):
+        """Fill the table's index once at startup (from the sidecar when there is one)."""
+        if isinstance(index.store, EmbeddingStore):
+            report = self.check_sidecar(table, index)
+            if not report["consistent"]:
+                self._repair_sidecar(table, index, report)
+            index.refresh()
+            log.info(f"[Index:{table}] Mapped {len(index)} vectors (dim {index.dim}) from {index.store.vec_path}")
+            return
+        self._index_rows(index, table)
+        index.refresh()
+        log.info(f"[Index:{table}] Loaded {len(index)} vectors (dim {index.dim})")
+
+    def _index_for(self, table: str) -> VectorIndex:
+        return self.episode_index if table == "episodic_memory" else self.rule_index
+
+    def _sidecar_diff(self, table: str, index: VectorIndex) -> tuple:
+        """(sql_ids, sidecar_ids, missing, orphaned) for the table's index."""
+        length = self._blob_length(table, index)
+        sql_ids = np.array(
+            [r[0] for r in self.conn.execute(f"SELECT id FROM {table} WHERE length(embedding) = ? ORDER BY id", (length,))]
+            if length else [],
+            dtype=np.int64,
+        )
+        side_ids = np.asarray(index.ids, dtype=np.int64)
+        missing = np.setdiff1d(sql_ids, side_ids, assume_unique=True)
+        # Tombstoned rows (deleted by compaction) are expected to be gone from SQLite
+        orphaned = np.setdiff1d(side_ids[np.asarray(index.valid)], sql_ids, assume_unique=True)
+        return sql_ids, side_ids, missing, orphaned
+
+    def check_sidecar(self, table: str, index: Optional[VectorIndex] = None) -> Dict[str, Any]:
+        """
+        Compare the sidecar's row ids with the SQLite rows that should be in it.
+        missing: SQLite rows absent from the sidecar; orphaned: live sidecar rows with no SQLite row.
+        """
+        index = index or self._index_for(table)
+        sql_ids, side_ids, missing, orphaned = self._sidecar_diff(table, index)
+        # Rows only ever get appended, so missing rows past the sidecar's end can be appended;
+        # orphans (a delete that committed before its tombstone was written) are just tombstoned.
+        appendable = side_ids.shape[0] == 0 or missing.shape[0] == 0 or missing.min() > side_ids.max()
+        return {
+            "table": table,
+            "sql_rows": int(sql_ids.shape[0]),
+            "sidecar_rows": int(side_ids.shape[0]),
+            "missing": int(missing.shape[0]),
+            "orphaned": int(orphaned.shape[0]),
+            "appendable": bool(appendable),
+            "consistent": bool(missing.shape[0] == 0 and orphaned.shape[0] == 0),
+        }
+
+    def _repair_sidecar(self, table: str, index: VectorIndex, report: Dict[str, Any]):
+        if report["appendable"]:
+            if report["orphaned"]:
+                _, _, _, orphaned = self._sidecar_diff(table, index)
+                index.remove(orphaned)
+                log.info(f"[Sidecar:{table}] Tombstoned {orphaned.shape[0]} deleted row(s)")
+            after_id = int(index.ids[-1]) if len(index) else 0
+            added = self._index_rows(index, table, after_id=after_id)
+            log.info(f"[Sidecar:{table}] Appended {added} missing vector(s)")
+        else:
+            self.rebuild_sidecar(table)
+
+    def rebuild_sidecar(self, table: str):
+        """Migration path: rewrite the table's sidecar from the SQLite BLOBs."""
+        index = self._index_for(table)
+        log.info(f"[Sidecar:{table}] Rebuilding from SQLite...")
+        added = self._reindex(table)
+        log.success(f"[Sidecar:{table}] Wrote {added} vectors to {index.store.vec_path}")
+
+    def _reindex(self, table: str) -> int:
+        """Refill the table's index (and sidecar, if any) from SQLite, dropping tombstones."""
+        index = self._index_for(table)
+        with self._lock, index._lock:
+            index.store.reset()
+            index.reset()
+            added = self._index_rows(index, table)
+            index.refresh()
+        return added
+
+    def enable_wal(self):
+        """WAL lets the per-thread read connections run alongside the writer."""
+        with self._lock:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+
+    def _read_cursor(self) -> sqlite3.Cursor:
+        """Cursor on the calling thread's own read-only connection."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True, check_same_thread=False)
+            self._local.conn = conn
+            with self._lock:
+                self._read_conns.append(conn)
+        return conn.cursor()
+
+    # ---------- write path ----------
+
+    def _init_write_path(self):
+        """
+        Config.DB_WRITE_MODE="sync" commits every insert (original behaviour).
+        "batched" switches to WAL and a write-behind queue drained by a flusher thread
+        with executemany group commits, every DB_BATCH_SIZE rows or DB_FLUSH_INTERVAL
+        seconds, whichever comes first. A crash loses at most that window.
+
+        A locked or failing database (sqlite3.OperationalError) keeps the queue and raises from
+        flush(); the flusher thread logs it and retries. A row SQLite rejects on its own (e.g. a
+        constraint) is logged, counted in `dropped_writes` and dropped; the rest of its batch is
+        written.
+        """
+        self.batched = Config.DB_WRITE_MODE == "batched"
+        self._pending: Dict[str, List[tuple]] = {"episodic_memory": [], "semantic_rules": []}
+        self._pending_vectors: Dict[str, List[List[float]]] = {"episodic_memory": [], "semantic_rules": []}
+        self._closed = False
+        self.dropped_writes = 0
+        if not self.batched:
+            return
+        self.enable_wal()
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self._next_id = {table: self._max_id(table) + 1 for table in self._pending}
+        self._wake = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_loop, name="db-flusher", daemon=True)
+        self._flusher.start()
+        atexit.register(self.close)
+        log.info(
+            f"[DB] Batched writes (WAL): batch={Config.DB_BATCH_SIZE} rows, interval={Config.DB_FLUSH_INTERVAL}s"
+        )
+
+    def _max_id(self, table: str) -> int:
+        seq = self.conn.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (table,)).fetchone()
+        top = self.conn.execute(f"SELECT MAX(id) FROM {table}").fetchone()
+        return max(seq[0] if seq else 0, top[0] or 0)
+
+    def _enqueue(self, table: str, row: tuple, embedding: List[float]):
+        """Queue a row (first column left for the pre-assigned id) for the next group commit."""
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("DatabaseManager is closed")
+            row_id = self._next_id[table]
+            self._next_id[table] += 1
+            self._pending[table].append((row_id,) + row)
+            self._pending_vectors[table].append(embedding)
+            queued = sum(len(rows) for rows in self._pending.values())
+        if queued >= Config.DB_BATCH_SIZE:
+            self._wake.set()
+
+    def _flush_loop(self):
+        while not self._closed:
+            self._wake.wait(Config.DB_FLUSH_INTERVAL)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                log.error(f"[DB] Group commit failed: {e}")
+
+    def _write_rows(self, batch: Dict[str, List[tuple]]):
+        """Insert queued rows (and their rule bounding boxes) in the current transaction."""
+        for table, rows in batch.items():
+            if rows:
+                self.conn.executemany(INSERT_SQL[table], rows)
+        cursor = self.conn.cursor()
+        for row in batch.get("semantic_rules", []):
+            row_id, lat, lon, radius_m = row[0], row[7], row[8], row[9]
+            if lat is not None:
+                self._insert_rule_bbox(cursor, row_id, lat, lon, radius_m)
+
+    def _index_flushed(self, table: str, count: int) -> int:
+        """Index the first `count` queued rows of `table`, now committed, and drop them from the queue."""
+        rows, vectors = self._pending[table], self._pending_vectors[table]
+        index = self._index_for(table)
+        # Index only what is durable in SQLite, so the sidecar never runs ahead of the table
+        for row, vector in zip(rows[:count], vectors[:count]):
+            index.add(row[0], vector)
+        del rows[:count]
+        del vectors[:count]
+        return count
+
+    def _flush_locked(self) -> int:
+        if not self.batched or not any(self._pending.values()):
+            return 0
+        try:
+            self._write_rows(self._pending)
+            self.conn.commit()
+        except sqlite3.OperationalError:
+            # Locked / I/O error: nothing was written, the queue is kept for the next flush
+            self.conn.rollback()
+            raise
+        except sqlite3.Error as e:
+            # One bad row fails the whole executemany; don't let it take its batch-mates down
+            self.conn.rollback()
+            log.error(f"[DB] Group commit failed ({e}); writing the batch row by row")
+            return self._flush_each()
+        except Exception:
+            self.conn.rollback()
+            raise
+        return sum(self._index_flushed(table, len(rows)) for table, rows in self._pending.items())
+
+    def _flush_each(self) -> int:
+        """One commit per queued row; a row that still fails on its own is logged and dropped."""
+        flushed = 0
+        for table, rows in self._pending.items():
+            while rows:
+                try:
+                    self._write_rows({table: rows[:1]})
+                    self.conn.commit()
+                except sqlite3.OperationalError:
+                    self.conn.rollback()
+                    raise
+                except sqlite3.Error as e:
+                    self.conn.rollback()
+                    log.error(f"[DB] Dropped queued {table} row {rows[0][0]}: {e}")
+                    del rows[0]
+                    del self._pending_vectors[table][0]
+                    self.dropped_writes += 1
+                    continue
+                flushed += self._index_flushed(table, 1)
+        return flushed
+
+    def flush(self) -> int:
+        """Commit every queued insert now. Returns the number of rows written."""
+        with self._lock:
+            return self._flush_locked()
+
+    def close(self):
+        """Flush queued writes, stop the flusher and close the connection and sidecar files."""
+        with self._lock:
+            if self._closed:
+                return
+            self._flush_locked()
+            self._closed = True
+        if self.batched:
+            self._wake.set()
+            self._flusher.join(timeout=5.0)
+            atexit.unregister(self.close)
+        for index in (self.episode_index, self.rule_index):
+            if isinstance(index.store, EmbeddingStore):
+                index.store.close()
+        for conn in self._read_conns:
+            conn.close()
+        self.conn.close()
+
+    @staticmethod
+    def _filter_clause(table: str, filters: Dict[str, Any]) -> tuple:
+        """WHERE clause + params for the metadata filters (None values are ignored)."""
+        unknown = set(filters) - set(FILTERS[table])
+        if unknown:
+            raise TypeError(f"Unsupported filter(s) for {table}: {sorted(unknown)}")
+        clauses, params = [], []
+        for key in ("drone_id", "action_type", "rule_type"):
+            if filters.get(key) is not None:
+                clauses.append(f"{key} = ?")
+                params.append(filters[key])
+        if filters.get("since") is not None:
+            clauses.append("timestamp >= ?")
+            params.append(_sql_timestamp(filters["since"]))
+        if filters.get("until") is not None:
+            clauses.append("timestamp <= ?")
+            params.append(_sql_timestamp(filters["until"]))
+        if filters.get("include_poisoned") is False:
+            clauses.append("is_poisoned = 0")
+        return " AND ".join(clauses), params
+
+    def _rank(
+        self, index: VectorIndex, table: str, columns: str, query_embedding: List[float], limit: int, filters: Dict[str, Any]
+    ) -> List[tuple]:
+        """
+        Top-k rows of `table` by cosine similarity: [(score, row), ...] best first.
+        With filters, candidate ids come from SQL (using the secondary indexes) and only those rows are scored.
+        """
+        where, params = self._filter_clause(table, filters)
+        positions = None
+        if where:
+            cur = self._read_cursor()
+            cur.execute(f"SELECT id FROM {table} WHERE {where} ORDER BY id", params)
+            candidate_ids = np.fromiter((r[0] for r in cur), dtype=np.int64)
+            positions = index.positions_of(candidate_ids)
+            if positions.shape[0] == 0:
+                return []
+        hits = index.search(query_embedding, limit, positions)
+        if not hits:
+            return []
+        ids = [row_id for row_id, _ in hits]
+        placeholders = ",".join("?" * len(ids))
+        cur = self._read_cursor()
+        cur.execute(f"SELECT id, {columns} FROM {table} WHERE id IN ({placeholders})", ids)
+        by_id = {r[0]: r[1:] for r in cur.fetchall()}
+        return [(score, by_id[row_id]) for row_id, score in hits if row_id in by_id]
+
     def insert_episode(self, drone_id: int, action: str, state: Dict, outcome: str, embedding: List[float], is_poisoned: int = 0):
         """Standard insertion of a flight event."""
         # Convert list of floats to bytes for storage
         emb_blob = np.array(embedding, dtype=np.float32).tobytes()
 
-        self.cursor.execute("""
-            INSERT INTO episodic_memory 
-            (timestamp, drone_id, action_type, state_json, outcome_text, embedding, is_poisoned)
-            VALUES (datetime('now'), ?, ?, ?, ?, ?, ?)
-        """, (drone_id, action, json.dumps(state), outcome, emb_blob, is_poisoned))
-        self.conn.commit()
+        if self.batched:
+            # Same format as SQLite datetime('now'), taken at enqueue rather than flush time
+            timestamp = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime())
+            self._enqueue(
+                "episodic_memory",
+                (timestamp, drone_id, action, json.dumps(state), outcome, emb_blob, is_poisoned),
+                embedding,
+            )
+            return
+
+        with self._lock:
+            self.cursor.execute("""
+                INSERT INTO episodic_memory 
+                (timestamp, drone_id, action_type, state_json, outcome_text, embedding, is_poisoned)
+                VALUES (datetime('now'), ?, ?, ?, ?, ?, ?)
+            """, (drone_id, action, json.dumps(state), outcome, emb_blob, is_poisoned))
+            self.conn.commit()
+            self.episode_index.add(self.cursor.lastrowid, embedding)
 
-    def find_similar_episodes(self, query_embedding: List[float], limit: int = 3) -> List[str]:
+    @_read_your_writes
+    def find_similar_episodes(self, query_embedding: List[float], limit: int = 3, **filters) -> List[str]:
         """
-        Naive Vector Search: Loads all embeddings and calculates Cosine Similarity.
-        (Sufficient for <10k rows in a PhD prototype).
+        Vector Search: cosine similarity against the in-memory episode index.
+        One mat-vec product + argpartition (or an IVF probe when Config.VECTOR_INDEX="ivf");
+        only the top-k rows are read back from SQLite.
+        filters: drone_id, action_type, since, until (datetime / epoch / 'YYYY-MM-DD HH:MM:SS'),
+        include_poisoned=False to drop is_poisoned rows.
         """
-        query_vec = np.array(query_embedding, dtype=np.float32)
+        ranked = self._rank(self.episode_index, "episodic_memory", "outcome_text", query_embedding, limit, filters)
+        return [row[0] for _, row in ranked]
 
-        self.cursor.execute("SELECT outcome_text, embedding FROM episodic_memory")
-        rows = self.cursor.fetchall()
+    @_read_your_writes
+    def find_similar_episodes_with_flags(self, query_embedding: List[float], limit: int = 3, **filters) -> List[Dict[str, Any]]:
+        """Return episodes with poison flag for visibility (count > 1 for a compacted representative)."""
+        ranked = self._rank(
+            self.episode_index, "episodic_memory", "outcome_text, is_poisoned, dup_count", query_embedding, limit, filters
+        )
+        return [
+            {"text": text, "poisoned": bool(poisoned), "score": score, "count": count or 1}
+            for score, (text, poisoned, count) in ranked
+        ]
 
-        results = []
-        for text, blob in rows:
-            if not blob:
-                continue
-            db_vec = np.frombuffer(blob, dtype=np.float32)
+    # ---------- compaction ----------
 
-            # Cosine Similarity
-            similarity = np.dot(query_vec, db_vec) / (np.linalg.norm(query_vec) * np.linalg.norm(db_vec))
-            results.append((similarity, text))
+    def compact_episodes(self, tiers: Optional[List[tuple]] = None, batch: Optional[int] = None) -> Dict[str, Any]:
+        """
+        One incremental compaction step over episodic_memory.
 
-        # Sort by similarity desc
-        results.sort(key=lambda x: x[0], reverse=True)
-        return [r[1] for r in results[:limit]]
+        Each retention tier (Config.COMPACTION_TIERS, see core/compaction.py) keeps a watermark
+        id. A step takes up to `batch` rows past it that are old enough for the tier and either
+        drops them, or folds each into a near-duplicate leader (cosine >= the tier's threshold,
+        same drone_id, action_type and is_poisoned). The leader keeps its text and vector and
+        accumulates dup_count and the first_seen/last_seen range; folded rows are deleted and
+        tombstoned in the index, which is rebuilt once tombstones pass COMPACTION_VACUUM_RATIO.
+        Returns counts; "backlog" is True while a tier still has eligible rows queued.
+        """
+        tiers = parse_tiers(Config.COMPACTION_TIERS) if tiers is None else tiers
+        batch = batch or Config.COMPACTION_BATCH
+        report = {"scanned": 0, "folded": 0, "dropped": 0, "reindexed": False, "backlog": False}
+        t0 = time.perf_counter()
+        with self._lock:
+            self._flush_locked()
+            now = time.time()
+            for age, threshold in tiers:
+                key = f"compaction:{int(age)}:{threshold or 'drop'}"
+                row = self.conn.execute("SELECT value FROM memory_maintenance WHERE key = ?", (key,)).fetchone()
+                watermark = row[0] if row else 0
+                rows = self.conn.execute("""
+                    SELECT id, timestamp, drone_id, action_type, is_poisoned, dup_count,
+                           COALESCE(first_seen, timestamp), COALESCE(last_seen, timestamp)
+                    FROM episodic_memory WHERE id > ? ORDER BY id LIMIT ?
+                """, (watermark, batch)).fetchall()
+                # Ids follow insertion time, so the eligible rows are a prefix
+                cutoff = _sql_timestamp(now - age)
+                eligible = []
+                for r in rows:
+                    if r[1] is not None and str(r[1]) > cutoff:
+                        break
+                    eligible.append(r)
+                if not eligible:
+                    continue
+                try:
+                    if threshold is None:
+                        deleted = [r[0] for r in eligible]
+                    else:
+                        deleted = self._fold_episodes(eligible, watermark, threshold)
+                    self.conn.executemany("DELETE FROM episodic_memory WHERE id = ?", [(i,) for i in deleted])
+                    self.conn.execute(
+                        "INSERT OR REPLACE INTO memory_maintenance (key, value) VALUES (?, ?)", (key, eligible[-1][0])
+                    )
+                    self.conn.commit()
+                except Exception:
+                    self.conn.rollback()
+                    raise
+                self.episode_index.remove(deleted)
+                report["backlog"] |= len(eligible) == batch
+                report["scanned"] += len(eligible)
+                report["dropped" if threshold is None else "folded"] += len(deleted)
+            index = self.episode_index
+            if len(index) and index.dead > Config.COMPACTION_VACUUM_RATIO * len(index):
+                self._reindex("episodic_memory")
+                report["reindexed"] = True
+        report["elapsed_ms"] = (time.perf_counter() - t0) * 1000.0
+        return report
 
-    def find_similar_episodes_with_flags(self, query_embedding: List[float], limit: int = 3) -> List[Dict[str, Any]]:
-        """Return episodes with poison flag for visibility."""
-        query_vec = np.array(query_embedding, dtype=np.float32)
-        self.cursor.execute("SELECT outcome_text, embedding, is_poisoned FROM episodic_memory")
-        rows = self.cursor.fetchall()
-        results = []
-        for text, blob, poisoned in rows:
-            if not blob:
+    def _fold_episodes(self, rows: List[tuple], watermark: int, threshold: float) -> List[int]:
+        """Fold rows into leaders, update the leaders' count and time range; returns the folded ids."""
+        groups: Dict[tuple, List[tuple]] = {}
+        for r in rows:
+            groups.setdefault((r[2], r[3], r[4]), []).append(r)
+        folded, updates = [], []
+        for (drone_id, action_type, poisoned), members in groups.items():
+            found, vectors = self.episode_index.vectors_for([m[0] for m in members])
+            members = [m for m, ok in zip(members, found) if ok]
+            if not members:
                 continue
-            db_vec = np.frombuffer(blob, dtype=np.float32)
-            similarity = np.dot(query_vec, db_vec) / (np.linalg.norm(query_vec) * np.linalg.norm(db_vec))
-            results.append((similarity, {"text": text, "poisoned": bool(poisoned)}))
-        results.sort(key=lambda x: x[0], reverse=True)
-        return [r[1] for r in results[:limit]]
+            leaders = self.conn.execute("""
+                SELECT id, dup_count, COALESCE(first_seen, timestamp), COALESCE(last_seen, timestamp)
+                FROM episodic_memory
+                WHERE drone_id IS ? AND action_type IS ? AND is_poisoned IS ? AND id <= ?
+                ORDER BY id
+            """, (drone_id, action_type, poisoned, watermark)).fetchall()
+            lead_found, lead_vectors = self.episode_index.vectors_for([l[0] for l in leaders])
+            # slot: [id, count, first_seen, last_seen, changed]
+            slots = [[l[0], l[1] or 1, l[2], l[3], False] for l, ok in zip(leaders, lead_found) if ok]
+            for m, target in zip(members, fold_group(vectors, lead_vectors, threshold).tolist()):
+                if target == len(slots):
+                    slots.append([m[0], m[5] or 1, m[6], m[7], False])
+                    continue
+                slot = slots[target]
+                slot[1] += m[5] or 1
+                slot[2] = min((str(t) for t in (slot[2], m[6]) if t is not None), default=None)
+                slot[3] = max((str(t) for t in (slot[3], m[7]) if t is not None), default=None)
+                slot[4] = True
+                folded.append(m[0])
+            updates += [(count, first, last, row_id) for row_id, count, first, last, changed in slots if changed]
+        self.conn.executemany(
+            "UPDATE episodic_memory SET dup_count = ?, first_seen = ?, last_seen = ? WHERE id = ?", updates
+        )
+        return folded
 
     def insert_rule(self, rule_text: str, rule_type: str, location: Dict, confidence: float, embedding: List[float], is_poisoned: int = 0):
         emb_blob = np.array(embedding, dtype=np.float32).tobytes()
-        self.cursor.execute("""
-            INSERT INTO semantic_rules
-            (rule_text, rule_type, location_json, confidence, embedding, is_poisoned)
-            VALUES (?, ?, ?, ?, ?, ?)
-        """, (rule_text, rule_type, json.dumps(location), confidence, emb_blob, is_poisoned))
-        self.conn.commit()
+        lat, lon, radius_m = self._rule_geometry(location)
+        if self.batched:
+            self._enqueue(
+                "semantic_rules",
+                (rule_text, rule_type, json.dumps(location), confidence, emb_blob, is_poisoned, lat, lon, radius_m),
+                embedding,
+            )
+            return
+
+        with self._lock:
+            self.cursor.execute("""
+                INSERT INTO semantic_rules
+                (rule_text, rule_type, location_json, confidence, embedding, is_poisoned, lat, lon, radius_m)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (rule_text, rule_type, json.dumps(location), confidence, emb_blob, is_poisoned, lat, lon, radius_m))
+            row_id = self.cursor.lastrowid
+            if lat is not None:
+                self._insert_rule_bbox(self.cursor, row_id, lat, lon, radius_m)
+            self.conn.commit()
+            self.rule_index.add(row_id, embedding)
+
+    @_read_your_writes
+    def find_similar_rules(self, query_embedding: List[float], limit: int = 3, **filters) -> List[str]:
+        """filters: rule_type, include_poisoned=False to drop is_poisoned rules."""
+        ranked = self._rank(self.rule_index, "semantic_rules", "rule_text", query_embedding, limit, filters)
+        return [row[0] for _, row in ranked]
+
+    @_read_your_writes
+    def find_similar_rules_with_flags(self, query_embedding: List[float], limit: int = 3, **filters) -> List[Dict[str, Any]]:
+        ranked = self._rank(
+            self.rule_index, "semantic_rules", "rule_text, rule_type, location_json, is_poisoned",
+            query_embedding, limit, filters,
+        )
+        return [
+            {
+                "text": text,
+                "rule_type": rule_type,
+                "location": loc_json,
+                "poisoned": bool(poisoned),
+                "score": score,
+            }
+            for score, (text, rule_type, loc_json, poisoned) in ranked
+        ]
+
+    @_read_your_writes
+    def hazards_for_targets(
+        self, targets: List[tuple], rule_type: Optional[str] = "HAZARD", margin_m: float = 0.0
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Rules whose circle (lat, lon, radius_m) contains each target, grown by margin_m.
+        The R*Tree narrows candidates to the targets' bounding box, then one vectorised
+        haversine pass checks every target against every candidate.
+        Returns one list of hits per target, nearest first.
+        """
+        if not targets:
+            return []
+        t_lat = np.array([t[0] for t in targets], dtype=np.float64)
+        t_lon = np.array([t[1] for t in targets], dtype=np.float64)
+        min_lat, _, min_lon, _ = bounding_box(float(t_lat.min()), float(t_lon.min()), margin_m)
+        _, max_lat, _, max_lon = bounding_box(float(t_lat.max()), float(t_lon.max()), margin_m)
+
+        sql = """
+            SELECT r.id, r.rule_text, r.rule_type, r.lat, r.lon, r.radius_m, r.confidence, r.is_poisoned
+            FROM semantic_rules_rtree b JOIN semantic_rules r ON r.id = b.id
+            WHERE b.max_lat >= ? AND b.min_lat <= ? AND b.max_lon >= ? AND b.min_lon <= ?
+        """
+        params: List[Any] = [min_lat, max_lat, min_lon, max_lon]
+        if rule_type is not None:
+            sql += " AND r.rule_type = ?"
+            params.append(rule_type)
+        cur = self._read_cursor()
+        rows = cur.execute(sql, params).fetchall()
+        if not rows:
+            return [[] for _ in targets]
+
+        h_lat = np.array([r[3] for r in rows], dtype=np.float64)
+        h_lon = np.array([r[4] for r in rows], dtype=np.float64)
+        h_radius = np.array([r[5] for r in rows], dtype=np.float64)
+        dist = haversine_m(t_lat[:, None], t_lon[:, None], h_lat[None, :], h_lon[None, :])
+        inside = dist <= h_radius[None, :] + margin_m
 
-    def find_similar_rules(self, query_embedding: List[float], limit: int = 3) -> List[str]:
-        query_vec = np.array(query_embedding, dtype=np.float32)
-        self.cursor.execute("SELECT rule_text, embedding FROM semantic_rules")
-        rows = self.cursor.fetchall()
-        results = []
-        for text, blob in rows:
-            if not blob:
-                continue
-            db_vec = np.frombuffer(blob, dtype=np.float32)
-            similarity = np.dot(query_vec, db_vec) / (np.linalg.norm(query_vec) * np.linalg.norm(db_vec))
-            results.append((similarity, text))
-        results.sort(key=lambda x: x[0], reverse=True)
-        return [r[1] for r in results[:limit]]
-
-    def find_similar_rules_with_flags(self, query_embedding: List[float], limit: int = 3) -> List[Dict[str, Any]]:
-        query_vec = np.array(query_embedding, dtype=np.float32)
-        self.cursor.execute("SELECT rule_text, rule_type, location_json, embedding, is_poisoned FROM semantic_rules")
-        rows = self.cursor.fetchall()
         results = []
-        for text, rule_type, loc_json, blob, poisoned in rows:
-            if not blob:
-                continue
-            db_vec = np.frombuffer(blob, dtype=np.float32)
-            similarity = np.dot(query_vec, db_vec) / (np.linalg.norm(query_vec) * np.linalg.norm(db_vec))
-            results.append(
-                (
-                    similarity,
-                    {
-                        "text": text,
-                        "rule_type": rule_type,
-                        "location": loc_json,
-                        "poisoned": bool(poisoned),
-                    },
-                )
-            )
-        results.sort(key=lambda x: x[0], reverse=True)
-        return [r[1] for r in results[:limit]]
+        for t in range(len(targets)):
+            hits = np.flatnonzero(inside[t])
+            hits = hits[np.argsort(dist[t, hits], kind="stable")]
+            results.append([
+                {
+                    "id": rows[h][0],
+                    "text": rows[h][1],
+                    "rule_type": rows[h][2],
+                    "lat": rows[h][3],
+                    "lon": rows[h][4],
+                    "radius_m": rows[h][5],
+                    "confidence": rows[h][6],
+                    "poisoned": bool(rows[h][7]),
+                    "distance_m": float(dist[t, h]),
+                }
+                for h in hits
+            ])
+        return results
+
+    def find_rules_near(self, lat: float, lon: float, radius_m: float = 0.0, rule_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Rules covering the point (lat, lon), or within radius_m of their area, nearest first."""
+        return self.hazards_for_targets([(lat, lon)], rule_type=rule_type, margin_m=radius_m)[0]
 
+    @_read_your_writes
     def count_episodes(self) -> int:
-        self.cursor.execute("SELECT COUNT(*) FROM episodic_memory")
-        row = self.cursor.fetchone()
+        cur = self._read_cursor()
+        cur.execute("SELECT COUNT(*) FROM episodic_memory")
+        row = cur.fetchone()
         return row[0] if row else 0
 
+    @_read_your_writes
     def count_poisoned(self) -> int:
-        self.cursor.execute("SELECT COUNT(*) FROM episodic_memory WHERE is_poisoned=1")
-        row = self.cursor.fetchone()
+        cur = self._read_cursor()
+        cur.execute("SELECT COUNT(*) FROM episodic_memory WHERE is_poisoned=1")
+        row = cur.fetchone()
         return row[0] if row else 0
 
+    @_read_your_writes
     def count_rules(self) -> int:
-        self.cursor.execute("SELECT COUNT(*) FROM semantic_rules")
-        row = self.cursor.fetchone()
+        cur = self._read_cursor()
+        cur.execute("SELECT COUNT(*) FROM semantic_rules")
+        row = cur.fetchone()
         return row[0] if row else 0
 
+    @_read_your_writes
     def count_poisoned_rules(self) -> int:
-        self.cursor.execute("SELECT COUNT(*) FROM semantic_rules WHERE is_poisoned=1")
-        row = self.cursor.fetchone()
+        cur = self._read_cursor()
+        cur.execute("SELECT COUNT(*) FROM semantic_rules WHERE is_poisoned=1")
+        row = cur.fetchone()
         return row[0] if row else 0
 
+    @_read_your_writes
     def recent_episodes(self, limit: int = 5) -> List[Dict[str, Any]]:
-        self.cursor.execute("""
+        cur = self._read_cursor()
+        cur.execute("""
             SELECT id, timestamp, drone_id, action_type, outcome_text, is_poisoned
             FROM episodic_memory
             ORDER BY id DESC
             LIMIT ?
         """, (limit,))
-        rows = self.cursor.fetchall()
+        rows = cur.fetchall()
         return [
             {
                 "id": r[0],
@@ -183,14 +820,16 @@ class DatabaseManager:
             for r in rows
         ]
 
+    @_read_your_writes
     def recent_rules(self, limit: int = 5) -> List[Dict[str, Any]]:
-        self.cursor.execute("""
+        cur = self._read_cursor()
+        cur.execute("""
             SELECT id, rule_type, rule_text, location_json, confidence, is_poisoned
             FROM semantic_rules
             ORDER BY id DESC
             LIMIT ?
         """, (limit,))
-        rows = self.cursor.fetchall()
+        rows = cur.fetchall()
         return [
             {
                 "id": r[0],
@@ -0,0 +1,141 @@
+import asyncio
+from typing import Dict, List, Optional, Tuple
+from core.logger import log
+
+
+class EmbeddingBatcher:
+    """
+    Micro-batches concurrent embedding calls into list-input requests.
+
+    `create` is an embeddings.create-style coroutine function (e.g. ClientManager.embeddings).
+    embed(text) enqueues onto a bounded queue (callers wait when it is full). A collector
+    task takes the first waiting item and, while another batch is already on the wire,
+    keeps gathering for up to `max_wait` seconds or `max_batch` items before sending one
+    `embeddings.create(input=[...])`; when the line is idle it sends whatever is queued
+    at once, so a lone caller pays no batching delay. Up to `max_inflight` batches can be
+    on the wire at once. Identical texts in a batch share one input slot.
+    If a batch request fails, its items are retried one by one so a single bad input only
+    fails its own caller.
+    """
+
+    def __init__(
+        self,
+        create,
+        model: str,
+        max_batch: int = 32,
+        max_wait: float = 0.005,
+        max_queue: int = 1024,
+        max_inflight: int = 4,
+    ):
+        self.create = create
+        self.model = model
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.max_queue = max_queue
+        self._inflight = asyncio.Semaphore(max_inflight)
+        self._queue: Optional[asyncio.Queue] = None
+        self._collector: Optional[asyncio.Task] = None
+        self._sending: set = set()
+        self.requests = 0  # HTTP requests sent
+        self.items = 0  # texts embedded through them
+
+    async def embed(self, text: str) -> List[float]:
+        """Vector for `text`; raises if this item could not be embedded."""
+        if self._collector is None:
+            # Created lazily so the queue and task belong to the running loop
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+            self._collector = asyncio.create_task(self._collect())
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((text, future))
+        return await future
+
+    async def _collect(self):
+        loop = asyncio.get_running_loop()
+        batch: List[Tuple[str, asyncio.Future]] = []
+        try:
+            while True:
+                batch.append(await self._queue.get())
+                while len(batch) < self.max_batch and not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                # Idle: nothing to amortise against, so don't wait for company
+                deadline = loop.time() + (self.max_wait if self._sending else 0.0)
+                while len(batch) < self.max_batch:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                    except asyncio.TimeoutError:
+                        break
+                await self._inflight.acquire()
+                task = asyncio.create_task(self._send(batch))
+                self._sending.add(task)
+                task.add_done_callback(self._sending.discard)
+                batch = []
+        except asyncio.CancelledError:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(RuntimeError("EmbeddingBatcher closed"))
+            raise
+
+    async def _request(self, texts: List[str]) -> List[List[float]]:
+        self.requests += 1
+        resp = await self.create(input=texts, model=self.model)
+        vectors: List[Optional[List[float]]] = [None] * len(texts)
+        for position, item in enumerate(resp.data):
+            index = getattr(item, "index", position)
+            if 0 <= index < len(texts):
+                vectors[index] = item.embedding
+        if any(v is None for v in vectors):
+            raise ValueError(f"Embedding response covered {sum(v is not None for v in vectors)}/{len(texts)} inputs")
+        self.items += len(texts)
+        return vectors
+
+    async def _send(self, batch: List[Tuple[str, asyncio.Future]]):
+        try:
+            waiting: Dict[str, List[asyncio.Future]] = {}
+            for text, future in batch:
+                if not future.cancelled():
+                    waiting.setdefault(text, []).append(future)
+            if not waiting:
+                return
+            texts = list(waiting)
+            try:
+                results = list(zip(texts, await self._request(texts)))
+            except Exception as e:
+                if len(texts) == 1:
+                    results = [(texts[0], e)]
+                else:
+                    log.error(f"[Embed] Batch of {len(texts)} failed ({e}); retrying items individually")
+                    singles = await asyncio.gather(*(self._request([t]) for t in texts), return_exceptions=True)
+                    results = [
+                        (text, single if isinstance(single, Exception) else single[0])
+                        for text, single in zip(texts, singles)
+                    ]
+            for text, outcome in results:
+                for future in waiting[text]:
+                    if future.done():
+                        continue
+                    if isinstance(outcome, Exception):
+                        future.set_exception(outcome)
+                    else:
+                        future.set_result(outcome)
+        finally:
+            self._inflight.release()
+
+    async def close(self):
+        """Stop collecting, wait for batches on the wire, and fail anything still queued."""
+        if self._collector is None:
+            return
+        self._collector.cancel()
+        try:
+            await self._collector
+        except asyncio.CancelledError:
+            pass
+        if self._sending:
+            await asyncio.gather(*self._sending, return_exceptions=True)
+        while not self._queue.empty():
+            _, future = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("EmbeddingBatcher closed"))
+        self._collector = None
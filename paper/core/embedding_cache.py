@@ -0,0 +1,115 @@
+import hashlib
+import sqlite3
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, List, Optional
+import numpy as np
+
+
+class EmbeddingCache:
+    """
+    Content-addressed embedding cache: key = sha256(model, normalised text).
+
+    Two tiers: an in-process LRU of `capacity` vectors, and an optional SQLite file
+    (`path`, "" = memory only) that survives across runs, so repeat missions and
+    experiment sweeps reuse embeddings from earlier ones. Only real embeddings are
+    stored; empty, non-finite and all-zero vectors (the failure fallback) are refused.
+    """
+
+    def __init__(self, path: str = "", capacity: int = 4096):
+        self.path = path
+        self.capacity = capacity
+        self._lru: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()  # the SQLite tier is used from worker threads
+        self.hits_memory = 0
+        self.hits_disk = 0
+        self.misses = 0
+        self.stores = 0
+        self.conn: Optional[sqlite3.Connection] = None
+        if path:
+            self.conn = sqlite3.connect(path, check_same_thread=False)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS embedding_cache (
+                    key TEXT PRIMARY KEY,
+                    model TEXT,
+                    dim INTEGER,
+                    vector BLOB
+                )
+            """)
+            self.conn.commit()
+
+    @property
+    def persistent(self) -> bool:
+        return self.conn is not None
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """NFC, trimmed, runs of whitespace collapsed to one space (case is kept: it changes embeddings)."""
+        return " ".join(unicodedata.normalize("NFC", text).split())
+
+    @classmethod
+    def key(cls, model: str, text: str) -> str:
+        return hashlib.sha256(f"{model}\0{cls.normalize(text)}".encode("utf-8")).hexdigest()
+
+    def _remember(self, key: str, vector: List[float]):
+        self._lru[key] = vector
+        self._lru.move_to_end(key)
+        if len(self._lru) > self.capacity:
+            self._lru.popitem(last=False)
+
+    def get(self, key: str, disk: bool = True) -> Optional[List[float]]:
+        """Cached vector or None. disk=False checks only the in-process tier (never blocks on I/O)."""
+        with self._lock:
+            vector = self._lru.get(key)
+            if vector is not None:
+                self._lru.move_to_end(key)
+                self.hits_memory += 1
+                return vector
+            if self.conn is None:
+                self.misses += 1
+                return None
+            if not disk:
+                return None  # the caller follows up with a disk lookup off the event loop
+            row = self.conn.execute("SELECT vector FROM embedding_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            vector = np.frombuffer(row[0], dtype=np.float32).tolist()
+            self.hits_disk += 1
+            self._remember(key, vector)
+            return vector
+
+    def put(self, key: str, model: str, vector: List[float]) -> bool:
+        """Store a successful embedding. Returns False (and stores nothing) for failure-looking vectors."""
+        arr = np.asarray(vector, dtype=np.float32)
+        if arr.ndim != 1 or arr.shape[0] == 0 or not np.all(np.isfinite(arr)) or not np.any(arr):
+            return False
+        with self._lock:
+            self._remember(key, list(vector))
+            if self.conn is not None:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO embedding_cache (key, model, dim, vector) VALUES (?, ?, ?, ?)",
+                    (key, model, arr.shape[0], arr.tobytes()),
+                )
+                self.conn.commit()
+            self.stores += 1
+        return True
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits_memory + self.hits_disk + self.misses
+        return {
+            "hits_memory": self.hits_memory,
+            "hits_disk": self.hits_disk,
+            "misses": self.misses,
+            "stores": self.stores,
+            "hit_rate": (self.hits_memory + self.hits_disk) / lookups if lookups else 0.0,
+        }
+
+    def close(self):
+        with self._lock:
+            if self.conn is not None:
+                self.conn.close()
+                self.conn = None
@@ -0,0 +1,135 @@
+import os
+import struct
+import numpy as np
+from typing import Optional
+
+MAGIC = b"EMB1"
+HEADER = struct.Struct("<4sI8x")  # magic, dim, reserved -> 16 bytes
+ROW_DTYPE = np.dtype([("id", "<i8"), ("valid", "u1")])
+
+
+class EmbeddingStore:
+    """
+    Append-only, memory-mapped sidecar for one memory table.
+
+    Two files live next to the SQLite database:
+      <db>-<table>.vec : 16-byte header (magic, dim) + normalised float32 rows
+      <db>-<table>.ids : one (row id, valid) record per vector row
+    The SQLite BLOB stays the source of truth; this file only exists so search can
+    run on np.memmap without copying or deserialising anything at startup.
+    Same interface as core.vector_index.ArrayStore.
+    """
+
+    def __init__(self, db_path: str, table: str):
+        self.table = table
+        self.vec_path = f"{db_path}-{table}.vec"
+        self.ids_path = f"{db_path}-{table}.ids"
+        self.dim: Optional[int] = None
+        self._size = 0
+        self._mapped = -1  # row count the current memmaps were opened with
+        self._vectors = None
+        self._rows = None
+        self._open()
+
+    # ---------- file handling ----------
+
+    def _open(self):
+        if os.path.exists(self.vec_path) and os.path.getsize(self.vec_path) >= HEADER.size:
+            with open(self.vec_path, "rb") as f:
+                magic, dim = HEADER.unpack(f.read(HEADER.size))
+            if magic != MAGIC:
+                raise ValueError(f"{self.vec_path} is not an embedding sidecar file")
+            self.dim = dim
+            # A crash between the two appends can leave a partial row; keep only complete ones
+            vec_rows = (os.path.getsize(self.vec_path) - HEADER.size) // (4 * dim)
+            id_rows = os.path.getsize(self.ids_path) // ROW_DTYPE.itemsize if os.path.exists(self.ids_path) else 0
+            self._size = min(vec_rows, id_rows)
+            self._truncate(self._size)
+        else:
+            # Missing or torn header: start both files from scratch
+            for path in (self.vec_path, self.ids_path):
+                open(path, "wb").close()
+            self.dim = None
+            self._size = 0
+        self._vec_file = open(self.vec_path, "ab")
+        self._ids_file = open(self.ids_path, "ab")
+
+    def _truncate(self, rows: int):
+        if self.dim is not None:
+            with open(self.vec_path, "r+b") as f:
+                f.truncate(HEADER.size + rows * 4 * self.dim)
+        if os.path.exists(self.ids_path):
+            with open(self.ids_path, "r+b") as f:
+                f.truncate(rows * ROW_DTYPE.itemsize)
+
+    def _remap(self):
+        if self._mapped == self._size:
+            return
+        if self._size == 0:
+            self._vectors = np.empty((0, self.dim or 0), dtype=np.float32)
+            self._rows = np.empty(0, dtype=ROW_DTYPE)
+        else:
+            self._vectors = np.memmap(
+                self.vec_path, dtype=np.float32, mode="r", offset=HEADER.size, shape=(self._size, self.dim)
+            )
+            self._rows = np.memmap(self.ids_path, dtype=ROW_DTYPE, mode="r", shape=(self._size,))
+        self._mapped = self._size
+
+    def close(self):
+        self._vectors = self._rows = None
+        self._mapped = -1
+        self._vec_file.close()
+        self._ids_file.close()
+
+    def reset(self):
+        """Drop all rows (used before a full rebuild from SQLite)."""
+        self.close()
+        for path in (self.vec_path, self.ids_path):
+            if os.path.exists(path):
+                os.remove(path)
+        self._open()
+
+    # ---------- ArrayStore interface ----------
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def vectors(self) -> np.ndarray:
+        self._remap()
+        return self._vectors
+
+    @property
+    def ids(self) -> np.ndarray:
+        self._remap()
+        return self._rows["id"]
+
+    @property
+    def valid(self) -> np.ndarray:
+        self._remap()
+        return self._rows["valid"].view(bool)
+
+    def invalidate(self, positions: np.ndarray):
+        """Clear the valid flag of rows whose table row was deleted (in place, no rewrite)."""
+        if not positions.shape[0]:
+            return
+        self._ids_file.flush()
+        rows = np.memmap(self.ids_path, dtype=ROW_DTYPE, mode="r+", shape=(self._size,))
+        rows["valid"][positions] = 0
+        rows.flush()
+        del rows
+        self._mapped = -1  # re-open the read-only maps so they see the new flags
+
+    def append(self, row_ids: np.ndarray, normed: np.ndarray, valid: np.ndarray):
+        if self.dim is None:
+            self.dim = normed.shape[1]
+            self._vec_file.write(HEADER.pack(MAGIC, self.dim))
+        rows = np.empty(normed.shape[0], dtype=ROW_DTYPE)
+        rows["id"] = row_ids
+        rows["valid"] = valid
+        # Vectors first, ids second: an id record is only present for a complete vector
+        self._vec_file.write(np.ascontiguousarray(normed, dtype=np.float32).tobytes())
+        self._vec_file.flush()
+        self._ids_file.write(rows.tobytes())
+        self._ids_file.flush()
+        self._size += normed.shape[0]
@@ -0,0 +1,138 @@
+import re
+import zlib
+from abc import ABC, abstractmethod
+from collections import Counter
+from typing import List, Optional, Sequence
+import numpy as np
+from config import Config
+from core.embedding_batcher import EmbeddingBatcher
+from core.llm_client import get_client_manager
+from core.logger import log
+
+DEFAULT_EMBEDDING_DIM = 768  # nomic-embed-text; used only when nothing else tells us the dimension
+
+
+class EmbeddingDimensionError(ValueError):
+    """A vector's length does not match the dimension the provider (or the memory DB) uses."""
+
+
+class EmbeddingProvider(ABC):
+    """
+    Source of text embeddings for MemoryInterface.
+
+    `name` identifies the model (it is part of the embedding-cache key), `dim` is the vector
+    length: fixed for local backends, detected from the first response for remote ones and
+    enforced from then on.
+    """
+
+    name: str = "base"
+
+    def __init__(self, dim: Optional[int] = None):
+        self.dim = dim
+
+    @abstractmethod
+    async def _embed_many(self, texts: Sequence[str]) -> List[List[float]]:
+        """Backend call; one vector per text, in order."""
+
+    def _check(self, vectors: List[List[float]]) -> List[List[float]]:
+        for vector in vectors:
+            if self.dim is None:
+                self.dim = len(vector)
+                log.info(f"[Embed] {self.name}: detected dimension {self.dim}")
+            elif len(vector) != self.dim:
+                raise EmbeddingDimensionError(f"{self.name} returned dim {len(vector)}, expected {self.dim}")
+        return vectors
+
+    async def embed_many(self, texts: Sequence[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        return self._check(await self._embed_many(texts))
+
+    async def embed(self, text: str) -> List[float]:
+        return (await self.embed_many([text]))[0]
+
+    async def close(self):
+        pass
+
+
+class RemoteEmbeddingProvider(EmbeddingProvider):
+    """OpenAI-compatible /embeddings endpoint via the shared ClientManager; single calls are micro-batched."""
+
+    def __init__(self, manager, model: str, dim: Optional[int] = None):
+        super().__init__(dim)
+        self.name = model  # plain model name, so cache entries from earlier runs stay valid
+        self.manager = manager
+        self.batcher = EmbeddingBatcher(
+            manager.embeddings,
+            model,
+            max_batch=Config.EMBED_BATCH_SIZE,
+            max_wait=Config.EMBED_BATCH_WAIT_MS / 1000.0,
+            max_queue=Config.EMBED_QUEUE_SIZE,
+        )
+
+    async def _embed_many(self, texts: Sequence[str]) -> List[List[float]]:
+        resp = await self.manager.embeddings(input=list(texts), model=self.name)
+        vectors: List[Optional[List[float]]] = [None] * len(texts)
+        for position, item in enumerate(resp.data):
+            vectors[getattr(item, "index", position)] = item.embedding
+        if any(v is None for v in vectors):
+            raise ValueError(f"Embedding response covered {sum(v is not None for v in vectors)}/{len(texts)} inputs")
+        return vectors
+
+    async def embed(self, text: str) -> List[float]:
+        return self._check([await self.batcher.embed(text)])[0]
+
+    async def close(self):
+        await self.batcher.close()
+
+
+class HashingEmbedder(EmbeddingProvider):
+    """
+    In-process embedder: word unigrams/bigrams and character 3-5-grams, sublinear TF,
+    signed feature hashing into `dim` buckets (a random projection of the sparse TF
+    vector), L2-normalised. No model, no network, ~0.1 ms per short text; similar
+    wording gives similar vectors, which is what the memory lookups and benchmarks need.
+    """
+
+    _WORD = re.compile(r"\w+")
+
+    def __init__(self, dim: int = DEFAULT_EMBEDDING_DIM, ngram_range: tuple = (3, 5)):
+        super().__init__(dim)
+        self.name = f"local-hash-{dim}"
+        self.ngram_range = ngram_range
+
+    def _features(self, text: str) -> Counter:
+        text = " ".join(text.lower().split())
+        words = self._WORD.findall(text)
+        features = Counter(f"w:{w}" for w in words)
+        features.update(f"b:{a} {b}" for a, b in zip(words, words[1:]))
+        padded = f" {text} "
+        lo, hi = self.ngram_range
+        for n in range(lo, hi + 1):
+            features.update(f"c:{padded[i:i + n]}" for i in range(len(padded) - n + 1))
+        return features
+
+    def vectorize(self, text: str) -> np.ndarray:
+        features = self._features(text)
+        if not features:
+            return np.zeros(self.dim, dtype=np.float32)
+        hashes = np.fromiter((zlib.crc32(f.encode("utf-8")) for f in features), dtype=np.uint64, count=len(features))
+        weights = np.log1p(np.fromiter(features.values(), dtype=np.float32, count=len(features)))
+        signs = np.where((hashes >> np.uint64(31)) & np.uint64(1), -1.0, 1.0)
+        vector = np.bincount((hashes % np.uint64(self.dim)).astype(np.int64), weights=signs * weights, minlength=self.dim)
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm > 0 else vector).astype(np.float32)
+
+    async def _embed_many(self, texts: Sequence[str]) -> List[List[float]]:
+        return [self.vectorize(text).tolist() for text in texts]
+
+
+def make_provider(
+    kind: str = Config.EMBEDDING_PROVIDER, model: str = Config.EMBEDDING_MODEL, dim: int = Config.EMBEDDING_DIM
+) -> EmbeddingProvider:
+    """Provider from Config.EMBEDDING_PROVIDER: "remote" (OpenAI-compatible server) or "local" (HashingEmbedder)."""
+    if kind == "local":
+        return HashingEmbedder(dim=dim or DEFAULT_EMBEDDING_DIM)
+    if kind != "remote":
+        log.error(f"Unknown EMBEDDING_PROVIDER '{kind}', using remote")
+    return RemoteEmbeddingProvider(get_client_manager(), model, dim=dim or None)
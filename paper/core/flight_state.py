@@ -0,0 +1,113 @@
+import asyncio
+import time
+from typing import Dict, List
+from config import Config
+from core.logger import log
+
+DISARMED, ARMED, AIRBORNE, LANDING = "disarmed", "armed", "airborne", "landing"
+
+
+class FlightStateMachine:
+    """
+    A drone's flight state (disarmed -> armed -> airborne -> landing -> disarmed), so a task only
+    runs the steps it still needs: a move on an airborne drone goes straight to its goto, an
+    altitude change is a direct climb, and a drone that is already armed isn't re-armed.
+
+    Preconditions come from the drone's cached telemetry (DroneInterface.telemetry: "armed",
+    "in_air", "position"); sync() re-derives the state from it before every transition, so a
+    state the autopilot changed on its own (auto-disarm after landing, a failed takeoff) is
+    picked up. Transitions are serialised per drone and timed: stats() has count and mean ms per
+    "from->to" edge, plus the steps skipped because they were already satisfied.
+
+    `drone_hw` is a DroneInterface or anything with the same arm / takeoff / change_altitude /
+    wait_landed / land coroutines and a `telemetry` TelemetryHub.
+    """
+
+    def __init__(self, drone_hw, alt_tolerance: float = Config.FLIGHT_ALT_TOLERANCE_M, attempts: int = 2):
+        self.drone_hw = drone_hw
+        self.drone_id = drone_hw.drone_id
+        self.alt_tolerance = alt_tolerance
+        self.attempts = attempts
+        self.state = DISARMED
+        self.skipped = 0
+        self._timings: Dict[str, List[float]] = {}
+        self._lock = asyncio.Lock()
+
+    @property
+    def airborne(self) -> bool:
+        return self.state == AIRBORNE
+
+    def sync(self) -> str:
+        """Re-derive the state from cached telemetry (unchanged while a topic has no value yet)."""
+        armed = self.drone_hw.telemetry.latest("armed")
+        in_air = self.drone_hw.telemetry.latest("in_air")
+        if armed is None or in_air is None:
+            return self.state
+        if in_air:
+            # Still descending after land(): stays LANDING until the autopilot reports the ground
+            self.state = LANDING if self.state == LANDING else AIRBORNE
+        else:
+            self.state = ARMED if armed else DISARMED
+        return self.state
+
+    async def _step(self, target, action):
+        """Await `action` and move to `target` (None = whatever telemetry says afterwards), timing the edge."""
+        source, start = self.state, time.perf_counter()
+        result = await action
+        self.state = target if target is not None else self.sync()
+        self._timings.setdefault(f"{source}->{self.state}", []).append((time.perf_counter() - start) * 1000.0)
+        return result
+
+    async def ensure_airborne(self, altitude: float, adjust: bool = True) -> str:
+        """
+        Get the drone flying, running only the missing steps. An airborne drone more than
+        `alt_tolerance` off `altitude` climbs/descends to it when `adjust` is set (moves), and
+        stays where it is otherwise (scans). Retried once from whatever state the failure left.
+        """
+        async with self._lock:
+            for attempt in range(1, self.attempts + 1):
+                try:
+                    return await self._ensure_airborne(altitude, adjust)
+                except Exception as e:
+                    log.error(f"[Drone {self.drone_id}] Takeoff attempt {attempt} failed in state {self.sync()}: {e}")
+                    if attempt == self.attempts:
+                        raise
+                    log.info(f"[Drone {self.drone_id}] Retrying takeoff...")
+                    await asyncio.sleep(1.0)
+
+    async def _ensure_airborne(self, altitude: float, adjust: bool) -> str:
+        self.sync()
+        if self.state == LANDING:
+            # On the ground again: armed or (after PX4's auto-disarm) disarmed
+            await self._step(None, self.drone_hw.wait_landed())
+        if self.state == DISARMED:
+            await self._step(ARMED, self.drone_hw.arm())
+        elif self.state == ARMED:
+            self.skipped += 1
+        if self.state == ARMED:
+            await self._step(AIRBORNE, self.drone_hw.takeoff(altitude))
+            return f"Drone {self.drone_id} airborne at {altitude}m"
+        position = self.drone_hw.telemetry.latest("position")
+        if adjust and position is not None and abs(position.relative_altitude_m - altitude) > self.alt_tolerance:
+            await self._step(AIRBORNE, self.drone_hw.change_altitude(altitude, self.alt_tolerance))
+            return f"Drone {self.drone_id} at {altitude}m"
+        self.skipped += 1
+        return f"Drone {self.drone_id} already airborne"
+
+    async def land(self) -> str:
+        """Start landing (returns at once, like DroneInterface.land); a grounded drone is left alone."""
+        async with self._lock:
+            if self.sync() in (DISARMED, ARMED):
+                self.skipped += 1
+                return f"Drone {self.drone_id} already on the ground"
+            if self.state == LANDING:
+                self.skipped += 1
+                return "Landing initiated"
+            return await self._step(LANDING, self.drone_hw.land())
+
+    def stats(self) -> Dict[str, dict]:
+        """Per transition: count, mean and total ms."""
+        return {
+            edge: {"count": len(ms), "mean_ms": sum(ms) / len(ms), "total_ms": sum(ms)}
+            for edge, ms in self._timings.items()
+        }
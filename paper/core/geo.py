@@ -0,0 +1,60 @@
+import json
+import math
+import re
+import numpy as np
+from typing import Dict, Iterable, List, Optional, Tuple
+
+EARTH_RADIUS_M = 6371008.8
+METERS_PER_DEG_LAT = 111320.0
+_COORD = re.compile(r"[-+]?\d+\.\d+")
+
+
+def haversine_m(lat1, lon1, lat2, lon2) -> np.ndarray:
+    """
+    Great-circle distance in metres. Inputs broadcast like NumPy arrays, so
+    haversine_m(t_lat[:, None], t_lon[:, None], h_lat[None, :], h_lon[None, :])
+    gives the full targets x hazards distance matrix in one pass.
+    """
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=np.float64)) for v in (lat1, lon1, lat2, lon2))
+    dlat = lat2 - lat1
+    dlon = lon2 - lon1
+    a = np.sin(dlat / 2.0) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2.0) ** 2
+    return 2.0 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def bounding_box(lat: float, lon: float, radius_m: float) -> Tuple[float, float, float, float]:
+    """(min_lat, max_lat, min_lon, max_lon) of a circle, slightly generous near the poles."""
+    dlat = radius_m / METERS_PER_DEG_LAT
+    dlon = radius_m / (METERS_PER_DEG_LAT * max(math.cos(math.radians(lat)), 1e-6))
+    return lat - dlat, lat + dlat, lon - dlon, lon + dlon
+
+
+def parse_location(location) -> Optional[Tuple[float, float, Optional[float]]]:
+    """(lat, lon, radius) from a rule's location dict / JSON text, or None if it has no coordinates."""
+    if isinstance(location, str):
+        try:
+            location = json.loads(location)
+        except ValueError:
+            return None
+    if not isinstance(location, dict):
+        return None
+    try:
+        lat, lon = float(location["lat"]), float(location["lon"])
+    except (KeyError, TypeError, ValueError):
+        return None
+    radius = location.get("radius")
+    return lat, lon, float(radius) if radius is not None else None
+
+
+def mission_targets(text: str) -> List[Tuple[float, float]]:
+    """(lat, lon) pairs in the order they appear in a mission (decimal numbers, two at a time)."""
+    nums = [float(n) for n in _COORD.findall(text)]
+    return list(zip(nums[0::2], nums[1::2]))
+
+
+def drone_targets(text: str, drone_ids: Iterable[int]) -> Dict[int, Tuple[float, float]]:
+    """
+    Each drone's target in a mission: the i-th coordinate pair belongs to the i-th drone of
+    `drone_ids`, in the order given (Config.DRONE_CONFIG order, as the planner uses it).
+    """
+    return dict(zip(drone_ids, mission_targets(text)))
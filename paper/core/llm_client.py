@@ -0,0 +1,248 @@
+import asyncio
+import bisect
+import time
+from typing import Any, AsyncIterator, Dict, Optional
+import httpx
+import openai
+from openai import AsyncOpenAI
+from tenacity import AsyncRetrying, retry_if_exception, stop_after_attempt, wait_random_exponential
+from config import Config
+from core.logger import log
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open-ended
+BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000, 120000)
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram for one endpoint (cheap enough to record every call)."""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.total = 0
+        self.errors = 0
+        self.sum_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, ms: float, ok: bool = True):
+        self.counts[bisect.bisect_left(BUCKETS_MS, ms)] += 1
+        self.total += 1
+        self.errors += 0 if ok else 1
+        self.sum_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def percentile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th percentile, capped at the max observed."""
+        if not self.total:
+            return 0.0
+        rank = q / 100.0 * self.total
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                return min(float(BUCKETS_MS[i]), self.max_ms) if i < len(BUCKETS_MS) else self.max_ms
+        return self.max_ms
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "calls": self.total,
+            "errors": self.errors,
+            "mean_ms": self.sum_ms / self.total if self.total else 0.0,
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "p99_ms": self.percentile(99),
+            "max_ms": self.max_ms,
+        }
+
+
+class AdaptiveLimit:
+    """
+    Concurrency limit that backs off under overload (AIMD): halved on a 429 / 5xx / timeout,
+    raised by one after `limit` consecutive successes, never above `max_limit`.
+    """
+
+    def __init__(self, max_limit: int):
+        self.max_limit = max(1, max_limit)
+        self.limit = self.max_limit
+        self.active = 0
+        self._streak = 0
+        self._cond = asyncio.Condition()
+
+    async def __aenter__(self):
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.active < self.limit)
+            self.active += 1
+
+    async def __aexit__(self, *exc):
+        async with self._cond:
+            self.active -= 1
+            self._cond.notify_all()
+
+    def on_success(self):
+        self._streak += 1
+        if self._streak >= self.limit and self.limit < self.max_limit:
+            self.limit += 1
+            self._streak = 0
+
+    def on_overload(self):
+        self._streak = 0
+        if self.limit > 1:
+            self.limit = max(1, self.limit // 2)
+            log.info(f"[LLM] Backing off: concurrency limit now {self.limit}")
+
+
+def _retryable(exc: BaseException) -> bool:
+    return isinstance(
+        exc, (openai.APITimeoutError, openai.APIConnectionError, openai.RateLimitError, openai.InternalServerError)
+    )
+
+
+def _overloaded(exc: BaseException) -> bool:
+    return isinstance(exc, (openai.APITimeoutError, openai.RateLimitError, openai.InternalServerError))
+
+
+class ClientManager:
+    """
+    One pooled OpenAI-compatible client for the whole process.
+
+    - A single httpx.AsyncClient (bounded pool, keep-alive) under one AsyncOpenAI client.
+    - Separate adaptive concurrency limits for chat and embeddings, so planning never waits
+      behind a burst of memory writes (and vice versa).
+    - tenacity retries with jittered exponential backoff for timeouts, connection errors,
+      429 and 5xx, honouring Retry-After when the server sends one.
+    - A latency histogram per endpoint (stats()).
+    """
+
+    def __init__(
+        self,
+        base_url: str = Config.LLM_API_BASE,
+        api_key: Optional[str] = None,
+        chat_concurrency: int = Config.LLM_CHAT_CONCURRENCY,
+        embed_concurrency: int = Config.LLM_EMBED_CONCURRENCY,
+        max_attempts: int = Config.LLM_MAX_ATTEMPTS,
+        max_connections: int = Config.HTTP_MAX_CONNECTIONS,
+        keepalive_expiry: float = Config.HTTP_KEEPALIVE_S,
+    ):
+        self.http = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+                keepalive_expiry=keepalive_expiry,
+            ),
+        )
+        # Retries are ours (with backoff + limits), so the SDK's own are off
+        self.client = AsyncOpenAI(
+            api_key=api_key or Config.OPENAI_KEY or "ollama",
+            base_url=base_url,
+            http_client=self.http,
+            max_retries=0,
+        )
+        self.limits = {"chat": AdaptiveLimit(chat_concurrency), "embeddings": AdaptiveLimit(embed_concurrency)}
+        self.timeouts = {"chat": Config.LLM_CHAT_TIMEOUT_S, "embeddings": Config.LLM_EMBED_TIMEOUT_S}
+        self.max_attempts = max_attempts
+        self.histograms: Dict[str, LatencyHistogram] = {}
+
+    @staticmethod
+    def _wait(retry_state) -> float:
+        backoff = wait_random_exponential(multiplier=0.5, max=20.0)(retry_state)
+        exc = retry_state.outcome.exception() if retry_state.outcome else None
+        response = getattr(exc, "response", None)
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        try:
+            return max(backoff, float(retry_after)) if retry_after else backoff
+        except ValueError:
+            return backoff
+
+    async def call(self, endpoint: str, kind: str, fn, **kwargs) -> Any:
+        """Run one SDK call under the `kind` ("chat" / "embeddings") limit, with retries."""
+        limit = self.limits[kind]
+        histogram = self.histograms.setdefault(endpoint, LatencyHistogram())
+        kwargs.setdefault("timeout", self.timeouts[kind])
+        async for attempt in AsyncRetrying(
+            stop=stop_after_attempt(self.max_attempts),
+            wait=self._wait,
+            retry=retry_if_exception(_retryable),
+            reraise=True,
+        ):
+            with attempt:
+                async with limit:
+                    t0 = time.perf_counter()
+                    try:
+                        result = await fn(**kwargs)
+                    except Exception as e:
+                        histogram.record((time.perf_counter() - t0) * 1000.0, ok=False)
+                        if _overloaded(e):
+                            limit.on_overload()
+                        raise
+                    histogram.record((time.perf_counter() - t0) * 1000.0)
+                    limit.on_success()
+        return result
+
+    async def chat_parse(self, **kwargs):
+        """client.beta.chat.completions.parse (structured outputs)."""
+        return await self.call("chat.parse", "chat", self.client.beta.chat.completions.parse, **kwargs)
+
+    async def chat(self, **kwargs):
+        """client.chat.completions.create."""
+        return await self.call("chat.create", "chat", self.client.chat.completions.create, **kwargs)
+
+    async def chat_stream(self, **kwargs) -> AsyncIterator[str]:
+        """
+        client.beta.chat.completions.stream, yielding content deltas as they arrive.
+
+        Holds a chat slot for the whole stream. Not retried: once the caller has acted on
+        part of the output a replay could disagree with it, so failures go to the caller.
+        """
+        limit = self.limits["chat"]
+        histogram = self.histograms.setdefault("chat.stream", LatencyHistogram())
+        kwargs.setdefault("timeout", self.timeouts["chat"])
+        async with limit:
+            t0 = time.perf_counter()
+            ok = False
+            try:
+                async with self.client.beta.chat.completions.stream(**kwargs) as stream:
+                    async for event in stream:
+                        if event.type == "content.delta":
+                            yield event.delta
+                ok = True
+            except Exception as e:
+                if _overloaded(e):
+                    limit.on_overload()
+                raise
+            finally:
+                histogram.record((time.perf_counter() - t0) * 1000.0, ok=ok)
+            limit.on_success()
+
+    async def embeddings(self, **kwargs):
+        """client.embeddings.create."""
+        return await self.call("embeddings", "embeddings", self.client.embeddings.create, **kwargs)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        return {endpoint: h.summary() for endpoint, h in self.histograms.items()}
+
+    def log_stats(self):
+        for endpoint, s in self.stats().items():
+            log.info(
+                f"[LLM] {endpoint}: {s['calls']} calls ({s['errors']} errors), "
+                f"p50 {s['p50_ms']:.0f} ms, p95 {s['p95_ms']:.0f} ms, max {s['max_ms']:.0f} ms"
+            )
+
+    async def close(self):
+        await self.http.aclose()
+
+
+_manager: Optional[ClientManager] = None
+
+
+def get_client_manager() -> ClientManager:
+    """The process-wide ClientManager, created on first use."""
+    global _manager
+    if _manager is None:
+        _manager = ClientManager()
+    return _manager
+
+
+async def close_client_manager():
+    global _manager
+    if _manager is not None:
+        await _manager.close()
+        _manager = None
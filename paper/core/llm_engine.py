@@ -1,38 +1,238 @@
-from typing import Any, Dict
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+from config import Config
+from core.llm_client import ClientManager, LatencyHistogram, get_client_manager
+from core.logger import log
 
-# from openai import OpenAI
-from core.logger import logger
-from config import settings
+KINDS = ("chat", "parse", "stream")
 
 
 class LLMEngine:
     """
-    Thin wrapper around your LLM client (e.g. OpenAI).
-    Wire it up to your preferred model / provider.
+    The one entry point for chat and structured-output calls, on top of the shared ClientManager
+    (which pools connections, retries, and caps concurrency with its adaptive chat limit).
+
+    - Coalescing: identical deterministic requests (temperature 0) already on the wire are
+      awaited, not sent again.
+    - Response cache: deterministic responses are kept in an LRU of `cache_size` entries,
+      each valid for `cache_ttl` seconds. Sampled (temperature > 0) and streamed calls are
+      never cached or coalesced. A caller's `validate` check keeps values it would reject
+      out of the cache (and evicts them on a hit).
+    - Accounting: latency histogram, token usage and cache/coalescing counts per kind
+      ("chat", "parse", "stream") in stats().
+
+    request() returns {"value", "prompt_tokens", "completion_tokens", "ms", "source"}, where
+    value is the message text (chat) or the parsed response_format model (parse) and source is
+    "network", "cache" or "coalesced"; chat() / parse() / generate() return just the value.
     """
 
-    def __init__(self, model: str | None = None) -> None:
-        self.model = model or settings.openai_model
-        self.api_key = settings.openai_api_key
-        # Example if you want to actually hook it up:
-        # self.client = OpenAI(api_key=self.api_key)
+    def __init__(
+        self,
+        manager: Optional[ClientManager] = None,
+        model: str = Config.MODEL_NAME,
+        cache_size: int = Config.LLM_CACHE_SIZE,
+        cache_ttl: float = Config.LLM_CACHE_TTL_S,
+    ):
+        self._manager = manager
+        self.model = model
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self._cache: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (expires_at, result)
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.histograms = {kind: LatencyHistogram() for kind in KINDS}
+        self.counts = {
+            kind: {"calls": 0, "network": 0, "cache_hits": 0, "coalesced": 0, "errors": 0,
+                   "prompt_tokens": 0, "completion_tokens": 0}
+            for kind in KINDS
+        }
+
+    @property
+    def manager(self) -> ClientManager:
+        """The ClientManager given at construction, else the current process-wide one."""
+        return self._manager or get_client_manager()
+
+    @staticmethod
+    def _key(kind: str, model: str, messages: List[dict], response_format, kwargs: dict) -> str:
+        schema = None
+        if response_format is not None:
+            schema = [response_format.__name__, response_format.model_json_schema()]
+        payload = {
+            "kind": kind,
+            "model": model,
+            "messages": messages,
+            "schema": schema,
+            "kwargs": {k: v for k, v in kwargs.items() if k != "timeout"},
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+    def _cached(self, key: str) -> Optional[dict]:
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        expires_at, result = entry
+        if time.monotonic() >= expires_at:
+            del self._cache[key]
+            return None
+        self._cache.move_to_end(key)
+        return result
 
-    async def generate(self, system_prompt: str, user_prompt: str) -> str:
+    def _store(self, key: str, result: dict):
+        if self.cache_size <= 0:
+            return
+        self._cache[key] = (time.monotonic() + self.cache_ttl, result)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    @staticmethod
+    def _copy(result: dict, source: str, ms: float) -> dict:
+        value = result["value"]
+        if hasattr(value, "model_copy"):
+            value = value.model_copy(deep=True)  # callers may edit their plan; the cached one must not change
+        return {**result, "value": value, "source": source, "ms": ms}
+
+    def _record(self, kind: str, source: str, ms: float, result: Optional[dict] = None, ok: bool = True):
+        counts = self.counts[kind]
+        counts["calls"] += 1
+        self.histograms[kind].record(ms, ok=ok)
+        if not ok:
+            counts["errors"] += 1
+            return
+        counts[{"network": "network", "cache": "cache_hits", "coalesced": "coalesced"}[source]] += 1
+        if source == "network" and result is not None:
+            counts["prompt_tokens"] += result["prompt_tokens"] or 0
+            counts["completion_tokens"] += result["completion_tokens"] or 0
+
+    async def _send(self, kind: str, model: str, messages: List[dict], response_format, kwargs: dict) -> dict:
+        if kind == "parse":
+            completion = await self.manager.chat_parse(
+                model=model, messages=messages, response_format=response_format, **kwargs
+            )
+            value = completion.choices[0].message.parsed if completion and completion.choices else None
+        else:
+            completion = await self.manager.chat(model=model, messages=messages, **kwargs)
+            value = completion.choices[0].message.content if completion and completion.choices else None
+        usage = getattr(completion, "usage", None)
+        return {
+            "value": value,
+            "prompt_tokens": getattr(usage, "prompt_tokens", None),
+            "completion_tokens": getattr(usage, "completion_tokens", None),
+        }
+
+    async def request(
+        self,
+        messages: List[dict],
+        response_format=None,
+        temperature: float = 0.0,
+        cache: bool = True,
+        validate: Optional[Callable[[Any], bool]] = None,
+        **kwargs,
+    ) -> dict:
         """
-        Async interface for text generation.
-        Implement your real LLM call here.
+        One chat (or, with a pydantic response_format, structured) completion; see the class docstring.
+        validate: a value it rejects is still returned, but never cached; a cached one it rejects is
+        dropped and the request sent again.
         """
-        logger.debug(
-            "LLMEngine.generate called",
+        kind = "parse" if response_format is not None else "chat"
+        model = kwargs.pop("model", self.model)
+        kwargs["temperature"] = temperature
+        t0 = time.perf_counter()
+        key = self._key(kind, model, messages, response_format, kwargs) if cache and temperature == 0 else None
+        future = None
+        if key is not None:
+            hit = self._cached(key)
+            if hit is not None and validate is not None and not validate(hit["value"]):
+                del self._cache[key]
+                hit = None
+            if hit is not None:
+                ms = (time.perf_counter() - t0) * 1000.0
+                self._record(kind, "cache", ms)
+                return self._copy(hit, "cache", ms)
+            leader = self._inflight.get(key)
+            if leader is not None:
+                try:
+                    result = await asyncio.shield(leader)
+                except Exception:
+                    self._record(kind, "coalesced", (time.perf_counter() - t0) * 1000.0, ok=False)
+                    raise
+                ms = (time.perf_counter() - t0) * 1000.0
+                self._record(kind, "coalesced", ms)
+                return self._copy(result, "coalesced", ms)
+            future = asyncio.get_running_loop().create_future()
+            self._inflight[key] = future
+        try:
+            result = await self._send(kind, model, messages, response_format, kwargs)
+        except BaseException as e:
+            self._record(kind, "network", (time.perf_counter() - t0) * 1000.0, ok=False)
+            if future is not None:
+                # Followers get the leader's error; a cancelled leader must not look like their own cancellation
+                future.set_exception(e if isinstance(e, Exception) else RuntimeError("Coalesced LLM request was cancelled"))
+                future.exception()  # mark retrieved: there may be no followers
+            raise
+        finally:
+            if key is not None:
+                self._inflight.pop(key, None)
+        ms = (time.perf_counter() - t0) * 1000.0
+        self._record(kind, "network", ms, result)
+        if future is not None:
+            future.set_result(result)
+            if result["value"] is not None and (validate is None or validate(result["value"])):
+                self._store(key, result)
+        return self._copy(result, "network", ms)
+
+    async def chat(self, messages: List[dict], **kwargs) -> Optional[str]:
+        return (await self.request(messages, **kwargs))["value"]
+
+    async def parse(self, messages: List[dict], response_format, **kwargs) -> Any:
+        """Parsed response_format instance, or None if the model's output didn't parse."""
+        return (await self.request(messages, response_format=response_format, **kwargs))["value"]
+
+    async def generate(self, system_prompt: str, user_prompt: str, **kwargs) -> Optional[str]:
+        """Text completion for a system + user prompt pair."""
+        return await self.chat(
+            [{"role": "system", "content": system_prompt}, {"role": "user", "content": user_prompt}], **kwargs
         )
-        # Example skeleton (sync client inside async – replace with real impl):
-        # resp = self.client.chat.completions.create(
-        #     model=self.model,
-        #     messages=[
-        #         {"role": "system", "content": system_prompt},
-        #         {"role": "user", "content": user_prompt},
-        #     ],
-        # )
-        # return resp.choices[0].message.content
-
-        raise NotImplementedError("Wire up your LLM provider in LLMEngine.generate()")
+
+    async def stream(self, messages: List[dict], response_format=None, temperature: float = 0.0, **kwargs) -> AsyncIterator[str]:
+        """Content deltas as they arrive (see ClientManager.chat_stream); never cached or coalesced."""
+        model = kwargs.pop("model", self.model)
+        if response_format is not None:
+            kwargs["response_format"] = response_format
+        t0 = time.perf_counter()
+        ok = False
+        try:
+            async for delta in self.manager.chat_stream(model=model, messages=messages, temperature=temperature, **kwargs):
+                yield delta
+            ok = True
+        finally:
+            self._record("stream", "network", (time.perf_counter() - t0) * 1000.0, ok=ok)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        out = {}
+        for kind in KINDS:
+            if self.counts[kind]["calls"]:
+                out[kind] = {**self.counts[kind], **self.histograms[kind].summary()}
+        return out
+
+    def log_stats(self):
+        for kind, s in self.stats().items():
+            log.info(
+                f"[LLMEngine] {kind}: {s['calls']} calls ({s['network']} sent, {s['cache_hits']} cached, "
+                f"{s['coalesced']} coalesced, {s['errors']} errors), p50 {s['p50_ms']:.0f} ms, "
+                f"tokens {s['prompt_tokens']} in / {s['completion_tokens']} out"
+            )
+
+
+_engine: Optional[LLMEngine] = None
+
+
+def get_llm_engine() -> LLMEngine:
+    """The process-wide LLMEngine (shared response cache), created on first use."""
+    global _engine
+    if _engine is None:
+        _engine = LLMEngine()
+    return _engine
@@ -0,0 +1,276 @@
+import asyncio
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+import numpy as np
+from core.logger import log
+from schemas.models import MissionPlan
+
+_NUMBER = re.compile(r"[-+]?\d+(?:\.\d+)?")
+
+
+class PlanCache:
+    """
+    Semantic cache of Supervisor plans: (model, context digest, mission) -> MissionPlan.
+
+    A plan is reused when the model and the digest of the full planning prompt (system
+    prompt + CONTEXT FROM MEMORY) are unchanged and the mission is either the same text
+    (after whitespace normalisation) or an embedding neighbour with cosine >= `threshold`.
+    Neighbours must also carry exactly the same numbers (coordinates, altitudes, drone ids):
+    wording may vary, targets may not.
+
+    Memory inserts invalidate entries through the digest: once an insert changes what
+    retrieval returns for a mission, the old entry no longer matches; it is dropped the
+    next time that exact mission is looked up (near-matches just age out of the LRU). Only LLM
+    plans are stored, never fallbacks.
+
+    Entries live in an in-process LRU of `capacity` plans, backed by an optional SQLite file
+    (`path`, "" = memory only) so repeated runs of the same mission hit too. Lookups never
+    touch the file. Stores and deletes are queued and written by a worker thread, off the event
+    loop. LRU touches only update `last_used`, so they are batched and written on the next
+    flush or on close().
+    """
+
+    def __init__(self, path: str = "", capacity: int = 256, threshold: float = 0.95):
+        self.path = path
+        self.capacity = capacity
+        self.threshold = threshold
+        self._entries: "OrderedDict[str, dict]" = OrderedDict()
+        self.hits_exact = 0
+        self.hits_similar = 0
+        self.misses = 0
+        self.invalidated = 0
+        self.saved_ms = 0.0
+        self.conn: Optional[sqlite3.Connection] = None
+        self._pending: List[tuple] = []  # (sql, rows) waiting for the writer
+        self._touched: Dict[str, float] = {}  # key -> last_used not yet written
+        self._flushes: set = set()  # in-flight asyncio.to_thread(_flush) tasks
+        self._write_lock = threading.Lock()
+        if path and capacity > 0:
+            # Writes run in a worker thread (asyncio.to_thread), serialised by _write_lock
+            self.conn = sqlite3.connect(path, check_same_thread=False)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS plan_cache (
+                    key TEXT PRIMARY KEY,
+                    model TEXT,
+                    digest TEXT,
+                    numbers TEXT,
+                    mission TEXT,
+                    vector BLOB,
+                    plan_json TEXT,
+                    llm_ms REAL,
+                    last_used REAL
+                )
+            """)
+            self.conn.commit()
+            rows = self.conn.execute(
+                "SELECT key, model, digest, numbers, mission, vector, plan_json, llm_ms FROM plan_cache "
+                "ORDER BY last_used DESC LIMIT ?",
+                (capacity,),
+            ).fetchall()
+            unreadable = []
+            for key, model, digest, numbers, mission, vector, plan_json, llm_ms in reversed(rows):
+                try:
+                    plan = MissionPlan.model_validate_json(plan_json)
+                except ValueError:
+                    # Written under an older MissionPlan schema, or corrupt: it can't be served
+                    unreadable.append(key)
+                    continue
+                self._entries[key] = {
+                    "model": model,
+                    "digest": digest,
+                    "numbers": numbers,
+                    "mission": mission,
+                    "vector": np.frombuffer(vector, dtype=np.float32) if vector else None,
+                    "plan": plan,
+                    "llm_ms": llm_ms,
+                }
+            if unreadable:
+                self.conn.executemany("DELETE FROM plan_cache WHERE key = ?", [(k,) for k in unreadable])
+                self.conn.commit()
+                log.error(f"[PlanCache] Dropped {len(unreadable)} stored plan(s) that no longer validate")
+
+    @property
+    def enabled(self) -> bool:
+        return self.capacity > 0
+
+    @staticmethod
+    def context_digest(prompt: str) -> str:
+        """Digest of everything besides the mission that the plan depends on (the full system prompt)."""
+        return hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _normalize(mission: str) -> str:
+        return " ".join(mission.split())
+
+    @staticmethod
+    def _numbers(mission: str) -> str:
+        return ",".join(_NUMBER.findall(mission))
+
+    @classmethod
+    def key(cls, model: str, digest: str, mission: str) -> str:
+        return hashlib.sha256(f"{model}\0{digest}\0{cls._normalize(mission)}".encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _unit(vector) -> Optional[np.ndarray]:
+        if vector is None:
+            return None
+        arr = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(arr)
+        return arr / norm if norm > 0 and np.isfinite(norm) else None
+
+    def _write(self, sql: str, rows: List[tuple]):
+        """Queue a write for the SQLite file and make sure a flush is on its way."""
+        if self.conn is None or not rows:
+            return
+        self._pending.append((sql, rows))
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._flush()  # no event loop to keep free (e.g. a synchronous script)
+            return
+        # One flush per write; _write_lock serialises them and a flush with nothing left is a no-op
+        task = loop.create_task(asyncio.to_thread(self._flush))
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    def _flush(self):
+        """Write queued stores/deletes and batched last_used touches in one transaction."""
+        with self._write_lock:
+            if self.conn is None:
+                return
+            pending, self._pending = self._pending, []
+            touched, self._touched = self._touched, {}
+            if not pending and not touched:
+                return
+            for sql, rows in pending:
+                self.conn.executemany(sql, rows)
+            if touched:
+                self.conn.executemany(
+                    "UPDATE plan_cache SET last_used = ? WHERE key = ?", [(t, k) for k, t in touched.items()]
+                )
+            self.conn.commit()
+
+    def _drop(self, keys: List[str]):
+        for key in keys:
+            self._entries.pop(key, None)
+            self._touched.pop(key, None)
+        self._write("DELETE FROM plan_cache WHERE key = ?", [(k,) for k in keys])
+
+    def _touch(self, key: str):
+        self._entries.move_to_end(key)
+        if self.conn is not None:
+            self._touched[key] = time.time()
+
+    def lookup(
+        self, mission: str, vector, model: str, digest: str, validate: Optional[Callable[[MissionPlan], bool]] = None
+    ) -> Optional[MissionPlan]:
+        """
+        A copy of the cached plan for this mission and prompt, or None. A plan that fails
+        `validate` is dropped (from the file too) and the lookup counts as a miss.
+        """
+        if not self.enabled:
+            return None
+        t0 = time.perf_counter()
+        key = self.key(model, digest, mission)
+        entry = self._entries.get(key)
+        similar = False
+        if entry is None:
+            query = self._unit(vector)
+            numbers = self._numbers(mission)
+            normalized = self._normalize(mission)
+            best_key, best_score, stale = None, self.threshold, []
+            for k, e in self._entries.items():
+                if e["model"] != model or e["numbers"] != numbers:
+                    continue
+                if e["mission"] == normalized:
+                    score = 1.0
+                elif query is None or e["vector"] is None or e["vector"].shape != query.shape:
+                    continue
+                else:
+                    score = float(np.dot(e["vector"], query))
+                if e["digest"] != digest:
+                    if score == 1.0:
+                        stale.append(k)  # same mission, but memory (or the prompt) has changed since
+                elif score >= best_score:
+                    best_key, best_score = k, score
+            if stale:
+                self.invalidated += len(stale)
+                self._drop(stale)
+            if best_key is None:
+                self.misses += 1
+                return None
+            key, entry, similar = best_key, self._entries[best_key], True
+        if validate is not None and not validate(entry["plan"]):
+            log.error("[PlanCache] Dropped a cached plan that fails validation")
+            self.invalidated += 1
+            self.misses += 1
+            self._drop([key])
+            return None
+        self._touch(key)
+        if similar:
+            self.hits_similar += 1
+        else:
+            self.hits_exact += 1
+        self.saved_ms += max(0.0, entry["llm_ms"] - (time.perf_counter() - t0) * 1000.0)
+        return entry["plan"].model_copy(deep=True)
+
+    def put(self, mission: str, vector, model: str, digest: str, plan: MissionPlan, llm_ms: float):
+        """Store an LLM plan along with what it cost to produce (for the latency-saved figure)."""
+        if not self.enabled:
+            return
+        key = self.key(model, digest, mission)
+        unit = self._unit(vector)
+        entry = {
+            "model": model,
+            "digest": digest,
+            "numbers": self._numbers(mission),
+            "mission": self._normalize(mission),
+            "vector": unit,
+            "plan": plan.model_copy(deep=True),
+            "llm_ms": llm_ms,
+        }
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        evicted = []
+        while len(self._entries) > self.capacity:
+            evicted.append(self._entries.popitem(last=False)[0])
+        for k in evicted:
+            self._touched.pop(k, None)
+        self._write(
+            "INSERT OR REPLACE INTO plan_cache "
+            "(key, model, digest, numbers, mission, vector, plan_json, llm_ms, last_used) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [(
+                key, model, digest, entry["numbers"], entry["mission"],
+                unit.tobytes() if unit is not None else None,
+                plan.model_dump_json(), llm_ms, time.time(),
+            )],
+        )
+        self._write("DELETE FROM plan_cache WHERE key = ?", [(k,) for k in evicted])
+
+    def stats(self) -> Dict[str, float]:
+        hits = self.hits_exact + self.hits_similar
+        lookups = hits + self.misses
+        return {
+            "hits_exact": self.hits_exact,
+            "hits_similar": self.hits_similar,
+            "misses": self.misses,
+            "invalidated": self.invalidated,
+            "entries": len(self._entries),
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "saved_ms": self.saved_ms,
+        }
+
+    def close(self):
+        """Write anything still queued (including LRU touches) and close the file."""
+        if self.conn is not None:
+            self._flush()
+            with self._write_lock:
+                self.conn.close()
+                self.conn = None
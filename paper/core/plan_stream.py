@@ -0,0 +1,66 @@
+from typing import List, Optional
+from schemas.models import Task
+
+
+class TaskStreamParser:
+    """
+    Incremental scanner for a MissionPlan JSON document arriving in chunks.
+
+    feed() returns each element of the top-level "tasks" array as soon as its closing
+    brace arrives, validated as a Task; the surrounding document (e.g. "reasoning") is
+    only scanned, never parsed, until the end. Strings and escapes are tracked so braces
+    inside text don't confuse it. `text` holds everything fed so far, so the complete
+    plan can be validated as usual once the stream ends.
+    """
+
+    def __init__(self):
+        self._chunks: List[str] = []
+        self._partial = ""  # text of the task element being received
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string: List[str] = []  # current string at the top level (candidate key)
+        self._last_key: Optional[str] = None
+        self._in_tasks = False
+        self._element = False
+
+    @property
+    def text(self) -> str:
+        return "".join(self._chunks)
+
+    def feed(self, chunk: str) -> List[Task]:
+        self._chunks.append(chunk)
+        tasks = []
+        start = 0 if self._element else None
+        for i, ch in enumerate(chunk):
+            if self._in_string:
+                if self._depth == 1:
+                    self._string.append(ch)
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        self._last_key = "".join(self._string[:-1])
+                continue
+            if ch == '"':
+                self._in_string = True
+                self._string = []
+            elif ch in "{[":
+                if ch == "[" and self._depth == 1 and self._last_key == "tasks":
+                    self._in_tasks = True
+                elif ch == "{" and self._in_tasks and self._depth == 2:
+                    self._element, start = True, i
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._element and self._depth == 2:
+                    tasks.append(Task.model_validate_json(self._partial + chunk[start:i + 1]))
+                    self._element, self._partial, start = False, "", None
+                elif self._in_tasks and self._depth == 1:
+                    self._in_tasks = False
+        if self._element:
+            self._partial += chunk[start:]
+        return tasks
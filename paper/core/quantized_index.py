@@ -0,0 +1,138 @@
+import numpy as np
+from typing import Iterable, List, Optional, Sequence, Tuple
+from core.logger import log
+from core.vector_index import VectorIndex, top_k
+
+# float16 was dropped: NumPy has no fast float16 mat-vec, so it scanned ~4x slower than exact float32
+QUANT_DTYPES = {"int8": np.int8}
+
+
+def quantize_rows(normed: np.ndarray, mode: str) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Compact codes for unit rows: (codes, scales), one symmetric int8 scale per row (max |x| -> 127).
+    `mode` is a QUANT_DTYPES key.
+    """
+    peak = np.abs(normed).max(axis=1) if normed.shape[1] else np.zeros(normed.shape[0], dtype=np.float32)
+    scales = np.where(peak > 0, peak / 127.0, 1.0).astype(np.float32)
+    codes = np.clip(np.rint(normed / scales[:, None]), -127, 127).astype(np.int8)
+    return codes, scales
+
+
+class QuantizedIndex(VectorIndex):
+    """
+    Two-pass search over int8 copies of the vectors (one scale per row).
+
+    The first pass scores the compact codes to shortlist max(limit * rescore, min_shortlist)
+    rows; the shortlist is then rescored exactly against the float32 store and the top-k of
+    that is returned, so scores are the same as the exact index's. The codes live in RAM
+    (1/4 of float32); pair with Config.EMBEDDING_SIDECAR so the float32 rows stay on the
+    memory-mapped file and only the shortlisted pages are ever touched.
+
+    The first pass decodes codes block by block, which costs more than a float32 mat-vec on
+    small or low-dim tables: it only pays off for large, high-dim ones (see Config.VECTOR_INDEX).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        mode: str = "int8",
+        rescore: int = 10,
+        min_shortlist: int = 64,
+        initial_capacity: int = 1024,
+        store=None,
+        chunk: int = 256,
+    ):
+        if mode not in QUANT_DTYPES:
+            raise ValueError(f"Unknown quantization mode '{mode}' (expected one of {sorted(QUANT_DTYPES)})")
+        super().__init__(name, initial_capacity=initial_capacity, store=store)
+        self.mode = mode
+        self.rescore = rescore
+        self.min_shortlist = min_shortlist
+        self.chunk = chunk  # rows decoded per block in the first pass; small enough to stay in L2
+        self._capacity = initial_capacity
+        self.reset()
+
+    def reset(self):
+        self._codes = np.empty((0, 0), dtype=QUANT_DTYPES[self.mode])
+        self._scales = np.empty(0, dtype=np.float32)
+        self._quantized = 0  # store rows that already have codes
+
+    def refresh(self):
+        with self._lock:
+            self._sync()
+        if self._quantized:
+            log.info(f"[Index:{self.name}] {self.mode} codes for {self._quantized} vectors ({self.code_bytes / 2**20:.1f} MiB)")
+
+    @property
+    def code_bytes(self) -> int:
+        return int(self._quantized * ((self.dim or 0) * self._codes.itemsize + self._scales.itemsize))
+
+    def _sync(self):
+        """Quantize store rows appended since the last call (also covers a sidecar mapped at startup)."""
+        total = len(self)
+        if self._quantized == total:
+            return
+        if self._codes.shape[0] < total:
+            capacity = max(self._capacity, self._codes.shape[0])
+            while capacity < total:
+                capacity *= 2
+            codes = np.zeros((capacity, self.dim), dtype=self._codes.dtype)
+            scales = np.ones(capacity, dtype=np.float32)
+            if self._quantized:
+                codes[: self._quantized] = self._codes[: self._quantized]
+                scales[: self._quantized] = self._scales[: self._quantized]
+            self._codes, self._scales = codes, scales
+        vectors = self.vectors
+        block = 65536
+        for start in range(self._quantized, total, block):
+            end = min(start + block, total)
+            self._codes[start:end], self._scales[start:end] = quantize_rows(np.asarray(vectors[start:end]), self.mode)
+        self._quantized = total
+
+    def add_many(self, row_ids: Sequence[int], embeddings: np.ndarray) -> int:
+        with self._lock:
+            added = super().add_many(row_ids, embeddings)
+            if added:
+                self._sync()
+            return added
+
+    def approx_scores(self, query: np.ndarray, positions: Optional[np.ndarray] = None) -> np.ndarray:
+        """First-pass scores of a unit query against the codes (all rows, or only `positions`)."""
+        codes = self._codes[: self._quantized]
+        scales = self._scales[: self._quantized]
+        valid = self.valid
+        if positions is not None:
+            codes, scales, valid = codes[positions], scales[positions], valid[positions]
+        out = np.empty(codes.shape[0], dtype=np.float32)
+        buf = np.empty((self.chunk, codes.shape[1]), dtype=np.float32)
+        for start in range(0, codes.shape[0], self.chunk):
+            end = min(start + self.chunk, codes.shape[0])
+            block = buf[: end - start]
+            block[...] = codes[start:end]  # decode into a cache-resident buffer, then one mat-vec
+            out[start:end] = block @ query
+        out *= scales
+        out[~valid] = -np.inf
+        return out
+
+    def search(
+        self, query_embedding: Iterable[float], limit: int = 3, positions: Optional[np.ndarray] = None
+    ) -> List[Tuple[int, float]]:
+        if len(self) == 0:
+            return []
+        query = np.asarray(query_embedding, dtype=np.float32)
+        if query.shape[0] != self.dim:
+            log.error(f"[Index:{self.name}] Query dim {query.shape[0]} does not match index dim {self.dim}")
+            return []
+        norm = np.linalg.norm(query)
+        if norm > 0:
+            query = query / norm
+        with self._lock:
+            approx = self.approx_scores(query, positions)
+            shortlist = top_k(approx, max(limit * self.rescore, self.min_shortlist))
+            # Back to index positions, in insertion order so exact ties break like the flat index
+            shortlist = np.sort(shortlist if positions is None else positions[shortlist])
+            exact = self.vectors[shortlist] @ query
+            exact[~self.valid[shortlist]] = -np.inf
+            ids = self.ids[shortlist]
+        best = top_k(exact, limit)
+        return [(int(ids[b]), float(exact[b])) for b in best]
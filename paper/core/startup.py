@@ -0,0 +1,78 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, List, Tuple
+from config import Config
+from core.logger import log
+
+
+class StartupPipeline:
+    """
+    Mission startup as two branches: drone bring-up (connect + GPS lock, per drone) and mission
+    preparation (memory load, embedding warmup, context retrieval, planning).
+
+    Pipelined, start_drones() only launches the bring-ups and preparation runs alongside them;
+    each drone's worker then waits for that drone alone (drone_ready). Sequential (the old order),
+    start_drones() waits for every drone and then `settle_s` before preparation continues.
+
+    Stage spans and one-off marks (ms from construction) feed the time-to-first-takeoff report.
+    """
+
+    def __init__(self, pipelined: bool = Config.STARTUP_PIPELINE, settle_s: float = Config.STARTUP_SETTLE_S):
+        self.pipelined = pipelined
+        self.settle_s = settle_s
+        self.t0 = time.perf_counter()
+        self.spans: Dict[str, Tuple[float, float]] = {}
+        self.marks: Dict[str, float] = {}
+        self._drones: Dict[int, asyncio.Task] = {}
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.t0) * 1000.0
+
+    def mark(self, name: str):
+        """Record the first time `name` happens (later calls are ignored)."""
+        self.marks.setdefault(name, self.elapsed_ms())
+
+    async def stage(self, name: str, awaitable: Awaitable):
+        """Await `awaitable`, recording its span under `name` (also when it fails)."""
+        start = self.elapsed_ms()
+        try:
+            return await awaitable
+        finally:
+            self.spans[name] = (start, self.elapsed_ms())
+
+    async def start_drones(self, bring_up: Dict[int, Callable[[], Awaitable]]):
+        """Launch each drone's bring-up; in sequential mode also wait for all of them and settle."""
+        for drone_id, fn in bring_up.items():
+            self._drones[drone_id] = asyncio.create_task(self.stage(f"drone {drone_id} ready", fn()))
+        if not self.pipelined:
+            await asyncio.gather(*(self.drone_ready(d) for d in self._drones))
+            await self.stage("settle", asyncio.sleep(self.settle_s))
+
+    async def drone_ready(self, drone_id: int) -> bool:
+        """Wait for the drone's bring-up; False (logged) if it failed (e.g. no GPS lock) or was cancelled."""
+        bring_up = self._drones[drone_id]
+        try:
+            await asyncio.shield(bring_up)
+            return True
+        except asyncio.CancelledError:
+            if not bring_up.cancelled():
+                raise  # the waiter itself was cancelled; the bring-up carries on
+            log.error(f"[Startup] Drone {drone_id} not ready: bring-up cancelled")
+            return False
+        except Exception as e:
+            log.error(f"[Startup] Drone {drone_id} not ready: {e}")
+            return False
+
+    def report(self) -> List[Tuple[str, float, float]]:
+        """(stage, start ms, end ms) in start order, marks as zero-length stages."""
+        rows = [(name, start, end) for name, (start, end) in self.spans.items()]
+        rows += [(name, at, at) for name, at in self.marks.items()]
+        return sorted(rows, key=lambda row: (row[1], row[2]))
+
+    def log_report(self):
+        mode = "pipelined" if self.pipelined else "sequential"
+        for name, start, end in self.report():
+            span = f"{start:.0f} ms" if start == end else f"{start:.0f}-{end:.0f} ms"
+            log.info(f"[Startup] {name}: {span}")
+        if "first takeoff" in self.marks:
+            log.info(f"[Startup] Time to first takeoff: {self.marks['first takeoff']:.0f} ms ({mode})")
@@ -0,0 +1,232 @@
+import asyncio
+import contextlib
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+import numpy as np
+from config import Config
+from core.logger import log
+from core.task_graph import TaskGraph
+from schemas.models import Task, ToolResult
+
+
+class TakeoffWaves:
+    """
+    Rate limit for arm/takeoff: at most `size` takeoffs start per `interval` seconds. The first
+    caller after a quiet period opens a wave at once; callers beyond a full wave wait for the next.
+    size <= 0 disables the limit.
+    """
+
+    def __init__(self, size: int = Config.SWARM_WAVE_SIZE, interval: float = Config.SWARM_WAVE_INTERVAL_S):
+        self.size = size
+        self.interval = interval
+        self.waves = 0
+        self._start = float("-inf")
+        self._count = 0
+        self._lock = asyncio.Lock()
+
+    async def slot(self):
+        if self.size <= 0:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            if now - self._start >= self.interval:
+                self._start, self._count = now, 0
+                self.waves += 1
+            elif self._count >= self.size:
+                await asyncio.sleep(self._start + self.interval - now)
+                self._start, self._count = self._start + self.interval, 0
+                self.waves += 1
+            self._count += 1
+
+
+def task_resources(task: Task, worker) -> frozenset:
+    """
+    Exclusive resources a task holds while it runs: the vehicle ("nav:<id>") for anything that
+    moves it (move, return, or any task that has to take off first) and the payload
+    ("camera:<id>") for a scan. So one drone can scan while it moves, if the plan allows it.
+    A return also holds the camera: it ends the flight, so it never starts during a scan
+    (or a scan during it), whatever the plan's dependencies say.
+    """
+    if task.action_type == "scan" and worker.airborne:
+        return frozenset({f"camera:{task.drone_id}"})
+    if task.action_type in ("scan", "return"):
+        return frozenset({f"nav:{task.drone_id}", f"camera:{task.drone_id}"})
+    return frozenset({f"nav:{task.drone_id}"})
+
+
+class SwarmExecutor:
+    """
+    Executes a TaskGraph across any number of drones: each task starts as soon as its
+    dependencies have succeeded and its resources (task_resources) are free.
+
+    - At most `concurrency` tasks execute at once across the swarm (0 = no cap).
+    - A task that needs a takeoff (drone not airborne, action other than "return") first waits
+      for a TakeoffWaves slot, instead of a fixed per-drone start delay.
+    - A failed task cancels only the tasks that depend on it. For a plan without depends_on
+      that is the rest of the drone's sequence, as before.
+
+    `workers` maps drone id -> anything with `airborne` and `async execute_task(task) -> ToolResult`
+    (WorkerAgent, or a simulated one). run() returns [{"drone_id", "task", "result"}] in
+    completion order; report() has per-drone counts, latency and throughput.
+    """
+
+    def __init__(
+        self,
+        workers: Dict[int, object],
+        concurrency: int = Config.SWARM_CONCURRENCY,
+        waves: Optional[TakeoffWaves] = None,
+    ):
+        self.workers = workers
+        self.concurrency = concurrency
+        self.waves = waves or TakeoffWaves()
+        self.first_task_at: Optional[float] = None  # perf_counter() when the first task started
+        self.makespan_s = 0.0  # first task start to last task end
+        self._limit: Optional[asyncio.Semaphore] = None
+        self._records: Dict[int, dict] = {}
+        self._graph: Optional[TaskGraph] = None
+
+    async def run(
+        self,
+        graph: TaskGraph,
+        ready: Optional[Callable[[int], Awaitable]] = None,
+        on_takeoff: Optional[Callable[[int], None]] = None,
+    ) -> List[dict]:
+        """
+        Runs until the graph is closed and every task has finished or been cancelled.
+        ready: awaited per drone before its first task (e.g. StartupPipeline.drone_ready).
+        on_takeoff: called with the drone id just before a task that takes off starts.
+        """
+        self._graph = graph
+        self._limit = asyncio.Semaphore(self.concurrency) if self.concurrency > 0 else None
+        self._records = {
+            drone_id: {
+                "latencies": [], "waits": [], "ok": 0, "failed": 0, "start": None, "end": None,
+                "flight_s": 0.0, "idle_s": 0.0,
+            }
+            for drone_id in self.workers
+        }
+        ready_at = {d: asyncio.ensure_future(ready(d)) for d in self.workers} if ready is not None else {}
+        held: set = set()
+        running: Dict[asyncio.Task, tuple] = {}
+        results = []
+        while True:
+            graph.changed.clear()
+            while graph.rejected:
+                results.append(self._failed(*graph.rejected.pop(0)))
+            for key, task in graph.runnable():
+                worker = self.workers.get(task.drone_id)
+                if worker is None:
+                    log.error(f"[Swarm] {task.task_id}: no worker for drone {task.drone_id}")
+                    results.append(self._failed(task, f"no worker for drone {task.drone_id}"))
+                    graph.start(key)
+                    self._cancel_dependents(graph, key, task)
+                    continue
+                resources = task_resources(task, worker)
+                if resources & held:
+                    continue
+                held |= resources
+                graph.start(key)
+                run = asyncio.ensure_future(self._execute(task, worker, ready_at.get(task.drone_id), on_takeoff))
+                running[run] = (key, task, resources)
+            if not running and graph.finished:
+                break
+            changed = asyncio.ensure_future(graph.changed.wait())
+            done, _ = await asyncio.wait({changed, *running}, return_when=asyncio.FIRST_COMPLETED)
+            changed.cancel()
+            for run in done - {changed}:
+                key, task, resources = running.pop(run)
+                held -= resources
+                result = run.result()
+                results.append({"drone_id": task.drone_id, "task": task, "result": result})
+                if result.success:
+                    graph.finish(key, True)
+                else:
+                    self._cancel_dependents(graph, key, task)
+        for future in ready_at.values():
+            future.cancel()
+        starts = [r["start"] for r in self._records.values() if r["start"] is not None]
+        ends = [r["end"] for r in self._records.values() if r["end"] is not None]
+        self.makespan_s = (max(ends) - min(starts)) if starts else 0.0
+        return results
+
+    def _failed(self, task: Task, message: str) -> dict:
+        """Result entry for a task that failed without running, counted like any other failure."""
+        record = self._records.get(task.drone_id)
+        if record is not None:
+            record["failed"] += 1
+        return {"drone_id": task.drone_id, "task": task, "result": ToolResult(success=False, message=message)}
+
+    @staticmethod
+    def _cancel_dependents(graph: TaskGraph, key: str, task: Task):
+        cancelled = graph.finish(key, False)
+        if cancelled:
+            log.error(
+                f"[Worker {task.drone_id}] {task.task_id} failed; cancelled the tasks that depend on it: "
+                + ", ".join(t.task_id for t in cancelled)
+            )
+
+    async def _execute(self, task: Task, worker, ready: Optional[asyncio.Future], on_takeoff) -> ToolResult:
+        drone_id = task.drone_id
+        record = self._records[drone_id]
+        if ready is not None:
+            await asyncio.shield(ready)
+        queued = time.perf_counter()
+        takeoff = not worker.airborne and task.action_type != "return"
+        if takeoff:
+            await self.waves.slot()
+        async with self._limit or contextlib.nullcontext():
+            start = time.perf_counter()
+            if self.first_task_at is None:
+                self.first_task_at = start
+            if takeoff and on_takeoff is not None:
+                on_takeoff(drone_id)
+            try:
+                result = await worker.execute_task(task)
+            except Exception as e:  # WorkerAgent reports failures as ToolResult; a simulated worker may raise
+                result = ToolResult(success=False, message=str(e))
+            end = time.perf_counter()
+        record["waits"].append((start - queued) * 1000.0)
+        record["latencies"].append((end - start) * 1000.0)
+        record["start"] = min(record["start"] or start, start)
+        record["end"] = max(record["end"] or end, end)
+        record["ok" if result.success else "failed"] += 1
+        timing = result.data or {}
+        record["flight_s"] += timing.get("flight_s", 0.0)
+        record["idle_s"] += timing.get("idle_s", 0.0)
+        return result
+
+    def report(self) -> Dict[int, dict]:
+        """
+        Per drone: task counts, mean/p95 task latency, mean wait (waves + cap), tasks/s while active,
+        and time in flight vs idle inside tasks (from ToolResult.data, as WorkerAgent reports it).
+        """
+        out = {}
+        for drone_id, r in self._records.items():
+            done = len(r["latencies"])
+            active_s = (r["end"] - r["start"]) if done else 0.0
+            out[drone_id] = {
+                "tasks": r["ok"] + r["failed"],
+                "ok": r["ok"],
+                "failed": r["failed"],
+                "skipped": self._graph.counts(drone_id)["cancelled"] if self._graph is not None else 0,
+                "mean_ms": float(np.mean(r["latencies"])) if done else 0.0,
+                "p95_ms": float(np.percentile(r["latencies"], 95)) if done else 0.0,
+                "wait_ms": float(np.mean(r["waits"])) if done else 0.0,
+                "tasks_per_s": done / active_s if active_s > 0 else 0.0,
+                "flight_s": r["flight_s"],
+                "idle_s": r["idle_s"],
+            }
+        return out
+
+    def log_report(self):
+        report = self.report()
+        for drone_id, r in report.items():
+            log.info(
+                f"[Swarm] Drone {drone_id}: {r['tasks']} tasks ({r['ok']} ok, {r['failed']} failed, "
+                f"{r['skipped']} skipped), latency mean {r['mean_ms']:.0f} ms / p95 {r['p95_ms']:.0f} ms, "
+                f"wait {r['wait_ms']:.0f} ms, {r['tasks_per_s'] * 60.0:.1f} tasks/min, "
+                f"flight {r['flight_s']:.1f} s / idle {r['idle_s']:.1f} s"
+            )
+        done = sum(r["tasks"] for r in report.values())
+        ok = sum(r["ok"] for r in report.values())
+        log.info(f"[Swarm] {len(report)} drones, {done} tasks ({ok} ok), {self.waves.waves} takeoff waves")
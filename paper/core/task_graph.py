@@ -0,0 +1,145 @@
+import asyncio
+from typing import Dict, List, Tuple
+from core.logger import log
+from schemas.models import MissionPlan, Task
+
+WAITING, RUNNING, DONE, FAILED, CANCELLED, DROPPED = "waiting", "running", "done", "failed", "cancelled", "dropped"
+
+
+class TaskGraph:
+    """
+    A mission's tasks as a dependency DAG, filled as the Supervisor hands tasks out.
+
+    Edges come from Task.depends_on: a list names the tasks that must succeed first ([] = none);
+    None (the default, and what the fallback planner emits) means "after this drone's previous
+    task", so a plan without depends_on runs exactly like the old per-drone sequence. Dependencies
+    must name earlier tasks, which keeps the graph acyclic; a task naming an unknown id fails.
+
+    When a task fails, only the tasks that (transitively) depend on it are cancelled. Tasks that
+    fail at submit (unknown dependency) are queued in `rejected` for the executor to report.
+
+    submit() / close() / replace_pending() plug into SupervisorAgent.plan_mission's
+    on_task / on_swap callbacks; SwarmExecutor.run() executes
+    the graph. `changed` is set whenever a task is added, becomes runnable or the graph closes.
+    """
+
+    def __init__(self):
+        self.nodes: Dict[str, dict] = {}  # key -> {"task", "state", "waiting_on", "dependents", "index"}
+        self.closed = False
+        self.changed = asyncio.Event()
+        self._ids: Dict[str, str] = {}  # task_id -> node key (the latest task with that id)
+        self._last: Dict[int, str] = {}  # drone id -> key of its latest task (for implicit edges)
+        self._ready: Dict[str, None] = {}
+        self.rejected: List[Tuple[Task, str]] = []  # (task, reason) failed at submit, not yet reported
+
+    def submit(self, task: Task):
+        if self.closed:
+            return
+        key = task.task_id if task.task_id not in self.nodes else f"{task.task_id}#{len(self.nodes)}"
+        node = {"task": task, "state": WAITING, "waiting_on": 0, "dependents": [], "index": len(self.nodes)}
+        self.nodes[key] = node
+        if task.depends_on is None:
+            deps = [self._last[task.drone_id]] if task.drone_id in self._last else []
+        else:
+            unknown = [d for d in task.depends_on if d not in self._ids]
+            if unknown:
+                log.error(f"[TaskGraph] {task.task_id} depends on unknown task(s) {unknown}; not running it")
+                node["state"] = FAILED
+                self.rejected.append((task, f"{task.task_id} depends on unknown task(s) {unknown}"))
+            deps = [self._ids[d] for d in task.depends_on if d in self._ids]
+        self._ids[task.task_id] = key
+        self._last[task.drone_id] = key
+        for dep in deps:
+            state = self.nodes[dep]["state"]
+            if state in (FAILED, CANCELLED) and node["state"] == WAITING:
+                node["state"] = CANCELLED
+            elif state != DONE:
+                node["waiting_on"] += 1
+                self.nodes[dep]["dependents"].append(key)
+        if node["state"] == WAITING and node["waiting_on"] == 0:
+            self._ready[key] = None
+        self.changed.set()
+
+    def runnable(self) -> List[Tuple[str, Task]]:
+        """Tasks whose dependencies have all succeeded and that haven't started, in plan order."""
+        keys = sorted(self._ready, key=lambda k: self.nodes[k]["index"])
+        return [(key, self.nodes[key]["task"]) for key in keys]
+
+    def start(self, key: str):
+        self._ready.pop(key, None)
+        self.nodes[key]["state"] = RUNNING
+
+    def finish(self, key: str, ok: bool) -> List[Task]:
+        """Record a task's outcome; returns the tasks cancelled because it failed."""
+        node = self.nodes[key]
+        node["state"] = DONE if ok else FAILED
+        cancelled = []
+        if ok:
+            for dep in node["dependents"]:
+                child = self.nodes[dep]
+                child["waiting_on"] -= 1
+                if child["state"] == WAITING and child["waiting_on"] == 0:
+                    self._ready[dep] = None
+        else:
+            stack = list(node["dependents"])
+            while stack:
+                child = self.nodes[stack.pop()]
+                if child["state"] == WAITING:
+                    child["state"] = CANCELLED
+                    cancelled.append(child["task"])
+                    stack.extend(child["dependents"])
+        self.changed.set()
+        return cancelled
+
+    @property
+    def finished(self) -> bool:
+        """Closed, and nothing is running or can still become runnable."""
+        return self.closed and not any(node["state"] in (WAITING, RUNNING) for node in self.nodes.values())
+
+    def close(self):
+        """No more tasks: SwarmExecutor.run() returns once the remaining ones are done."""
+        self.closed = True
+        self.changed.set()
+
+    def replace_pending(self, plan: MissionPlan) -> Tuple[int, int]:
+        """
+        Drop every task that hasn't started and add the plan's tasks instead. Plan tasks matching
+        one that already started (same drone, action and parameters) are not re-run: their
+        task_id is mapped to the started task, so dependencies on it still resolve.
+        Returns (tasks dropped, tasks queued).
+        """
+        dropped = 0
+        for key, node in self.nodes.items():
+            if node["state"] == WAITING:
+                node["state"] = DROPPED
+                self._ready.pop(key, None)
+                dropped += 1
+        self._ids = {tid: key for tid, key in self._ids.items() if self.nodes[key]["state"] != DROPPED}
+        started = [(key, node) for key, node in self.nodes.items() if node["state"] in (RUNNING, DONE, FAILED)]
+        self._last = {}
+        for key, node in sorted(started, key=lambda item: item[1]["index"]):
+            self._last[node["task"].drone_id] = key
+        queued = 0
+        for task in plan.tasks:
+            match = next(
+                (key for key, node in started
+                 if (node["task"].drone_id, node["task"].action_type, node["task"].params)
+                 == (task.drone_id, task.action_type, task.params)),
+                None,
+            )
+            if match is not None:
+                started = [(key, node) for key, node in started if key != match]
+                self._ids[task.task_id] = match
+                self._last[task.drone_id] = match
+                continue
+            self.submit(task)
+            queued += 1
+        return dropped, queued
+
+    def counts(self, drone_id: int) -> Dict[str, int]:
+        """Task states for one drone (dropped tasks are left out)."""
+        out = {WAITING: 0, RUNNING: 0, DONE: 0, FAILED: 0, CANCELLED: 0}
+        for node in self.nodes.values():
+            if node["task"].drone_id == drone_id and node["state"] in out:
+                out[node["state"]] += 1
+        return out
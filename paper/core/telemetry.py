@@ -0,0 +1,152 @@
+import asyncio
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+from core.logger import log
+
+
+class Subscription:
+    """
+    Async iterator over the values published on one topic after it was created. The queue is
+    registered in __init__, not on the first read, so a value published between subscribe() and
+    the first `async for` step is not missed. Only the newest unread value is kept: a slow
+    reader skips to it instead of queueing. aclose() unregisters it.
+    """
+
+    def __init__(self, queues: set):
+        self._queues = queues
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=1)
+        queues.add(self._queue)
+
+    def __aiter__(self) -> "Subscription":
+        return self
+
+    async def __anext__(self):
+        if self._queue not in self._queues:
+            raise StopAsyncIteration
+        return await self._queue.get()
+
+    async def aclose(self):
+        self._queues.discard(self._queue)
+
+
+class TelemetryHub:
+    """
+    One long-lived subscription per telemetry topic of a drone, shared by every reader.
+
+    `topics` maps a name to a zero-argument callable that opens the stream, e.g.
+    {"health": drone.telemetry.health, "position": drone.telemetry.position}. The first use of a
+    topic starts a pump task that reads its stream for the life of the hub and, for every value:
+      - caches it: latest(name) / age(name) read the newest value without awaiting;
+      - resolves wait_for() callers whose predicate it satisfies;
+      - hands it to subscribe() Subscriptions (each keeps only the newest unread value).
+    wait_for() checks the cached value first, so a condition that already holds returns at once
+    instead of paying a stream setup and the next telemetry tick. If a stream ends or fails, the
+    pump reopens it (backing off up to 5 s) and waiters keep waiting. close() stops the pumps.
+    """
+
+    def __init__(self, drone_id: int, topics: Dict[str, Callable[[], AsyncIterator]]):
+        self.drone_id = drone_id
+        self.topics = topics
+        self._latest: Dict[str, Any] = {}
+        self._stamp: Dict[str, float] = {}
+        self._pumps: Dict[str, asyncio.Task] = {}
+        self._waiters: Dict[str, List[Tuple[Callable[[Any], bool], asyncio.Future]]] = {t: [] for t in topics}
+        self._queues: Dict[str, set] = {t: set() for t in topics}
+        self._stats = {t: {"opens": 0, "messages": 0, "waits": 0, "cached": 0} for t in topics}
+
+    def start(self, *names: str):
+        """Open the given topics' streams now (all topics if none given) so the cache fills early."""
+        for name in names or self.topics:
+            if name not in self._pumps:
+                self._pumps[name] = asyncio.create_task(self._pump(name))
+
+    def latest(self, name: str, default=None):
+        """Newest value seen on the topic, or `default` before the first one."""
+        return self._latest.get(name, default)
+
+    def age(self, name: str) -> Optional[float]:
+        """Seconds since the topic's last value (None before the first one)."""
+        stamp = self._stamp.get(name)
+        return asyncio.get_running_loop().time() - stamp if stamp is not None else None
+
+    async def wait_for(self, name: str, predicate: Callable[[Any], bool], timeout: Optional[float] = None):
+        """
+        First value on the topic satisfying `predicate`, starting with the cached one.
+        Raises asyncio.TimeoutError after `timeout` seconds (None = wait forever).
+        """
+        self.start(name)
+        stats = self._stats[name]
+        stats["waits"] += 1
+        if name in self._latest and predicate(self._latest[name]):
+            stats["cached"] += 1
+            return self._latest[name]
+        future = asyncio.get_running_loop().create_future()
+        entry = (predicate, future)
+        self._waiters[name].append(entry)
+        try:
+            return await asyncio.wait_for(future, timeout)
+        finally:
+            if entry in self._waiters[name]:
+                self._waiters[name].remove(entry)
+
+    def subscribe(self, name: str) -> Subscription:
+        """
+        Every value on the topic from now on (see Subscription); a slow reader skips to the newest
+        instead of queueing. Subscribe before sending a command whose effect you want to follow.
+        """
+        self.start(name)
+        return Subscription(self._queues[name])
+
+    async def _pump(self, name: str):
+        backoff = 0.5
+        while True:
+            self._stats[name]["opens"] += 1
+            try:
+                async for value in self.topics[name]():
+                    self._publish(name, value)
+                    backoff = 0.5
+                log.error(f"[Drone {self.drone_id}] Telemetry stream '{name}' ended; reopening")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.error(f"[Drone {self.drone_id}] Telemetry stream '{name}' failed: {e}; reopening")
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2.0, 5.0)
+
+    def _publish(self, name: str, value):
+        self._latest[name] = value
+        self._stamp[name] = asyncio.get_running_loop().time()
+        self._stats[name]["messages"] += 1
+        waiters = self._waiters[name]
+        for entry in list(waiters):
+            predicate, future = entry
+            if future.done():
+                waiters.remove(entry)
+                continue
+            try:
+                matched = predicate(value)
+            except Exception as e:
+                future.set_exception(e)
+                waiters.remove(entry)
+                continue
+            if matched:
+                future.set_result(value)
+                waiters.remove(entry)
+        for queue in self._queues[name]:
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(value)
+
+    def stats(self) -> Dict[str, dict]:
+        """Per topic: streams opened, values received, waits, and waits answered from the cache."""
+        return {name: dict(s) for name, s in self._stats.items()}
+
+    async def close(self):
+        """Stop every pump; pending waiters get CancelledError."""
+        for task in self._pumps.values():
+            task.cancel()
+        await asyncio.gather(*self._pumps.values(), return_exceptions=True)
+        self._pumps.clear()
+        for waiters in self._waiters.values():
+            for _, future in waiters:
+                future.cancel()
+            waiters.clear()
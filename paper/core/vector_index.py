@@ -0,0 +1,236 @@
+import threading
+import numpy as np
+from typing import Iterable, List, Optional, Sequence, Tuple
+from core.logger import log
+
+
+def normalize_rows(matrix: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    L2-normalise each row of a float32 matrix.
+    Returns (normalised_matrix, valid_mask); zero-norm rows stay zero and are marked invalid.
+    """
+    norms = np.linalg.norm(matrix, axis=1)
+    valid = norms > 0
+    out = np.zeros_like(matrix, dtype=np.float32)
+    out[valid] = matrix[valid] / norms[valid, None]
+    return out, valid
+
+
+def top_k(scores: np.ndarray, limit: int) -> np.ndarray:
+    """
+    Positions of the `limit` highest scores, best first.
+    Ties keep insertion order, matching the stable sort the old row loop used.
+    Non-finite scores (-inf for tombstones and zero vectors) are never returned, so
+    fewer than `limit` positions come back when fewer rows can score.
+    """
+    live = np.isfinite(scores)
+    n = int(np.count_nonzero(live))
+    if n == 0 or limit <= 0:
+        return np.empty(0, dtype=np.int64)
+    if limit < n:
+        # argpartition finds the k-th best score; keep every row tied with it so
+        # the stable tie-break below is not decided by the partition order.
+        kth = scores[np.argpartition(-scores, limit - 1)[limit - 1]]
+        candidates = np.flatnonzero(live & (scores >= kth))
+    else:
+        candidates = np.flatnonzero(live)
+    order = np.lexsort((candidates, -scores[candidates]))
+    return candidates[order][:limit]
+
+
+class ArrayStore:
+    """
+    Growable in-memory storage for normalised vectors, their row ids and a validity mask.
+    EmbeddingStore (core/embedding_store.py) offers the same interface backed by a memory-mapped file.
+    """
+
+    def __init__(self, initial_capacity: int = 1024):
+        self._capacity = initial_capacity
+        self.reset()
+
+    def reset(self):
+        """Drop all rows (used before a full rebuild from SQLite)."""
+        self.dim: Optional[int] = None
+        self._size = 0
+        self._vectors = np.empty((0, 0), dtype=np.float32)  # shaped once the first vector fixes `dim`
+        self._ids = np.empty(0, dtype=np.int64)
+        self._valid = np.empty(0, dtype=bool)
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def ids(self) -> np.ndarray:
+        return self._ids[: self._size]
+
+    @property
+    def vectors(self) -> np.ndarray:
+        return self._vectors[: self._size]
+
+    @property
+    def valid(self) -> np.ndarray:
+        return self._valid[: self._size]
+
+    def _reserve(self, extra: int):
+        needed = self._size + extra
+        if self._vectors.shape[0] >= needed:
+            return
+        capacity = max(self._capacity, self._vectors.shape[0])
+        while capacity < needed:
+            capacity *= 2
+        vectors = np.zeros((capacity, self.dim), dtype=np.float32)
+        ids = np.zeros(capacity, dtype=np.int64)
+        valid = np.zeros(capacity, dtype=bool)
+        if self._size:
+            vectors[: self._size] = self._vectors[: self._size]
+            ids[: self._size] = self._ids[: self._size]
+            valid[: self._size] = self._valid[: self._size]
+        self._vectors, self._ids, self._valid = vectors, ids, valid
+
+    def invalidate(self, positions: np.ndarray):
+        """Tombstone rows whose table row was deleted; they keep their slot but never score."""
+        self._valid[positions] = False
+
+    def append(self, row_ids: np.ndarray, normed: np.ndarray, valid: np.ndarray):
+        if self.dim is None:
+            self.dim = normed.shape[1]
+        count = normed.shape[0]
+        self._reserve(count)
+        end = self._size + count
+        self._vectors[self._size:end] = normed
+        self._ids[self._size:end] = row_ids
+        self._valid[self._size:end] = valid
+        self._size = end
+
+
+class VectorIndex:
+    """
+    Cosine index for one memory table.
+    Rows are normalised once on insert, so a query is one mat-vec product plus a top-k.
+    Storage is an in-memory ArrayStore unless a memory-mapped EmbeddingStore is passed in.
+    """
+
+    def __init__(self, name: str, initial_capacity: int = 1024, store=None):
+        self.name = name
+        self.store = store if store is not None else ArrayStore(initial_capacity)
+        # Inserts come from the DB writer thread while searches run on reader threads
+        self._lock = threading.RLock()
+        self.skipped = 0  # rows ignored because their dimension did not match
+
+    def __len__(self) -> int:
+        return len(self.store)
+
+    @property
+    def dim(self) -> Optional[int]:
+        return self.store.dim
+
+    @property
+    def ids(self) -> np.ndarray:
+        return self.store.ids
+
+    @property
+    def vectors(self) -> np.ndarray:
+        return self.store.vectors
+
+    @property
+    def valid(self) -> np.ndarray:
+        return self.store.valid
+
+    def refresh(self):
+        """Rebuild any derived search structures after the store was filled directly."""
+
+    def reset(self):
+        """Forget derived search structures (the store is reset separately)."""
+
+    def add_many(self, row_ids: Sequence[int], embeddings: np.ndarray) -> int:
+        """Append a block of (row_id, vector) pairs. Returns how many were indexed."""
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        if embeddings.ndim != 2 or embeddings.shape[0] == 0:
+            return 0
+        if self.dim is not None and embeddings.shape[1] != self.dim:
+            self.skipped += embeddings.shape[0]
+            log.error(
+                f"[Index:{self.name}] Skipping {embeddings.shape[0]} vector(s) of dim "
+                f"{embeddings.shape[1]} (index dim {self.dim})"
+            )
+            return 0
+        normed, valid = normalize_rows(embeddings)
+        with self._lock:
+            self.store.append(np.asarray(row_ids, dtype=np.int64), normed, valid)
+        return normed.shape[0]
+
+    def remove(self, row_ids: Sequence[int]) -> int:
+        """Tombstone the given row ids (e.g. after compaction deleted them). Returns how many were indexed."""
+        with self._lock:
+            positions = self.positions_of(np.asarray(row_ids, dtype=np.int64))
+            if positions.shape[0]:
+                self.store.invalidate(positions)
+        return int(positions.shape[0])
+
+    @property
+    def dead(self) -> int:
+        """Rows that cannot score: tombstones plus zero vectors."""
+        return int(len(self) - np.count_nonzero(self.valid))
+
+    def add(self, row_id: int, embedding: Iterable[float]) -> bool:
+        vec = np.asarray(embedding, dtype=np.float32).reshape(1, -1)
+        return self.add_many([row_id], vec) == 1
+
+    def scores(self, query_embedding: Iterable[float], positions: Optional[np.ndarray] = None) -> Optional[np.ndarray]:
+        """
+        Cosine score of the query against every indexed row, or only the rows at
+        `positions` when given (-inf for zero vectors).
+        """
+        if len(self) == 0:
+            return np.empty(0, dtype=np.float32)
+        query = np.asarray(query_embedding, dtype=np.float32)
+        if query.shape[0] != self.dim:
+            log.error(f"[Index:{self.name}] Query dim {query.shape[0]} does not match index dim {self.dim}")
+            return None
+        norm = np.linalg.norm(query)
+        if norm > 0:
+            query = query / norm
+        if positions is None:
+            scores = self.vectors @ query
+            scores[~self.valid] = -np.inf
+        else:
+            scores = self.vectors[positions] @ query
+            scores[~self.valid[positions]] = -np.inf
+        return scores
+
+    def positions_of(self, row_ids: np.ndarray) -> np.ndarray:
+        """Index positions of the given row ids (ids not in the index are dropped)."""
+        ids = self.ids
+        row_ids = np.asarray(row_ids, dtype=np.int64)
+        # Rows are appended in id order, so the id column is sorted
+        pos = np.searchsorted(ids, row_ids)
+        pos = np.minimum(pos, max(len(ids) - 1, 0))
+        found = (ids[pos] == row_ids) if len(ids) else np.zeros(row_ids.shape[0], dtype=bool)
+        return pos[found]
+
+    def vectors_for(self, row_ids: Sequence[int]) -> Tuple[np.ndarray, np.ndarray]:
+        """(mask over row_ids of those with a valid indexed vector, those unit vectors in order)."""
+        row_ids = np.asarray(row_ids, dtype=np.int64)
+        with self._lock:
+            ids = self.ids
+            if not len(ids):
+                return np.zeros(row_ids.shape[0], dtype=bool), np.empty((0, self.dim or 0), dtype=np.float32)
+            pos = np.minimum(np.searchsorted(ids, row_ids), len(ids) - 1)
+            found = ids[pos] == row_ids
+            found[found] = self.valid[pos[found]]
+            return found, np.array(self.vectors[pos[found]], dtype=np.float32)
+
+    def search(
+        self, query_embedding: Iterable[float], limit: int = 3, positions: Optional[np.ndarray] = None
+    ) -> List[Tuple[int, float]]:
+        """
+        Return [(row_id, score), ...] for the `limit` most similar rows.
+        positions: restrict scoring to these (sorted) index positions, e.g. a pre-filtered candidate set.
+        """
+        with self._lock:
+            scores = self.scores(query_embedding, positions)
+            ids = self.ids if positions is None else self.ids[positions]
+        if scores is None:
+            return []
+        best = top_k(scores, limit)
+        return [(int(ids[p]), float(scores[p])) for p in best]
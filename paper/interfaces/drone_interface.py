@@ -1,13 +1,25 @@
 import asyncio
 from mavsdk import System
 from config import Config
+from core.arrival import ArrivalTracker
 from core.logger import log
+from core.telemetry import TelemetryHub
 
 class DroneInterface:
     def __init__(self, drone_id: int):
         self.drone_id = drone_id
         self.port = Config.DRONE_CONFIG[drone_id]["port"]
         self.drone = System(mavsdk_server_address='localhost', port=self.port)
+        # One shared stream per topic; every wait below reads from it (see core/telemetry.py)
+        self.telemetry = TelemetryHub(drone_id, {
+            "connection": self.drone.core.connection_state,
+            "health": self.drone.telemetry.health,
+            "position": self.drone.telemetry.position,
+            "armed": self.drone.telemetry.armed,
+            "in_air": self.drone.telemetry.in_air,
+        })
+        self.flight_s = 0.0  # seconds spent waiting on the vehicle to climb or transit
+        self.arrival: ArrivalTracker = None  # the current/last goto, for progress and ETA
 
     async def _wait_for_global_position(self, timeout: float = 30.0):
         """
@@ -15,75 +27,105 @@ class DroneInterface:
         This must be true before arming.
         """
         log.info(f"[Drone {self.drone_id}] Waiting for GPS lock...")
-        start = asyncio.get_running_loop().time()
-        async for health in self.drone.telemetry.health():
-            if health.is_global_position_ok:
-                log.success(f"[Drone {self.drone_id}] GPS lock acquired")
-                return
-            if asyncio.get_running_loop().time() - start > timeout:
-                raise TimeoutError(f"Drone {self.drone_id} GPS lock timeout")
+        try:
+            await self.telemetry.wait_for("health", lambda h: h.is_global_position_ok, timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"Drone {self.drone_id} GPS lock timeout")
+        log.success(f"[Drone {self.drone_id}] GPS lock acquired")
 
     async def _wait_for_home_position(self, timeout: float = 10.0):
         """
         Wait for home position after arming (PX4 sets home when armed).
         """
         log.info(f"[Drone {self.drone_id}] Waiting for home position...")
-        start = asyncio.get_running_loop().time()
-        async for health in self.drone.telemetry.health():
-            if health.is_home_position_ok:
-                log.success(f"[Drone {self.drone_id}] Home position set")
-                return
-            if asyncio.get_running_loop().time() - start > timeout:
-                raise TimeoutError(f"Drone {self.drone_id} home position timeout")
+        try:
+            await self.telemetry.wait_for("health", lambda h: h.is_home_position_ok, timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"Drone {self.drone_id} home position timeout")
+        log.success(f"[Drone {self.drone_id}] Home position set")
 
     async def _wait_for_altitude(self, target_altitude: float, timeout: float = 60.0):
         """
         Confirm climb by watching relative altitude.
         We now require within 0.5m of target (or min 1m) before proceeding to movement.
         """
-        start = asyncio.get_running_loop().time()
         threshold = max(1.0, target_altitude - 0.5)
         log.info(f"[Drone {self.drone_id}] Waiting to reach ≥{threshold:.1f}m (target {target_altitude}m)")
-        async for position in self.drone.telemetry.position():
-            rel_alt = position.relative_altitude_m
-
-            if rel_alt >= threshold:
-                log.success(f"[Drone {self.drone_id}] Altitude reached: {rel_alt:.1f}m")
-                return
-            if asyncio.get_running_loop().time() - start > timeout:
-                raise TimeoutError(f"Drone {self.drone_id} takeoff confirmation timeout (last alt {rel_alt:.1f}m)")
-
+        start = asyncio.get_running_loop().time()
+        try:
+            position = await self.telemetry.wait_for(
+                "position", lambda p: p.relative_altitude_m >= threshold, timeout
+            )
+        except asyncio.TimeoutError:
+            last = self.telemetry.latest("position")
+            last_alt = f"{last.relative_altitude_m:.1f}m" if last is not None else "unknown"
+            raise TimeoutError(f"Drone {self.drone_id} takeoff confirmation timeout (last alt {last_alt})")
+        finally:
+            self.flight_s += asyncio.get_running_loop().time() - start
+        log.success(f"[Drone {self.drone_id}] Altitude reached: {position.relative_altitude_m:.1f}m")
 
     async def connect(self):
-        """Establishes connection to the specific gRPC port."""
+        """Establishes connection to the specific gRPC port (link only; see wait_ready)."""
         log.info(f"[Drone {self.drone_id}] Connecting on port {self.port}...")
         await self.drone.connect()
+        await self.telemetry.wait_for("connection", lambda state: state.is_connected)
+        log.success(f"[Drone {self.drone_id}] Connected!")
+        # Open the remaining streams now so health/position are cached before the first wait
+        self.telemetry.start()
+
+    async def wait_ready(self, timeout: float = Config.DRONE_READY_TIMEOUT_S):
+        """Wait until the drone can arm (GPS lock); replaces a fixed settle delay after connect."""
+        await self._wait_for_global_position(timeout=timeout)
+
+    async def arm(self):
+        """GPS lock, arm, then home position (PX4 sets home when armed)."""
+        await self._wait_for_global_position()
+        log.info(f"[Drone {self.drone_id}] Arming...")
+        await self.drone.action.arm()
+        await self._wait_for_home_position()
 
-        # Wait for the drone to be ready
-        async for state in self.drone.core.connection_state():
-            if state.is_connected:
-                log.success(f"[Drone {self.drone_id}] Connected!")
-                # Small settle and early health check
-                await asyncio.sleep(0.5)
-                try:
-                    await self._wait_for_global_position(timeout=30.0)
-                except Exception:
-                    pass
-                break
+    async def takeoff(self, altitude: float):
+        """Take off an armed drone and wait for the climb."""
+        log.info(f"[Drone {self.drone_id}] Taking off to {altitude}m...")
+        await self.drone.action.set_takeoff_altitude(altitude)
+        await self.drone.action.takeoff()
+        await self._wait_for_altitude(altitude)
+
+    async def change_altitude(self, altitude: float, tolerance: float = Config.FLIGHT_ALT_TOLERANCE_M,
+                              timeout: float = 60.0):
+        """Climb or descend in place to `altitude` m above home (a goto to the current fix)."""
+        position = self.telemetry.latest("position")
+        if position is None:
+            raise RuntimeError(f"Drone {self.drone_id} has no position fix for an altitude change")
+        log.info(f"[Drone {self.drone_id}] Changing altitude {position.relative_altitude_m:.1f}m -> {altitude}m")
+        start = asyncio.get_running_loop().time()
+        try:
+            await self.drone.action.goto_location(
+                position.latitude_deg, position.longitude_deg, self._amsl(altitude, position), 0
+            )
+            await self.telemetry.wait_for(
+                "position", lambda p: abs(p.relative_altitude_m - altitude) <= tolerance, timeout
+            )
+        except asyncio.TimeoutError:
+            last = self.telemetry.latest("position")
+            raise TimeoutError(
+                f"Drone {self.drone_id} altitude change timeout (last alt {last.relative_altitude_m:.1f}m)"
+            )
+        finally:
+            self.flight_s += asyncio.get_running_loop().time() - start
+
+    @staticmethod
+    def _amsl(relative_altitude: float, position) -> float:
+        """Altitude above home -> AMSL, which action.goto_location expects."""
+        return position.absolute_altitude_m - position.relative_altitude_m + relative_altitude
 
     async def arm_and_takeoff(self, altitude: float = 5.0):
         attempts = 2
         last_exc = None
         for attempt in range(1, attempts + 1):
             try:
-                await self._wait_for_global_position()
-                log.info(f"[Drone {self.drone_id}] Arming...")
-                await self.drone.action.arm()
-                await self._wait_for_home_position()
-                log.info(f"[Drone {self.drone_id}] Taking off to {altitude}m...")
-                await self.drone.action.set_takeoff_altitude(altitude)
-                await self.drone.action.takeoff()
-                await self._wait_for_altitude(altitude)
+                await self.arm()
+                await self.takeoff(altitude)
                 return f"Drone {self.drone_id} airborne at {altitude}m"
             except Exception as e:
                 last_exc = e
@@ -94,11 +136,46 @@ class DroneInterface:
         # If here, all attempts failed
         raise last_exc if last_exc else RuntimeError("Unknown takeoff failure")
 
-    async def goto_location(self, lat: float, lon: float, alt: float):
+    async def goto_location(self, lat: float, lon: float, alt: float, radius: float = Config.ARRIVAL_RADIUS_M):
+        """
+        Fly to lat/lon and return once the position stream puts the drone within `radius` metres.
+        Times out after ARRIVAL_TIMEOUT_S plus the starting distance at ARRIVAL_MIN_SPEED_MPS.
+        """
         log.info(f"[Drone {self.drone_id}] Flying to {lat}, {lon}")
-        await self.drone.action.goto_location(lat, lon, alt, 0)
-        return "Move command sent"
+        self.arrival = tracker = ArrivalTracker(self.drone_id, lat, lon, radius)
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        # Registered now, before the goto, so fixes that arrive before follow() starts aren't missed
+        positions = self.telemetry.subscribe("position")
+        try:
+            # alt is above home (as for takeoff); goto_location wants AMSL, which needs a fix to convert
+            try:
+                current = await self.telemetry.wait_for("position", lambda p: True, Config.ARRIVAL_FIX_TIMEOUT_S)
+            except asyncio.TimeoutError:
+                raise RuntimeError(f"Drone {self.drone_id} has no position fix for a goto")
+            await self.drone.action.goto_location(lat, lon, self._amsl(alt, current), 0)
+            # The cached fix answers "already there" at once and sets the distance for the timeout
+            current = self.telemetry.latest("position")
+            if current is None or not tracker.update(current, loop.time()):
+                timeout = Config.ARRIVAL_TIMEOUT_S + (tracker.distance_m or 0.0) / Config.ARRIVAL_MIN_SPEED_MPS
+                await tracker.follow(positions, timeout)
+        finally:
+            await positions.aclose()
+            self.flight_s += loop.time() - start
+        log.success(f"[Drone {self.drone_id}] Arrived ({tracker.distance_m:.1f} m off) after {loop.time() - start:.1f} s")
+        return f"Arrived at {lat}, {lon} ({tracker.distance_m:.1f} m off) in {loop.time() - start:.1f} s"
+
+    async def wait_landed(self, timeout: float = Config.FLIGHT_LAND_TIMEOUT_S):
+        """Wait until the autopilot reports the drone on the ground."""
+        try:
+            await self.telemetry.wait_for("in_air", lambda in_air: not in_air, timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"Drone {self.drone_id} landing timeout")
 
     async def land(self):
         await self.drone.action.land()
         return "Landing initiated"
+
+    async def close(self):
+        """Stop the telemetry streams."""
+        await self.telemetry.close()
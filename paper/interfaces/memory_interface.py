@@ -1,39 +1,108 @@
-from openai import AsyncOpenAI
+import asyncio
+from collections import OrderedDict
+from typing import Optional
 from config import Config
-from core.database import DatabaseManager
+from core.async_database import AsyncDatabase
+from core.context_builder import ContextBuilder
+from core.database import FILTERS, DatabaseManager
+from core.embedding_cache import EmbeddingCache
+from core.embeddings import DEFAULT_EMBEDDING_DIM, EmbeddingDimensionError, make_provider
+from core.llm_client import get_client_manager
 from core.logger import log
+from schemas.models import ContextHit, MemoryContext
 
 
 class MemoryInterface:
-    def __init__(self):
-        # Point to local/OpenAI-compatible LLM server (e.g., Ollama) via Config.LLM_API_BASE
-        self.client = AsyncOpenAI(
-            api_key=Config.OPENAI_KEY or "ollama",
-            base_url=Config.LLM_API_BASE,
+    def __init__(self, db: Optional[DatabaseManager] = None):
+        # Shared pooled client (Config.LLM_API_BASE), also used by the Supervisor
+        self.llm = get_client_manager()
+        self.db = db or DatabaseManager()
+        # All DB work from the async side goes through here so it never blocks the event loop
+        self.adb = AsyncDatabase(self.db)
+        # (model, text) -> vector, so repeated texts skip the embeddings endpoint
+        self.embedding_cache = EmbeddingCache(Config.EMBED_CACHE_PATH, capacity=Config.EMBED_CACHE_SIZE)
+        # Config.EMBEDDING_PROVIDER: remote model (micro-batched through self.llm) or local hashing
+        self.embedder = make_provider()
+        stored = self.stored_dim
+        if stored and self.embedder.dim and stored != self.embedder.dim:
+            log.error(
+                f"[Embed] {self.embedder.name} produces dim {self.embedder.dim} but memory holds dim {stored}; "
+                f"re-embed with: python -m scripts.reembed {self.db.db_path}"
+            )
+        # Deduplicates, ranks and renders retrieved snippets within Config.CONTEXT_TOKEN_BUDGET
+        self.context_builder = ContextBuilder(
+            Config.CONTEXT_TOKEN_BUDGET, dedup=Config.CONTEXT_DEDUP, hazard_boost=Config.CONTEXT_HAZARD_BOOST
         )
-        self.db = DatabaseManager()
+        # Query-result cache for retrieve(); any insert bumps the generation and clears it
+        self._context_cache: "OrderedDict[tuple, MemoryContext]" = OrderedDict()
+        self._context_cache_size = 128
+        self._generation = 0
+        self._compaction_task: "asyncio.Task | None" = None
+
+    @classmethod
+    async def open(cls) -> "MemoryInterface":
+        """Like MemoryInterface(), but the database and vector index load off the event loop."""
+        return cls(await asyncio.to_thread(DatabaseManager))
+
+    async def warmup(self, text: str) -> bool:
+        """
+        Embed `text` ahead of use (e.g. the mission, before retrieve()): loads a cold embedding
+        model and leaves the vector in the embedding cache. False if the embedding failed.
+        """
+        return any(await self._get_embedding(text))
+
+    def _invalidate_context_cache(self):
+        self._generation += 1
+        self._context_cache.clear()
+
+    @property
+    def stored_dim(self):
+        """Dimension of the vectors already in memory (None for an empty DB)."""
+        return self.db.episode_index.dim or self.db.rule_index.dim
+
+    def _zero_vector(self) -> list:
+        return [0.0] * (self.stored_dim or self.embedder.dim or DEFAULT_EMBEDDING_DIM)
+
+    @staticmethod
+    def episode_text(drone_id: int, action: str, state: dict, outcome: str) -> str:
+        """The text an episode is embedded from (also used by scripts/reembed.py)."""
+        return f"Drone {drone_id} performed {action} at {state}. Result: {outcome}"
 
     async def _get_embedding(self, text: str):
-        """Generates vector using OpenAI text-embedding-3-small."""
+        """Embeds text with the configured provider; a zero vector of the memory's dimension on failure."""
+        key = EmbeddingCache.key(self.embedder.name, text)
+        cached = self.embedding_cache.get(key, disk=False)
+        if cached is None and self.embedding_cache.persistent:
+            cached = await asyncio.to_thread(self.embedding_cache.get, key)
+        if cached is not None:
+            return cached
         try:
-            resp = await self.client.embeddings.create(
-                input=text,
-                model=Config.EMBEDDING_MODEL,
-            )
-            return resp.data[0].embedding
+            vector = await self.embedder.embed(text)
+            stored = self.stored_dim
+            if stored and len(vector) != stored:
+                raise EmbeddingDimensionError(
+                    f"{self.embedder.name} returned dim {len(vector)} but memory holds dim {stored}; "
+                    f"run scripts/reembed.py after changing the embedding model"
+                )
         except Exception as e:
             log.error(f"Embedding Failed: {e}")
-            return [0.0] * 1536  # Return zero vector on failure
+            return self._zero_vector()  # Zero vector on failure: never cached, never matched
+        await asyncio.to_thread(self.embedding_cache.put, key, self.embedder.name, vector)
+        return vector
+
+    async def embed(self, text: str) -> list:
+        """Embedding of `text` with the memory's provider and cache (e.g. for the Supervisor's plan cache)."""
+        return await self._get_embedding(text)
 
     async def log_experience(self, drone_id: int, action: str, state: dict, outcome: str, is_poisoned: bool = False):
         """
         Called by Worker Agents after finishing a task.
         is_poisoned: If True, this is a malicious injection.
         """
-        text_representation = f"Drone {drone_id} performed {action} at {state}. Result: {outcome}"
+        text_representation = self.episode_text(drone_id, action, state, outcome)
         vector = await self._get_embedding(text_representation)
 
-        self.db.insert_episode(
+        await self.adb.insert_episode(
             drone_id=drone_id,
             action=action,
             state=state,
@@ -41,59 +110,129 @@ class MemoryInterface:
             embedding=vector,
             is_poisoned=1 if is_poisoned else 0
         )
+        self._invalidate_context_cache()
         tag = "[POISON]" if is_poisoned else "[Memory]"
         log.info(f"{tag} Logged episode for Drone {drone_id}")
 
+    async def retrieve(self, query: str, limit: int = 3, **filters) -> MemoryContext:
+        """
+        Single retrieval pass: one embedding call and one search per table.
+        The returned MemoryContext carries the prompt text, poison flags and scores,
+        so the CLI preview, the Supervisor and the verdict can all share it.
+
+        Each table is searched for `limit * Config.CONTEXT_POOL_FACTOR` candidates; the context
+        builder merges near-duplicates and keeps the best `limit` per table that fit the token budget.
+
+        Optional metadata filters are pushed down to SQL before scoring:
+        drone_id, action_type, since, until (episodes), rule_type (rules) and
+        include_poisoned=False (both tables).
+        """
+        episode_filters = {k: v for k, v in filters.items() if k in FILTERS["episodic_memory"]}
+        rule_filters = {k: v for k, v in filters.items() if k in FILTERS["semantic_rules"]}
+        unknown = set(filters) - set(episode_filters) - set(rule_filters)
+        if unknown:
+            raise TypeError(f"Unsupported retrieval filter(s): {sorted(unknown)}")
+
+        key = (query, limit, tuple(sorted(filters.items(), key=lambda item: item[0])))
+        cached = self._context_cache.get(key)
+        if cached is not None:
+            self._context_cache.move_to_end(key)
+            return cached
+
+        generation = self._generation
+        vector = await self._get_embedding(query)
+        embedded = any(vector)
+        if embedded:
+            pool = limit * max(1, Config.CONTEXT_POOL_FACTOR)
+            episode_hits, rule_hits = await asyncio.gather(
+                self.adb.find_similar_episodes_with_flags(vector, limit=pool, **episode_filters),
+                self.adb.find_similar_rules_with_flags(vector, limit=pool, **rule_filters),
+            )
+        else:
+            # A failed embedding scores every row 0: report no context rather than arbitrary rows
+            episode_hits, rule_hits = [], []
+        text, episodic, rules, tokens = self.context_builder.build(
+            [ContextHit(source="episodic", **hit) for hit in episode_hits],
+            [ContextHit(source="rule", **hit) for hit in rule_hits],
+            limit=limit,
+        )
+        context = MemoryContext(query=query, text=text, episodic=episodic, rules=rules, tokens=tokens)
+
+        # Don't cache a failed embedding, or a result that raced with an insert made while we were embedding
+        if embedded and generation == self._generation:
+            self._context_cache[key] = context
+            if len(self._context_cache) > self._context_cache_size:
+                self._context_cache.popitem(last=False)
+        return context
+
     async def retrieve_context(self, query: str) -> str:
         """Called by Supervisor to learn from past mistakes."""
-        vector = await self._get_embedding(query)
-        episodic = self.db.find_similar_episodes(vector)
-        rules = self.db.find_similar_rules(vector)
-
-        sections = []
-        if episodic:
-            sections.append("Past Experiences:\n- " + "\n- ".join(episodic))
-        if rules:
-            sections.append("Relevant Rules:\n- " + "\n- ".join(rules))
-        if not sections:
-            return "No relevant past experiences or rules found."
-        return "\n\n".join(sections)
+        return (await self.retrieve(query)).text
 
     async def retrieve_context_details(self, query: str, limit: int = 3) -> dict:
         """Return structured context for CLI/analysis."""
-        vector = await self._get_embedding(query)
-        episodic = self.db.find_similar_episodes_with_flags(vector, limit=limit)
-        rules = self.db.find_similar_rules_with_flags(vector, limit=limit)
-        return {"episodic": episodic, "rules": rules}
+        return (await self.retrieve(query, limit=limit)).details()
+
+    async def hazards_for_targets(self, targets: list, margin_m: float = 0.0) -> list:
+        """Spatial lookup: for each (lat, lon) target, the HAZARD rules whose area covers it."""
+        return await self.adb.hazards_for_targets(targets, margin_m=margin_m)
+
+    def start_compaction(self, interval: float = Config.COMPACTION_INTERVAL):
+        """Run episodic compaction in the background, one incremental step at a time."""
+        if interval <= 0 or self._compaction_task is not None:
+            return
+        self._compaction_task = asyncio.create_task(self._compaction_loop(interval))
+
+    async def _compaction_loop(self, interval: float):
+        while True:
+            try:
+                report = await self.adb.compact_episodes()
+            except Exception as e:
+                log.error(f"[Compaction] Step failed: {e}")
+                report = {"backlog": False}
+            if report.get("folded") or report.get("dropped"):
+                self._invalidate_context_cache()
+                log.info(
+                    f"[Compaction] scanned {report['scanned']}, folded {report['folded']}, "
+                    f"dropped {report['dropped']} in {report['elapsed_ms']:.0f} ms"
+                    + (" (index rebuilt)" if report["reindexed"] else "")
+                )
+            # Work through a backlog step by step, yielding the writer between steps
+            await asyncio.sleep(0.05 if report.get("backlog") else interval)
+
+    async def close(self):
+        """Stop background compaction, flush any queued memory writes and release the database."""
+        if self._compaction_task is not None:
+            self._compaction_task.cancel()
+            try:
+                await self._compaction_task
+            except asyncio.CancelledError:
+                pass
+            self._compaction_task = None
+        await self.embedder.close()
+        await self.adb.close()
+        self.embedding_cache.close()
 
-    def stats(self) -> dict:
+    async def stats(self) -> dict:
         """Lightweight counts for logging/visibility."""
         try:
-            return {
-                "episodes": self.db.count_episodes(),
-                "poisoned_episodes": self.db.count_poisoned(),
-                "rules": self.db.count_rules(),
-                "poisoned_rules": self.db.count_poisoned_rules(),
-            }
+            return await self.adb.stats()
         except Exception:
             return {"episodes": 0, "poisoned_episodes": 0, "rules": 0, "poisoned_rules": 0}
 
-    def snapshot(self, episodes: int = 5, rules: int = 5) -> dict:
+    async def snapshot(self, episodes: int = 5, rules: int = 5) -> dict:
         """
         Return recent episodes and rules for CLI display.
         """
         try:
-            return {
-                "episodes": self.db.recent_episodes(limit=episodes),
-                "rules": self.db.recent_rules(limit=rules),
-            }
+            return await self.adb.snapshot(episodes=episodes, rules=rules)
         except Exception:
             return {"episodes": [], "rules": []}
 
     async def add_rule(self, rule_text: str, rule_type: str, location: dict, confidence: float, is_poisoned: bool = False):
         """Add a semantic rule with embedding."""
         vector = await self._get_embedding(rule_text)
-        self.db.insert_rule(
+        await self.adb.insert_rule(
             rule_text=rule_text,
             rule_type=rule_type,
             location=location,
@@ -101,5 +240,6 @@ class MemoryInterface:
             embedding=vector,
             is_poisoned=1 if is_poisoned else 0
         )
+        self._invalidate_context_cache()
         tag = "[POISON_RULE]" if is_poisoned else "[Rule]"
         log.info(f"{tag} Added semantic rule: {rule_text}")
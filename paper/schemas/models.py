@@ -20,9 +20,12 @@ class Task(BaseModel):
     model_config = ConfigDict(extra="forbid") # <--- FIX
 
     task_id: str = Field(..., description="Unique ID for the task")
-    drone_id: int = Field(..., description="Target drone (1 or 2)")
+    drone_id: int = Field(..., description="Target drone id (see Available Drones)")
     action_type: Literal["move", "scan", "return"]
     params: TaskParams = Field(..., description="Execution parameters")
+    depends_on: Optional[List[str]] = Field(
+        None, description="task_ids that must succeed before this task starts; null = after this drone's previous task"
+    )
 
 class MissionPlan(BaseModel):
     model_config = ConfigDict(extra="forbid") # <--- FIX
@@ -34,4 +37,37 @@ class ToolResult(BaseModel):
     """Standardized return format for all tools."""
     success: bool
     message: str
-    data: Optional[dict] = None
\ No newline at end of file
+    data: Optional[dict] = None
+
+class ContextHit(BaseModel):
+    """One retrieved memory row (episode or rule) with its similarity score."""
+    source: Literal["episodic", "rule"]
+    text: str
+    score: float
+    poisoned: bool = False
+    rule_type: Optional[str] = None
+    location: Optional[str] = None
+    count: int = 1  # episodes folded into this one by compaction
+
+
+class MemoryContext(BaseModel):
+    """
+    Result of a single retrieval pass for one mission.
+    Shared by the CLI preview, the Supervisor prompt and the attack-effect verdict.
+    """
+    query: str
+    text: str = Field(..., description="Rendered CONTEXT FROM MEMORY block for the prompt")
+    episodic: List[ContextHit] = Field(default_factory=list)
+    rules: List[ContextHit] = Field(default_factory=list)
+    tokens: int = Field(0, description="Prompt tokens of `text` (core/context_builder.count_tokens)")
+
+    @property
+    def has_poison(self) -> bool:
+        return any(h.poisoned for h in self.episodic) or any(h.poisoned for h in self.rules)
+
+    def details(self) -> dict:
+        """Legacy dict shape used by the CLI helpers: {"episodic": [...], "rules": [...]}."""
+        return {
+            "episodic": [h.model_dump(exclude={"source", "rule_type", "location"}) for h in self.episodic],
+            "rules": [h.model_dump(exclude={"source", "count"}) for h in self.rules],
+        }
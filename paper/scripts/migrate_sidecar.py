@@ -0,0 +1,49 @@
+"""
+Convert an existing mission_memory.db to the memory-mapped embedding sidecar layout,
+or check an already converted one.
+
+Run from the paper/ directory:
+    python -m scripts.migrate_sidecar                      # convert/repair ./mission_memory.db
+    python -m scripts.migrate_sidecar path/to/other.db --rebuild
+    python -m scripts.migrate_sidecar --check
+"""
+import argparse
+from config import Config
+from core import database
+from core.database import DatabaseManager
+from core.embedding_store import EmbeddingStore
+from core.logger import log
+from core.vector_index import VectorIndex
+
+TABLES = ("episodic_memory", "semantic_rules")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("db_path", nargs="?", default=database.DB_PATH)
+    parser.add_argument("--rebuild", action="store_true", help="rewrite the sidecar files from scratch")
+    parser.add_argument("--check", action="store_true", help="only report consistency, do not write")
+    args = parser.parse_args()
+
+    if args.check:
+        # Open without the sidecar so startup does not repair anything before we look
+        Config.EMBEDDING_SIDECAR = False
+        db = DatabaseManager(args.db_path)
+        ok = True
+        for table in TABLES:
+            report = db.check_sidecar(table, VectorIndex(table, store=EmbeddingStore(args.db_path, table)))
+            log.print_json(report)
+            ok = ok and report["consistent"]
+        raise SystemExit(0 if ok else 1)
+
+    # Opening the manager converts/repairs each table's sidecar as part of startup
+    Config.EMBEDDING_SIDECAR = True
+    db = DatabaseManager(args.db_path)
+    for table in TABLES:
+        if args.rebuild:
+            db.rebuild_sidecar(table)
+        log.print_json(db.check_sidecar(table))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Re-embed every episode and rule in a memory DB with the configured (or given) embedding
+provider, e.g. after changing EMBEDDING_MODEL or switching to the local backend.
+
+Rows are re-embedded in id order, one batch per request and transaction; progress is
+kept in memory_maintenance, so an interrupted run resumes where it stopped. The vector
+index / sidecar is rebuilt at the end. Stop the mission runner first.
+
+Run from the paper/ directory:
+    python -m scripts.reembed                                  # ./mission_memory.db, Config provider
+    python -m scripts.reembed path/to/other.db --provider local --dim 384
+    python -m scripts.reembed --model mxbai-embed-large --batch 64
+"""
+import argparse
+import asyncio
+import json
+import time
+import numpy as np
+from config import Config
+from core import database
+from core.database import DatabaseManager
+from core.embeddings import make_provider
+from core.llm_client import close_client_manager
+from core.logger import log
+from interfaces.memory_interface import MemoryInterface
+
+# table -> (columns to read, row -> text that gets embedded)
+SOURCES = {
+    "episodic_memory": (
+        "drone_id, action_type, state_json, outcome_text",
+        lambda r: MemoryInterface.episode_text(r[0], r[1], json.loads(r[2]) if r[2] else {}, r[3]),
+    ),
+    "semantic_rules": ("rule_text", lambda r: r[0] or ""),
+}
+
+
+async def reembed_table(db: DatabaseManager, provider, table: str, batch: int) -> int:
+    columns, to_text = SOURCES[table]
+    key = f"reembed:{table}:{provider.name}"
+    row = db.conn.execute("SELECT value FROM memory_maintenance WHERE key = ?", (key,)).fetchone()
+    last_id = row[0] if row else 0
+    total = db.conn.execute(f"SELECT COUNT(*) FROM {table} WHERE id > ?", (last_id,)).fetchone()[0]
+    if last_id:
+        log.info(f"[Reembed:{table}] Resuming after id {last_id}")
+    done, t0 = 0, time.perf_counter()
+    while True:
+        rows = db.conn.execute(
+            f"SELECT id, {columns} FROM {table} WHERE id > ? ORDER BY id LIMIT ?", (last_id, batch)
+        ).fetchall()
+        if not rows:
+            break
+        vectors = await provider.embed_many([to_text(r[1:]) for r in rows])
+        db.conn.executemany(
+            f"UPDATE {table} SET embedding = ? WHERE id = ?",
+            [(np.asarray(v, dtype=np.float32).tobytes(), r[0]) for r, v in zip(rows, vectors)],
+        )
+        last_id = rows[-1][0]
+        db.conn.execute("INSERT OR REPLACE INTO memory_maintenance (key, value) VALUES (?, ?)", (key, last_id))
+        db.conn.commit()
+        done += len(rows)
+        rate = done / max(time.perf_counter() - t0, 1e-9)
+        log.info(f"[Reembed:{table}] {done}/{total} rows ({rate:.0f} rows/s)")
+    # Finished: forget the checkpoint so a later switch back to this provider starts over
+    db.conn.execute("DELETE FROM memory_maintenance WHERE key = ?", (key,))
+    db.conn.commit()
+    return done
+
+
+async def run(args):
+    provider = make_provider(args.provider, args.model, args.dim)
+    db = DatabaseManager(args.db_path)
+    try:
+        for table in SOURCES:
+            count = await reembed_table(db, provider, table, args.batch)
+            if Config.EMBEDDING_SIDECAR:
+                db.rebuild_sidecar(table)
+            log.success(f"[Reembed:{table}] {count} rows re-embedded with {provider.name} (dim {provider.dim})")
+    finally:
+        db.close()
+        await provider.close()
+        await close_client_manager()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("db_path", nargs="?", default=database.DB_PATH)
+    parser.add_argument("--provider", default=Config.EMBEDDING_PROVIDER, choices=("remote", "local"))
+    parser.add_argument("--model", default=Config.EMBEDDING_MODEL, help="remote embedding model")
+    parser.add_argument("--dim", type=int, default=Config.EMBEDDING_DIM, help="0 = detect (remote) / 768 (local)")
+    parser.add_argument("--batch", type=int, default=128)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
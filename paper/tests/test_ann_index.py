@@ -0,0 +1,34 @@
+import numpy as np
+from core.ann_index import IVFIndex
+
+
+def _trained_index(n: int = 256, dim: int = 16) -> tuple:
+    X = np.random.default_rng(0).normal(size=(n, dim)).astype(np.float32)
+    idx = IVFIndex("test", nlist=8, nprobe=8, min_train=64)
+    idx.add_many(list(range(1, n + 1)), X)
+    assert idx.trained
+    return idx, X
+
+
+def test_search_finds_exact_row():
+    idx, X = _trained_index()
+    assert idx.search(X[10], 3)[0][0] == 11
+
+
+def test_removed_rows_never_returned():
+    idx, X = _trained_index()
+    idx.remove([11])
+    hits = idx.search(X[10], 3)
+    assert 11 not in [row_id for row_id, _ in hits]
+    assert len(hits) == 3
+
+
+def test_remove_prunes_buckets_and_tails():
+    idx, X = _trained_index()
+    extra = np.random.default_rng(1).normal(size=(4, X.shape[1])).astype(np.float32)
+    idx.add_many([1001, 1002, 1003, 1004], extra)
+    idx.remove([5, 1002])
+    listed = np.concatenate([*idx._lists, *[np.asarray(t, dtype=np.int64) for t in idx._tails]])
+    assert not np.isin(idx.positions_of(np.array([5, 1002])), listed).any()
+    assert idx._tail_count == sum(len(t) for t in idx._tails)
+    assert 1002 not in [row_id for row_id, _ in idx.search(extra[1], 5)]
@@ -0,0 +1,59 @@
+from core.context_builder import EMPTY_CONTEXT, ContextBuilder, count_tokens
+from schemas.models import ContextHit
+
+
+def _episode(text: str, score: float) -> ContextHit:
+    return ContextHit(source="episodic", text=text, score=score)
+
+
+def _hazard(text: str, score: float, location=None) -> ContextHit:
+    return ContextHit(source="rule", text=text, score=score, rule_type="HAZARD", location=location)
+
+
+def test_stale_hazard_does_not_lead_the_prompt():
+    builder = ContextBuilder(budget=0)
+    episodes = [_episode("Drone 1 scanned sector A without incident", 0.82)]
+    stale = _hazard("HAZARD: jamming reported near the old depot", 0.027)
+    text, chosen_episodes, chosen_rules, _ = builder.build(episodes, [stale], limit=3)
+    assert chosen_rules == [stale] and chosen_episodes == episodes
+    # Under a tight budget the stale hazard is the one left out
+    tight = ContextBuilder(budget=count_tokens("Past Experiences:\n- " + episodes[0].text) + 4)
+    _, chosen_episodes, chosen_rules, _ = tight.build(episodes, [stale], limit=3)
+    assert chosen_episodes and not chosen_rules
+
+
+def test_hazard_boost_is_bounded():
+    # A hazard within the boost of an episode's score outranks it; one further below doesn't
+    episode = _episode("Drone 2 returned early, battery low", 0.80)
+    close = _hazard("HAZARD: power lines over sector B", 0.75)
+    far = _hazard("HAZARD: nesting birds in the north field", 0.50)
+    budget = count_tokens("Relevant Rules:\n- " + close.text) + 4
+    _, episodes, rules, _ = ContextBuilder(budget=budget, hazard_boost=0.1).build([episode], [close, far], limit=3)
+    assert rules == [close] and not episodes
+    budget = count_tokens("Past Experiences:\n- " + episode.text) + 4
+    _, episodes, rules, _ = ContextBuilder(budget=budget, hazard_boost=0.1).build([episode], [far], limit=3)
+    assert episodes == [episode] and not rules
+
+
+def test_near_duplicates_merge_and_count():
+    builder = ContextBuilder(budget=0, dedup=0.8)
+    text = "Drone 1 scanned sector A and found nothing unusual today"
+    _, episodes, _, _ = builder.build([_episode(text, 0.9), _episode(text + ".", 0.8)], [], limit=3)
+    assert len(episodes) == 1 and episodes[0].count == 2
+
+
+def test_hazard_with_location_renders_compact_line():
+    hazard = _hazard("HAZARD: GPS jamming", 0.6, location='{"lat": 47.39, "lon": 8.54, "radius": 40}')
+    text, _, _, _ = ContextBuilder().build([], [hazard])
+    assert text.startswith("Hazards:\n- (47.39, 8.54) r=40m: GPS jamming")
+
+
+def test_budget_is_respected():
+    builder = ContextBuilder(budget=60)
+    hits = [_episode(f"Episode {i} " + "word " * 40, 0.9 - i * 0.01) for i in range(5)]
+    _, _, _, tokens = builder.build(hits, [], limit=5)
+    assert tokens <= 60
+
+
+def test_empty_context():
+    assert ContextBuilder().build([], [])[0] == EMPTY_CONTEXT
@@ -0,0 +1,61 @@
+import asyncio
+from types import SimpleNamespace
+from core.embedding_batcher import EmbeddingBatcher
+
+
+class _Endpoint:
+    """embeddings.create stand-in: each text's vector encodes the text; "bad" fails any request it is in."""
+
+    def __init__(self):
+        self.calls = []
+
+    async def create(self, input, model):
+        self.calls.append(list(input))
+        await asyncio.sleep(0.01)
+        if "bad" in input:
+            raise ValueError("input rejected")
+        data = [SimpleNamespace(index=i, embedding=[float(len(t)), float(ord(t[0]))]) for i, t in enumerate(input)]
+        return SimpleNamespace(data=data)
+
+
+def _embed_all(texts) -> tuple:
+    endpoint = _Endpoint()
+
+    async def run():
+        batcher = EmbeddingBatcher(endpoint.create, "model", max_wait=0.05)
+        results = await asyncio.gather(*(batcher.embed(t) for t in texts), return_exceptions=True)
+        await batcher.close()
+        return results
+
+    return asyncio.run(run()), endpoint.calls
+
+
+def test_one_failed_input_only_fails_its_own_caller():
+    results, calls = _embed_all(["alpha", "bad", "charlie"])
+    assert results[0] == [5.0, float(ord("a"))]
+    assert isinstance(results[1], ValueError)
+    assert results[2] == [7.0, float(ord("c"))]
+    # One batch, then each item on its own
+    assert calls[0] == ["alpha", "bad", "charlie"]
+    assert sorted(map(tuple, calls[1:])) == [("alpha",), ("bad",), ("charlie",)]
+
+
+def test_duplicate_texts_share_one_slot():
+    results, calls = _embed_all(["alpha", "alpha", "bravo"])
+    assert results[0] == results[1] == [5.0, float(ord("a"))]
+    assert calls == [["alpha", "bravo"]]
+
+
+def test_short_response_fails_the_batch_not_the_items():
+    async def create(input, model):
+        covered = len(input) if len(input) == 1 else len(input) - 1  # drops the last input of a batch
+        return SimpleNamespace(data=[SimpleNamespace(index=i, embedding=[1.0, float(i)]) for i in range(covered)])
+
+    async def run():
+        batcher = EmbeddingBatcher(create, "model", max_wait=0.05)
+        results = await asyncio.gather(batcher.embed("a"), batcher.embed("b"))
+        await batcher.close()
+        return results
+
+    assert asyncio.run(run()) == [[1.0, 0.0], [1.0, 0.0]]
+
@@ -0,0 +1,35 @@
+import sqlite3
+import pytest
+from core.embedding_cache import EmbeddingCache
+
+
+@pytest.mark.parametrize("vector", [[0.0, 0.0, 0.0], [], [1.0, float("nan")], [float("inf"), 0.0]])
+def test_failure_vectors_are_never_cached(tmp_path, vector):
+    path = str(tmp_path / "embeddings.db")
+    cache = EmbeddingCache(path)
+    key = EmbeddingCache.key("model", "mission")
+    assert cache.put(key, "model", vector) is False
+    assert cache.get(key) is None
+    assert cache.stats()["stores"] == 0
+    cache.close()
+    conn = sqlite3.connect(path)
+    assert conn.execute("SELECT COUNT(*) FROM embedding_cache").fetchone()[0] == 0
+    conn.close()
+
+
+def test_real_vectors_survive_a_restart(tmp_path):
+    path = str(tmp_path / "embeddings.db")
+    key = EmbeddingCache.key("model", "Drone 1  goes\tnorth")
+    cache = EmbeddingCache(path)
+    assert cache.put(key, "model", [0.5, -0.25, 0.0])
+    cache.close()
+    reopened = EmbeddingCache(path)
+    assert reopened.get(EmbeddingCache.key("model", "Drone 1 goes north"), disk=False) is None  # LRU starts empty
+    assert reopened.get(EmbeddingCache.key("model", "Drone 1 goes north")) == [0.5, -0.25, 0.0]
+    assert reopened.stats()["hits_disk"] == 1
+    reopened.close()
+
+
+def test_key_depends_on_model_and_case():
+    assert EmbeddingCache.key("a", "Sector A") != EmbeddingCache.key("b", "Sector A")
+    assert EmbeddingCache.key("a", "Sector A") != EmbeddingCache.key("a", "sector a")
@@ -0,0 +1,75 @@
+import asyncio
+from types import SimpleNamespace
+from benchmarks.flight_state import SimDroneHW
+from core.flight_state import AIRBORNE, ARMED, DISARMED, LANDING, FlightStateMachine
+
+ARGS = SimpleNamespace(rate_hz=200.0, rpc_ms=1.0, home_ms=5.0, climb_mps=500.0)
+
+
+def _fly(scenario):
+    async def run():
+        hw = SimDroneHW(1, ARGS)
+        hw.telemetry.start()
+        await hw.telemetry.wait_for("in_air", lambda in_air: True, 1.0)
+        await hw.telemetry.wait_for("armed", lambda armed: True, 1.0)
+        try:
+            return await asyncio.wait_for(scenario(hw, FlightStateMachine(hw)), 5.0)
+        finally:
+            await hw.telemetry.close()
+    return asyncio.run(run())
+
+
+def test_land_when_grounded_is_skipped():
+    async def scenario(hw, flight):
+        assert await flight.land() == "Drone 1 already on the ground"
+        assert flight.state == DISARMED
+        assert flight.skipped == 1
+        assert hw.commands == 0
+    _fly(scenario)
+
+
+def test_takeoff_then_already_airborne():
+    async def scenario(hw, flight):
+        assert await flight.ensure_airborne(10.0) == "Drone 1 airborne at 10.0m"
+        assert flight.state == AIRBORNE
+        commands = hw.commands  # arm + set takeoff altitude + takeoff
+        assert await flight.ensure_airborne(10.0, adjust=False) == "Drone 1 already airborne"
+        assert hw.commands == commands == 3
+        assert set(flight.stats()) == {"disarmed->armed", "armed->airborne"}
+    _fly(scenario)
+
+
+def test_altitude_change_is_a_direct_climb():
+    async def scenario(hw, flight):
+        await flight.ensure_airborne(10.0)
+        await hw.telemetry.wait_for("in_air", lambda in_air: in_air, 1.0)
+        assert await flight.ensure_airborne(20.0) == "Drone 1 at 20.0m"
+        assert hw.commands == 4
+        assert flight.stats()["airborne->airborne"]["count"] == 1
+        # A scan doesn't adjust altitude
+        assert await flight.ensure_airborne(10.0, adjust=False) == "Drone 1 already airborne"
+        assert hw.commands == 4
+    _fly(scenario)
+
+
+def test_land_then_takeoff_skips_arm():
+    async def scenario(hw, flight):
+        await flight.ensure_airborne(10.0)
+        await hw.telemetry.wait_for("in_air", lambda in_air: in_air, 1.0)
+        assert await flight.land() == "Landing initiated"
+        assert flight.state == LANDING
+        await hw.wait_landed()
+        commands, skipped = hw.commands, flight.skipped
+        assert await flight.ensure_airborne(10.0) == "Drone 1 airborne at 10.0m"
+        assert hw.commands == commands + 2  # takeoff only: still armed
+        assert flight.skipped == skipped + 1
+        assert flight.state == AIRBORNE
+    _fly(scenario)
+
+
+def test_sync_follows_telemetry():
+    async def scenario(hw, flight):
+        hw.armed = True
+        await hw.telemetry.wait_for("armed", lambda armed: armed, 1.0)
+        assert flight.sync() == ARMED
+    _fly(scenario)
@@ -0,0 +1,87 @@
+import sqlite3
+import numpy as np
+from core.plan_cache import PlanCache
+from schemas.models import MissionPlan, Task, TaskParams
+
+MISSION = "Drone 1 goes to Sector A (Lat 47.396716, Lon 8.549858)."
+
+
+def _plan() -> MissionPlan:
+    task = Task(task_id="t1", drone_id=1, action_type="move", params=TaskParams(lat=47.396716, lon=8.549858))
+    return MissionPlan(reasoning="test", tasks=[task])
+
+
+def test_reload_from_disk(tmp_path):
+    path = str(tmp_path / "plans.db")
+    cache = PlanCache(path)
+    cache.put(MISSION, np.ones(4), "model", "digest", _plan(), 1000.0)
+    cache.close()
+    reloaded = PlanCache(path)
+    plan = reloaded.lookup(MISSION, np.ones(4), "model", "digest")
+    reloaded.close()
+    assert plan is not None and plan.tasks[0].task_id == "t1"
+
+
+def test_unreadable_rows_are_skipped_and_deleted(tmp_path):
+    path = str(tmp_path / "plans.db")
+    cache = PlanCache(path)
+    cache.put(MISSION, np.ones(4), "model", "digest", _plan(), 1000.0)
+    cache.put("other mission", np.ones(4), "model", "digest", _plan(), 1000.0)
+    cache.close()
+    conn = sqlite3.connect(path)
+    conn.execute("UPDATE plan_cache SET plan_json = ? WHERE mission = ?", ('{"tasks": 5}', "other mission"))
+    conn.commit()
+    conn.close()
+
+    reloaded = PlanCache(path)
+    assert reloaded.stats()["entries"] == 1
+    assert reloaded.lookup(MISSION, np.ones(4), "model", "digest") is not None
+    reloaded.close()
+    conn = sqlite3.connect(path)
+    assert conn.execute("SELECT COUNT(*) FROM plan_cache").fetchone()[0] == 1
+    conn.close()
+
+
+def test_changed_digest_invalidates_exact_mission():
+    cache = PlanCache()
+    cache.put(MISSION, np.ones(4), "model", "old", _plan(), 1000.0)
+    assert cache.lookup(MISSION, np.ones(4), "model", "new") is None
+    assert cache.stats()["invalidated"] == 1
+
+
+def test_near_match_needs_same_numbers():
+    cache = PlanCache(threshold=0.9)
+    cache.put(MISSION, np.ones(4), "model", "digest", _plan(), 1000.0)
+    assert cache.lookup("Drone 1 goes to Sector A (Lat 47.396716, Lon 8.549999).", np.ones(4), "model", "digest") is None
+    assert cache.lookup("Drone 1 flies to Sector A (Lat 47.396716, Lon 8.549858)", np.ones(4), "model", "digest") is not None
+
+
+def test_writes_from_the_event_loop_reach_disk(tmp_path):
+    import asyncio
+
+    path = str(tmp_path / "plans.db")
+
+    async def run():
+        cache = PlanCache(path)
+        cache.put(MISSION, np.ones(4), "model", "digest", _plan(), 1000.0)
+        assert cache.lookup(MISSION, np.ones(4), "model", "digest") is not None
+        await asyncio.gather(*cache._flushes)
+        cache.close()
+
+    asyncio.run(run())
+    conn = sqlite3.connect(path)
+    assert conn.execute("SELECT COUNT(*) FROM plan_cache").fetchone()[0] == 1
+    conn.close()
+
+
+def test_plan_failing_validation_is_dropped(tmp_path):
+    path = str(tmp_path / "plans.db")
+    cache = PlanCache(path)
+    cache.put(MISSION, np.ones(4), "model", "digest", _plan(), 1000.0)
+    assert cache.lookup(MISSION, np.ones(4), "model", "digest", validate=lambda plan: False) is None
+    assert cache.stats()["invalidated"] == 1
+    assert cache.lookup(MISSION, np.ones(4), "model", "digest") is None
+    cache.close()
+    conn = sqlite3.connect(path)
+    assert conn.execute("SELECT COUNT(*) FROM plan_cache").fetchone()[0] == 0
+    conn.close()
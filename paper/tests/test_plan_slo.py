@@ -0,0 +1,90 @@
+import asyncio
+from agents.supervisor import SupervisorAgent
+from config import Config
+from core.task_graph import DROPPED, WAITING, TaskGraph
+from schemas.models import MemoryContext, MissionPlan, Task, TaskParams
+
+MISSION = "Drone 1 goes to Sector A (Lat 47.396716, Lon 8.549858) at 20 m."
+LLM_PLAN = MissionPlan(
+    reasoning="llm",
+    tasks=[
+        Task(task_id="llm_move", drone_id=1, action_type="move", params=TaskParams(lat=47.396716, lon=8.549858, alt=25.0)),
+        Task(task_id="llm_scan", drone_id=1, action_type="scan", params=TaskParams(scan_target="sector A")),
+    ],
+)
+
+
+class _SlowLLM:
+    """Stands in for LLMEngine.request: answers with `plan` after `delay` seconds."""
+
+    def __init__(self, plan: MissionPlan, delay: float):
+        self.plan = plan
+        self.delay = delay
+
+    async def request(self, messages, **kwargs):
+        await asyncio.sleep(self.delay)
+        value = self.plan.model_copy(deep=True)
+        return {"value": value, "source": "network", "ms": self.delay * 1000.0, "prompt_tokens": None}
+
+
+def _race(monkeypatch, plan: MissionPlan, delay: float, hot_swap: bool = False) -> tuple:
+    monkeypatch.delenv("SCENARIO", raising=False)
+    monkeypatch.setattr(Config, "PLAN_CACHE_SIZE", 0)
+    monkeypatch.setattr(Config, "PLAN_STREAMING", False)
+    monkeypatch.setattr(Config, "PLAN_SLO_MS", 100.0)
+    monkeypatch.setattr(Config, "PLAN_HOT_SWAP", hot_swap)
+    monkeypatch.setattr(Config, "PLAN_HOT_SWAP_MAX_S", 2.0)
+    supervisor = SupervisorAgent(memory=None, llm=_SlowLLM(plan, delay), drone_ids=[1])
+    context = MemoryContext(query=MISSION, text="No relevant past experiences or rules found.")
+    graph = TaskGraph()
+    swaps = []
+
+    def on_swap(new_plan):
+        swaps.append(new_plan)
+        return graph.replace_pending(new_plan)
+
+    async def run():
+        return await supervisor.plan_mission(MISSION, memory_context=context, on_task=graph.submit, on_swap=on_swap)
+
+    result = asyncio.run(run())
+    return result, supervisor.last_timing, graph, swaps
+
+
+def _pending(graph: TaskGraph) -> list:
+    return [key for key, node in graph.nodes.items() if node["state"] == WAITING]
+
+
+def test_llm_within_the_slo_wins(monkeypatch):
+    plan, timing, graph, swaps = _race(monkeypatch, LLM_PLAN, delay=0.01)
+    assert timing["planner"] == "llm"
+    assert plan == LLM_PLAN
+    assert _pending(graph) == ["llm_move", "llm_scan"]
+    assert swaps == []
+
+
+def test_heuristic_plan_is_dispatched_at_the_deadline(monkeypatch):
+    plan, timing, graph, swaps = _race(monkeypatch, LLM_PLAN, delay=0.5)
+    assert timing["planner"] == "fallback"
+    assert timing["first_task_ms"] < 500.0
+    assert [t.action_type for t in plan.tasks] == ["move", "scan"] and plan.tasks[0].params.alt == 20.0
+    assert _pending(graph) == ["task_1", "task_2"]
+    assert swaps == []
+
+
+def test_late_llm_plan_is_hot_swapped_into_the_graph(monkeypatch):
+    plan, timing, graph, swaps = _race(monkeypatch, LLM_PLAN, delay=0.3, hot_swap=True)
+    assert timing["planner"] == "fallback->llm"
+    assert timing["first_task_ms"] < 300.0
+    assert swaps == [LLM_PLAN] and timing["swapped"] == 2
+    assert plan == LLM_PLAN
+    assert _pending(graph) == ["llm_move", "llm_scan"]
+    assert {graph.nodes[k]["state"] for k in ("task_1", "task_2")} == {DROPPED}
+
+
+def test_late_plan_failing_validation_keeps_the_heuristic_plan(monkeypatch):
+    move = Task(task_id="m", drone_id=1, action_type="move", params=TaskParams())  # passes pydantic, not _check_task
+    bad = MissionPlan(reasoning="no coordinates", tasks=[move])
+    plan, timing, graph, swaps = _race(monkeypatch, bad, delay=0.3, hot_swap=True)
+    assert timing["planner"] == "fallback"
+    assert swaps == []
+    assert _pending(graph) == ["task_1", "task_2"]
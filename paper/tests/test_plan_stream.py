@@ -0,0 +1,109 @@
+import asyncio
+import pytest
+from agents.supervisor import SupervisorAgent
+from config import Config
+from core.plan_cache import PlanCache
+from core.plan_stream import TaskStreamParser
+from schemas.models import MemoryContext, MissionPlan, Task, TaskParams
+
+PLAN = MissionPlan(
+    reasoning='Avoid {hazard} near "Sector C" [see memory]; tasks: none there.',
+    tasks=[
+        Task(task_id="t1", drone_id=1, action_type="move", params=TaskParams(lat=47.396716, lon=8.549858)),
+        Task(task_id="t2", drone_id=1, action_type="scan", params=TaskParams(scan_target='car "red" {left}')),
+    ],
+)
+DOCUMENT = PLAN.model_dump_json()
+MISSION = "Drone 1 goes to Sector A (Lat 47.396716, Lon 8.549858)."
+
+
+def _feed(chunks) -> list:
+    parser = TaskStreamParser()
+    out = []
+    for chunk in chunks:
+        out.append([t.task_id for t in parser.feed(chunk)])
+    return out
+
+
+def test_tasks_arrive_when_their_object_closes():
+    cut = DOCUMENT.index('"t2"')
+    assert _feed([DOCUMENT[:cut], DOCUMENT[cut:]]) == [["t1"], ["t2"]]
+
+
+def test_tasks_split_across_single_character_chunks():
+    parser = TaskStreamParser()
+    tasks = [t for ch in DOCUMENT for t in parser.feed(ch)]
+    assert tasks == PLAN.tasks
+    assert MissionPlan.model_validate_json(parser.text) == PLAN
+
+
+def test_partial_document_yields_nothing_yet():
+    inside_first = DOCUMENT[: DOCUMENT.index('"t1"') + 10]
+    assert _feed([inside_first]) == [[]]
+    assert _feed([DOCUMENT[: DOCUMENT.index('"t2"')]]) == [["t1"]]
+
+
+def test_malformed_task_raises():
+    parser = TaskStreamParser()
+    with pytest.raises(ValueError):
+        parser.feed('{"reasoning": "x", "tasks": [{"task_id": "t1", "drone_id": "one"}')
+
+
+class _StreamLLM:
+    """Stands in for LLMEngine.stream: yields `chunks`, then raises `error` if given."""
+
+    def __init__(self, chunks, error=None):
+        self.chunks = chunks
+        self.error = error
+
+    async def stream(self, messages, **kwargs):
+        for chunk in self.chunks:
+            await asyncio.sleep(0)
+            yield chunk
+        if self.error is not None:
+            raise self.error
+
+
+def _plan_streamed(monkeypatch, llm) -> tuple:
+    monkeypatch.delenv("SCENARIO", raising=False)
+    monkeypatch.setattr(Config, "PLAN_CACHE_SIZE", 0)
+    monkeypatch.setattr(Config, "PLAN_STREAMING", True)
+    monkeypatch.setattr(Config, "PLAN_SLO_MS", 0.0)
+    supervisor = SupervisorAgent(memory=None, llm=llm, drone_ids=[1])
+    context = MemoryContext(query=MISSION, text="No relevant past experiences or rules found.")
+    handed_out = []
+    plan = asyncio.run(supervisor.plan_mission(MISSION, memory_context=context, on_task=handed_out.append))
+    return plan, handed_out, supervisor.last_timing["planner"]
+
+
+def test_streamed_plan_hands_out_every_task(monkeypatch):
+    chunks = [DOCUMENT[i:i + 7] for i in range(0, len(DOCUMENT), 7)]
+    plan, handed_out, planner = _plan_streamed(monkeypatch, _StreamLLM(chunks))
+    assert planner == "llm"
+    assert plan == PLAN and handed_out == PLAN.tasks
+
+
+def test_stream_failing_before_any_task_falls_back(monkeypatch):
+    llm = _StreamLLM([DOCUMENT[:20]], error=RuntimeError("connection reset"))
+    plan, handed_out, planner = _plan_streamed(monkeypatch, llm)
+    assert planner == "fallback"
+    assert handed_out == plan.tasks and plan.tasks[0].params.lat == 47.396716
+
+
+def test_stream_failing_after_a_task_is_cut_short(monkeypatch):
+    stored = []
+    monkeypatch.setattr(PlanCache, "put", lambda self, *args: stored.append(args))
+    cut = DOCUMENT.index('"t2"')
+    llm = _StreamLLM([DOCUMENT[:cut]], error=RuntimeError("connection reset"))
+    plan, handed_out, planner = _plan_streamed(monkeypatch, llm)
+    assert planner == "llm (cut short)"
+    assert [t.task_id for t in plan.tasks] == ["t1"] and handed_out == plan.tasks
+    assert stored == []  # only a complete stream is worth reusing
+
+
+def test_complete_stream_is_cached(monkeypatch):
+    stored = []
+    monkeypatch.setattr(PlanCache, "put", lambda self, *args: stored.append(args))
+    plan, _, planner = _plan_streamed(monkeypatch, _StreamLLM([DOCUMENT]))
+    assert planner == "llm"
+    assert [args[4] for args in stored] == [plan]
@@ -0,0 +1,83 @@
+import os
+import sqlite3
+import numpy as np
+from config import Config
+from core.database import DatabaseManager
+from core.embedding_store import HEADER, ROW_DTYPE
+
+DIM = 8
+TABLE = "episodic_memory"
+
+
+def _open(monkeypatch, path) -> DatabaseManager:
+    monkeypatch.setattr(Config, "EMBEDDING_SIDECAR", True)
+    monkeypatch.setattr(Config, "VECTOR_INDEX", "exact")
+    monkeypatch.setattr(Config, "DB_WRITE_MODE", "sync")
+    return DatabaseManager(path)
+
+
+def _seed(monkeypatch, tmp_path, rows: int = 12) -> str:
+    path = str(tmp_path / "memory.db")
+    db = _open(monkeypatch, path)
+    rng = np.random.default_rng(0)
+    for i in range(rows):
+        db.insert_episode(1, "scan", {}, f"episode {i}", rng.normal(size=DIM).astype(np.float32).tolist())
+    db.close()
+    return path
+
+
+def _sqlite_top_k(path, query, k: int = 3) -> list:
+    """Reference ranking straight from the SQLite BLOBs."""
+    conn = sqlite3.connect(path)
+    rows = conn.execute(f"SELECT outcome_text, embedding FROM {TABLE} ORDER BY id").fetchall()
+    conn.close()
+    matrix = np.stack([np.frombuffer(blob, dtype=np.float32) for _, blob in rows])
+    scores = matrix @ query / (np.linalg.norm(matrix, axis=1) * np.linalg.norm(query))
+    return [rows[i][0] for i in np.argsort(-scores, kind="stable")[:k]]
+
+
+def _assert_matches_sqlite(db: DatabaseManager):
+    assert db.check_sidecar(TABLE)["consistent"]
+    rng = np.random.default_rng(1)
+    for _ in range(5):
+        query = rng.normal(size=DIM).astype(np.float32)
+        assert db.find_similar_episodes(query.tolist(), limit=3) == _sqlite_top_k(db.db_path, query)
+
+
+def test_truncated_sidecar_is_topped_up(monkeypatch, tmp_path):
+    path = _seed(monkeypatch, tmp_path)
+    vec_path, ids_path = f"{path}-{TABLE}.vec", f"{path}-{TABLE}.ids"
+    # A crash mid-append: the last rows are gone and the final vector row is torn
+    with open(vec_path, "r+b") as f:
+        f.truncate(HEADER.size + 4 * DIM * 7 + 5)
+    with open(ids_path, "r+b") as f:
+        f.truncate(ROW_DTYPE.itemsize * 8)
+    db = _open(monkeypatch, path)
+    assert len(db.episode_index) == 12
+    _assert_matches_sqlite(db)
+    db.close()
+
+
+def test_stale_sidecar_is_rebuilt(monkeypatch, tmp_path):
+    path = _seed(monkeypatch, tmp_path)
+    # The sidecar names a row SQLite doesn't have in place of one it does: not fixable by appending
+    rows = np.memmap(f"{path}-{TABLE}.ids", dtype=ROW_DTYPE, mode="r+")
+    rows["id"][3] = 999
+    rows.flush()
+    del rows
+    db = _open(monkeypatch, path)
+    assert 999 not in set(np.asarray(db.episode_index.ids).tolist())
+    _assert_matches_sqlite(db)
+    db.close()
+
+
+def test_rows_deleted_from_sqlite_are_tombstoned(monkeypatch, tmp_path):
+    path = _seed(monkeypatch, tmp_path)
+    conn = sqlite3.connect(path)
+    conn.execute(f"DELETE FROM {TABLE} WHERE id IN (2, 5)")
+    conn.commit()
+    conn.close()
+    db = _open(monkeypatch, path)
+    _assert_matches_sqlite(db)
+    db.close()
+    assert os.path.getsize(f"{path}-{TABLE}.ids") == ROW_DTYPE.itemsize * 12  # tombstoned, not rewritten
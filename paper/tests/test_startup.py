@@ -0,0 +1,63 @@
+import asyncio
+import pytest
+from core.startup import StartupPipeline
+
+
+async def _fail(message: str):
+    await asyncio.sleep(0.01)
+    raise RuntimeError(message)
+
+
+def test_failed_stage_is_recorded_and_raised():
+    async def run():
+        pipeline = StartupPipeline(pipelined=True)
+        with pytest.raises(RuntimeError, match="memory down"):
+            await pipeline.stage("memory load", _fail("memory down"))
+        return pipeline
+    pipeline = asyncio.run(run())
+    start, end = pipeline.spans["memory load"]
+    assert end >= start + 5.0
+
+
+def test_cancelled_stage_is_recorded():
+    async def run():
+        pipeline = StartupPipeline(pipelined=True)
+        task = asyncio.ensure_future(pipeline.stage("planning", asyncio.sleep(10.0)))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        return pipeline
+    assert "planning" in asyncio.run(run()).spans
+
+
+def test_one_drone_failing_does_not_block_the_others():
+    async def run():
+        pipeline = StartupPipeline(pipelined=False, settle_s=0.0)
+        await pipeline.start_drones({1: lambda: asyncio.sleep(0.01), 2: lambda: _fail("no GPS lock")})
+        return [await pipeline.drone_ready(d) for d in (1, 2)]
+    assert asyncio.run(run()) == [True, False]
+
+
+def test_cancelled_waiter_leaves_the_bring_up_running():
+    async def run():
+        pipeline = StartupPipeline(pipelined=True)
+        await pipeline.start_drones({1: lambda: asyncio.sleep(0.05)})
+        waiter = asyncio.ensure_future(pipeline.drone_ready(1))
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        return await pipeline.drone_ready(1)
+    assert asyncio.run(run()) is True
+
+
+def test_cancelled_bring_up_is_not_ready():
+    async def run():
+        pipeline = StartupPipeline(pipelined=True)
+        await pipeline.start_drones({1: lambda: asyncio.sleep(10.0)})
+        waiter = asyncio.ensure_future(pipeline.drone_ready(1))
+        await asyncio.sleep(0.01)
+        pipeline._drones[1].cancel()
+        return await waiter
+    assert asyncio.run(run()) is False
@@ -0,0 +1,115 @@
+import asyncio
+from types import SimpleNamespace
+from core.swarm import SwarmExecutor, TakeoffWaves, task_resources
+from core.task_graph import CANCELLED, DONE, FAILED, RUNNING, WAITING, TaskGraph
+from schemas.models import MissionPlan, Task, TaskParams, ToolResult
+
+
+def _task(task_id, drone_id, action="move", depends_on=None, lat=47.0):
+    params = TaskParams(lat=lat, lon=8.0) if action == "move" else TaskParams(scan_target="sector")
+    return Task(task_id=task_id, drone_id=drone_id, action_type=action, params=params, depends_on=depends_on)
+
+
+def _runnable(graph):
+    return [key for key, _ in graph.runnable()]
+
+
+def test_implicit_edges_follow_each_drones_order():
+    graph = TaskGraph()
+    for task in (_task("a1", 1), _task("a2", 1, "scan"), _task("b1", 2)):
+        graph.submit(task)
+    assert _runnable(graph) == ["a1", "b1"]
+    graph.start("a1")
+    graph.finish("a1", True)
+    assert _runnable(graph) == ["a2", "b1"]
+
+
+def test_failure_cancels_only_dependents():
+    graph = TaskGraph()
+    graph.submit(_task("move_a", 1))
+    graph.submit(_task("scan_a", 1, "scan", depends_on=["move_a"]))
+    graph.submit(_task("move_b", 1, depends_on=[], lat=48.0))
+    graph.submit(_task("other", 2, depends_on=["scan_a"]))
+    graph.start("move_a")
+    cancelled = graph.finish("move_a", False)
+    assert sorted(t.task_id for t in cancelled) == ["other", "scan_a"]
+    assert graph.nodes["move_b"]["state"] == WAITING
+    assert _runnable(graph) == ["move_b"]
+
+
+def test_unknown_dependency_fails_the_task():
+    graph = TaskGraph()
+    graph.submit(_task("scan", 1, "scan", depends_on=["nope"]))
+    graph.submit(_task("after", 1, depends_on=["scan"]))
+    assert graph.nodes["scan"]["state"] == FAILED
+    assert graph.nodes["after"]["state"] == CANCELLED
+    graph.close()
+    assert graph.finished
+
+
+def test_replace_pending_maps_started_tasks():
+    graph = TaskGraph()
+    graph.submit(_task("m1", 1))
+    graph.submit(_task("s1", 1, "scan"))
+    graph.start("m1")
+    new = MissionPlan(reasoning="swap", tasks=[
+        _task("move", 1),                      # same as the running m1
+        _task("scan", 1, "scan", depends_on=["move"]),
+    ])
+    assert graph.replace_pending(new) == (1, 1)
+    assert graph.nodes["m1"]["state"] == RUNNING
+    assert _runnable(graph) == []
+    graph.finish("m1", True)
+    assert _runnable(graph) == ["scan"]
+
+
+def test_return_and_scan_are_exclusive():
+    airborne = SimpleNamespace(airborne=True)
+    scan = task_resources(_task("s", 1, "scan"), airborne)
+    ret = task_resources(_task("r", 1, "return"), airborne)
+    move = task_resources(_task("m", 1), airborne)
+    assert scan & ret
+    assert not scan & move
+    assert not ret & task_resources(_task("s2", 2, "scan"), airborne)
+
+
+class _Worker:
+    def __init__(self, drone_id, log):
+        self.drone_id = drone_id
+        self.airborne = True
+        self.log = log
+
+    async def execute_task(self, task):
+        self.log.append(("start", task.task_id))
+        await asyncio.sleep(0.01)
+        self.log.append(("end", task.task_id))
+        return ToolResult(success=True, message="ok")
+
+
+def test_executor_never_returns_mid_scan():
+    events = []
+    graph = TaskGraph()
+    graph.submit(_task("move", 1))
+    graph.submit(_task("scan", 1, "scan", depends_on=["move"]))
+    # The plan lets the return start right after the move, but the scan holds the camera
+    graph.submit(_task("home", 1, "return", depends_on=["move"]))
+    graph.close()
+    executor = SwarmExecutor({1: _Worker(1, events)}, concurrency=0, waves=TakeoffWaves(0))
+    results = asyncio.run(executor.run(graph))
+    assert all(r["result"].success for r in results)
+    assert events.index(("start", "home")) > events.index(("end", "scan"))
+    assert {node["state"] for node in graph.nodes.values()} == {DONE}
+
+
+def test_executor_reports_unknown_dependency_as_failed():
+    graph = TaskGraph()
+    graph.submit(_task("move", 1))
+    graph.submit(_task("scan", 1, "scan", depends_on=["nope"]))
+    graph.submit(_task("home", 1, "return", depends_on=["scan"]))
+    graph.close()
+    executor = SwarmExecutor({1: _Worker(1, [])}, concurrency=0, waves=TakeoffWaves(0))
+    results = asyncio.run(executor.run(graph))
+    outcome = {r["task"].task_id: r["result"].success for r in results}
+    assert outcome == {"move": True, "scan": False}
+    report = executor.report()[1]
+    assert (report["tasks"], report["ok"], report["failed"], report["skipped"]) == (2, 1, 1, 1)
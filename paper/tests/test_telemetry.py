@@ -0,0 +1,80 @@
+import asyncio
+from core.telemetry import TelemetryHub
+
+
+async def _silent():
+    await asyncio.Event().wait()
+    yield
+
+
+def test_subscription_keeps_values_published_before_the_first_read():
+    async def run():
+        hub = TelemetryHub(1, {"position": _silent})
+        positions = hub.subscribe("position")
+        hub._publish("position", 1)
+        hub._publish("position", 2)
+        assert await asyncio.wait_for(positions.__anext__(), 1.0) == 2
+        await positions.aclose()
+        hub._publish("position", 3)
+        assert [value async for value in positions] == []
+        await hub.close()
+    asyncio.run(run())
+
+
+def test_wait_for_answers_from_the_cache():
+    async def run():
+        hub = TelemetryHub(1, {"in_air": _silent})
+        hub._publish("in_air", False)
+        value = await hub.wait_for("in_air", lambda in_air: not in_air, timeout=0.01)
+        stats = hub.stats()["in_air"]
+        await hub.close()
+        return value, stats
+    value, stats = asyncio.run(run())
+    assert value is False and stats["cached"] == 1
+
+
+def test_wait_for_timeout_removes_the_waiter():
+    async def run():
+        hub = TelemetryHub(1, {"in_air": _silent})
+        try:
+            await hub.wait_for("in_air", lambda in_air: in_air, timeout=0.01)
+        except asyncio.TimeoutError:
+            pass
+        else:
+            raise AssertionError("wait_for did not time out")
+        waiters = list(hub._waiters["in_air"])
+        hub._publish("in_air", True)  # must not touch the abandoned future
+        await hub.close()
+        return waiters
+    assert asyncio.run(run()) == []
+
+
+def test_cancelled_wait_for_removes_the_waiter():
+    async def run():
+        hub = TelemetryHub(1, {"in_air": _silent})
+        waiter = asyncio.ensure_future(hub.wait_for("in_air", lambda in_air: in_air))
+        await asyncio.sleep(0.01)
+        registered = len(hub._waiters["in_air"])
+        waiter.cancel()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            pass
+        await hub.close()
+        return registered, list(hub._waiters["in_air"])
+    assert asyncio.run(run()) == (1, [])
+
+
+def test_subscription_abandoned_after_a_timeout_is_removed():
+    async def run():
+        hub = TelemetryHub(1, {"position": _silent})
+        positions = hub.subscribe("position")
+        try:
+            await asyncio.wait_for(positions.__anext__(), 0.01)
+        except asyncio.TimeoutError:
+            pass
+        await positions.aclose()
+        queues = len(hub._queues["position"])
+        await hub.close()
+        return queues
+    assert asyncio.run(run()) == 0
@@ -0,0 +1,23 @@
+import numpy as np
+from core.vector_index import VectorIndex, top_k
+
+
+def test_limit_past_live_rows_returns_only_scorable_rows():
+    idx = VectorIndex("test")
+    idx.add_many([1, 2, 3], np.eye(3, dtype=np.float32))
+    idx.remove([2])
+    hits = idx.search([1.0, 0.5, 0.0], 5)
+    assert [row_id for row_id, _ in hits] == [1, 3]
+    assert all(np.isfinite(score) for _, score in hits)
+
+
+def test_zero_vectors_never_returned():
+    idx = VectorIndex("test")
+    idx.add_many([1, 2], np.array([[0.0, 0.0], [1.0, 0.0]], dtype=np.float32))
+    assert idx.search([1.0, 0.0], 3) == [(2, 1.0)]
+
+
+def test_top_k_keeps_insertion_order_on_ties():
+    scores = np.array([0.5, 0.9, 0.5, -np.inf, 0.5], dtype=np.float32)
+    assert top_k(scores, 3).tolist() == [1, 0, 2]
+    assert top_k(scores, 10).tolist() == [1, 0, 2, 4]
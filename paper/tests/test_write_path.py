@@ -0,0 +1,56 @@
+import sqlite3
+import numpy as np
+from config import Config
+from core.database import DatabaseManager
+
+
+def _vector(seed: int) -> list:
+    return np.random.default_rng(seed).normal(size=8).astype(np.float32).tolist()
+
+
+def _batched(monkeypatch, tmp_path) -> DatabaseManager:
+    monkeypatch.setattr(Config, "DB_WRITE_MODE", "batched")
+    monkeypatch.setattr(Config, "DB_BATCH_SIZE", 10000)
+    monkeypatch.setattr(Config, "DB_FLUSH_INTERVAL", 3600.0)  # only explicit flushes in these tests
+    return DatabaseManager(str(tmp_path / "memory.db"))
+
+
+def _outcomes(path) -> list:
+    conn = sqlite3.connect(path)
+    rows = [r[0] for r in conn.execute("SELECT outcome_text FROM episodic_memory ORDER BY id")]
+    conn.close()
+    return rows
+
+
+def test_insert_is_visible_after_flush(monkeypatch, tmp_path):
+    db = _batched(monkeypatch, tmp_path)
+    db.insert_episode(1, "move", {}, "reached sector A", _vector(0))
+    assert _outcomes(db.db_path) == []
+    assert db.flush() == 1
+    assert _outcomes(db.db_path) == ["reached sector A"]
+    assert db.find_similar_episodes(_vector(0), limit=1) == ["reached sector A"]
+    db.close()
+
+
+def test_close_drains_the_queue(monkeypatch, tmp_path):
+    db = _batched(monkeypatch, tmp_path)
+    for i in range(3):
+        db.insert_episode(1, "scan", {}, f"episode {i}", _vector(i))
+    db.close()
+    assert _outcomes(db.db_path) == ["episode 0", "episode 1", "episode 2"]
+
+
+def test_failing_row_does_not_lose_its_batch_mates(monkeypatch, tmp_path):
+    db = _batched(monkeypatch, tmp_path)
+    for i in range(3):
+        db.insert_episode(1, "scan", {}, f"episode {i}", _vector(i))
+    # Another writer takes the id pre-assigned to the middle row, so the group commit fails
+    other = sqlite3.connect(db.db_path)
+    other.execute("INSERT INTO episodic_memory (id, outcome_text) VALUES (2, 'other writer')")
+    other.commit()
+    other.close()
+    assert db.flush() == 2
+    assert db.dropped_writes == 1
+    assert _outcomes(db.db_path) == ["episode 0", "other writer", "episode 2"]
+    assert db.find_similar_episodes(_vector(2), limit=1) == ["episode 2"]
+    db.close()